@@ -0,0 +1,47 @@
+"""add search paragraphs
+
+Revision ID: 4b8e2f7a9c31
+Revises: d101d27abc22
+Create Date: 2026-10-17 16:10:12.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e2f7a9c31'
+down_revision: Union[str, Sequence[str], None] = 'd101d27abc22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GIN indexes that lead with the book_id uuid
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gin')
+    op.create_table('search_paragraphs',
+    sa.Column('chapter_id', sa.UUID(), nullable=False),
+    sa.Column('paragraph', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.UUID(), nullable=False),
+    sa.Column('chapter_order', sa.Integer(), nullable=False),
+    sa.Column('raw', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('translated', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('raw_tsv', postgresql.TSVECTOR(), nullable=False),
+    sa.Column('translated_tsv', postgresql.TSVECTOR(), nullable=False),
+    sa.ForeignKeyConstraint(['chapter_id'], ['chapters.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('chapter_id', 'paragraph')
+    )
+    op.create_index('ix_search_paragraphs_book_id_raw_tsv', 'search_paragraphs', ['book_id', 'raw_tsv'], unique=False, postgresql_using='gin')
+    op.create_index('ix_search_paragraphs_book_id_translated_tsv', 'search_paragraphs', ['book_id', 'translated_tsv'], unique=False, postgresql_using='gin')
+    # Existing chapters are indexed by POST /api/v1/search/{book_id}/reindex
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_search_paragraphs_book_id_translated_tsv', table_name='search_paragraphs', postgresql_using='gin')
+    op.drop_index('ix_search_paragraphs_book_id_raw_tsv', table_name='search_paragraphs', postgresql_using='gin')
+    op.drop_table('search_paragraphs')
@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends
+import uuid
+from typing import Literal, Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import get_session
-from app.schemas.book import BookCreate, BookResponse
+from app.core.database import get_session, get_async_session, new_async_session
+from app.models.book import Book
+from app.schemas.book import BookCreate, BookResponse, ConsistencyReport, IngestBookResponse
+from app.schemas.job import JobResponse
 from app.services import book as book_service
+from app.services import consistency as consistency_service
+from app.services import export as export_service
+from app.services import ingest as ingest_service
 
 router = APIRouter(prefix="/books", tags=["books"])
 
+_UPLOAD_CHUNK_SIZE = 256 * 1024
+
 
 @router.post("", response_model=BookResponse)
 def create_book(
@@ -15,3 +28,118 @@ def create_book(
 ):
     book = book_service.create_book(session=session, data=request)
     return book
+
+
+async def _ensure_book(session: AsyncSession, book_id: uuid.UUID) -> None:
+    if await session.get(Book, book_id) is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+
+@router.post("/{book_id}/ingest", response_model=IngestBookResponse, status_code=202)
+async def ingest_book(
+    book_id: uuid.UUID,
+    file: UploadFile = File(...),
+    encoding: str = Form("utf-8"),
+    parallelism: Optional[int] = Form(None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Upload a whole novel as a text file; chapters are split on 第X章 headings."""
+    await _ensure_book(session, book_id)
+
+    async def chunks():
+        while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    try:
+        job, total = await ingest_service.ingest_book(
+            session, book_id, chunks(), encoding=encoding, parallelism=parallelism
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return IngestBookResponse(job_id=job.id, chapters=total)
+
+
+@router.post("/{book_id}/ingest/stream", response_model=IngestBookResponse, status_code=202)
+async def ingest_book_stream(
+    book_id: uuid.UUID,
+    request: Request,
+    encoding: str = "utf-8",
+    parallelism: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Same as /ingest but reads the novel from a streamed text/plain request body."""
+    await _ensure_book(session, book_id)
+    try:
+        job, total = await ingest_service.ingest_book(
+            session, book_id, request.stream(), encoding=encoding, parallelism=parallelism
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return IngestBookResponse(job_id=job.id, chapters=total)
+
+
+@router.post("/{book_id}/ingest/resume", response_model=JobResponse, status_code=202)
+async def resume_ingest(
+    book_id: uuid.UUID,
+    parallelism: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Queue a new pipeline run for ingested chapters that are not translated yet."""
+    await _ensure_book(session, book_id)
+    return await ingest_service.submit_ingest_job(session, book_id, parallelism)
+
+
+@router.get("/{book_id}/consistency", response_model=ConsistencyReport)
+async def check_consistency(
+    book_id: uuid.UUID,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Find translated paragraphs that do not use the glossary translation of a term they contain."""
+    await _ensure_book(session, book_id)
+    return await consistency_service.check_book(session, book_id)
+
+
+@router.post("/{book_id}/consistency/repair", response_model=Optional[JobResponse], status_code=202)
+async def repair_consistency(
+    book_id: uuid.UUID,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Check the book and queue re-translation of just the offending paragraphs (null if none)."""
+    await _ensure_book(session, book_id)
+    report = await consistency_service.check_book(session, book_id)
+    return await consistency_service.submit_repair_job(session, book_id, report["queue"])
+
+
+@router.get("/{book_id}/export")
+async def export_book(
+    book_id: uuid.UUID,
+    request: Request,
+    format: Literal["epub", "txt"] = "epub",
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Download the translated book, streamed chapter by chapter (a file send once cached)."""
+    book = await session.get(Book, book_id)
+    if book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    version = await export_service.export_version(session, book)
+    etag = f'"{version}"'
+    headers = {
+        "ETag": etag,
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(f'{book.title}.{format}')}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    media_type = export_service.MEDIA_TYPES[format]
+    path = export_service.cached_path(book.id, format, version)
+    if path is not None:
+        export_service.export_requests.inc(format=format, result="cached")
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    async def body():
+        # The session must outlive the handler, so it is owned by the stream itself
+        async with new_async_session() as stream_session:
+            async for chunk in export_service.stream_export(stream_session, book, format, version):
+                yield chunk
+
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
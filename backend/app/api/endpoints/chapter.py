@@ -1,9 +1,17 @@
+import json
+import logging
 import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import get_session
+from app.core.config import settings
+from app.core.database import get_session, get_async_session, new_async_session
 from fastapi import HTTPException
 
 from app.schemas.chapter import (
@@ -11,76 +19,122 @@ from app.schemas.chapter import (
     TranslateChapterResponse,
     ChapterListItem,
     ChapterDetailResponse,
+    ChapterParagraphsResponse,
 )
 from app.services import chapter as chapter_service
+from app.services import reader as reader_service
 from app.repositories import chapter as chapter_repo
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/chapter", tags=["chapter"])
 
 
 @router.get("/list/{book_id}", response_model=list[ChapterListItem])
 def list_chapters(
     book_id: uuid.UUID,
+    response: Response,
+    after: Optional[int] = Query(None, description="Cursor: order of the last chapter already received"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.TOC_MAX_PAGE_SIZE),
+    title_only: bool = Query(False, description="Return the translated title string instead of the title object"),
     session: Session = Depends(get_session),
 ):
-    return chapter_repo.list_by_book_id(session, book_id)
+    """Translated chapters in order. With `limit`, the next page's cursor is in X-Next-Cursor."""
+    if title_only:
+        items, next_cursor = reader_service.get_toc_page(session, book_id, after, limit)
+    else:
+        items = chapter_repo.list_by_book_id(
+            session, book_id, after=after, limit=limit + 1 if limit else None
+        )
+        next_cursor = None
+        if limit and len(items) > limit:
+            items = items[:limit]
+            next_cursor = items[-1]["order"]
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return items
 
 
 @router.get("/{book_id}/{order}", response_model=ChapterDetailResponse)
 def get_chapter(
     book_id: uuid.UUID,
     order: int,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
 ):
-    chapter = chapter_repo.get_by_book_and_order(session, book_id, order)
-    if chapter is None:
+    cached = reader_service.get_chapter(session, book_id, order)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Chapter not found")
+    detail, etag, last_modified = cached
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return detail
+
 
-    # Extract translated and raw text from paragraphs
-    translated_paragraphs: list[str] = []
-    raw_paragraphs: list[str] = []
-    if chapter.paragraphs:
-        for p in chapter.paragraphs:
-            if isinstance(p, dict):
-                translated_paragraphs.append(p.get("translated", p.get("raw", "")))
-                raw_paragraphs.append(p.get("raw", ""))
-            elif isinstance(p, str):
-                translated_paragraphs.append(p)
-                raw_paragraphs.append(p)
-
-    # Get translated title
-    title_text = None
-    if chapter.title:
-        if isinstance(chapter.title, dict):
-            title_text = chapter.title.get("translated", chapter.title.get("raw"))
-        elif isinstance(chapter.title, str):
-            title_text = chapter.title
-
-    prev_order, next_order = chapter_repo.get_adjacent_orders(session, book_id, order)
-
-    return ChapterDetailResponse(
-        id=chapter.id,
-        title=title_text,
-        order=chapter.order,
-        summary=chapter.summary,
-        paragraphs=translated_paragraphs,
-        raw_paragraphs=raw_paragraphs,
-        prev_order=prev_order,
-        next_order=next_order,
+@router.get("/{book_id}/{order}/paragraphs", response_model=ChapterParagraphsResponse)
+def get_chapter_paragraphs(
+    book_id: uuid.UUID,
+    order: int,
+    start: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    side: Literal["translated", "raw", "both"] = "both",
+    session: Session = Depends(get_session),
+):
+    """A range of a chapter's paragraphs, for lazy loading in the reader."""
+    sides = ("translated", "raw") if side == "both" else (side,)
+    page = chapter_repo.get_paragraph_range(session, book_id, order, start, limit, sides)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    return ChapterParagraphsResponse(
+        start=start,
+        total=page["total"],
+        paragraphs=page.get("translated"),
+        raw_paragraphs=page.get("raw"),
     )
 
 
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
 @router.post("/translate", response_model=TranslateChapterResponse)
 async def translate_chapter(
     request: TranslateChapterRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     result = await chapter_service.translate_chapter(
         session=session,
         text=request.text,
         book_id=request.book_id,
         chapter_id=request.chapter_id,
+        chunked=request.chunked,
     )
+    return _translate_response(result)
+
+
+def _translate_response(result: dict) -> TranslateChapterResponse:
     return TranslateChapterResponse(
         sentences=result["sentences"],
         chapter_id=result["chapter_id"],
@@ -88,3 +142,39 @@ async def translate_chapter(
         order=result["order"],
         summary=result["summary"],
     )
+
+
+@router.post("/translate/stream")
+async def translate_chapter_stream(request: TranslateChapterRequest):
+    """Server-Sent Events: one `paragraph` event per translated paragraph, then `done`.
+
+    A paragraph that could not be decoded gets an `error` event with its index;
+    if the translation fails, an `error` event without an index ends the stream.
+    """
+
+    async def events():
+        # The session must outlive the handler, so it is owned by the stream itself
+        async with new_async_session() as session:
+            try:
+                async for event, data in chapter_service.translate_chapter_stream(
+                    session=session,
+                    text=request.text,
+                    book_id=request.book_id,
+                    chapter_id=request.chapter_id,
+                ):
+                    if event == "done":
+                        payload = _translate_response(data).model_dump_json()
+                    else:
+                        payload = json.dumps(data, ensure_ascii=False)
+                    yield f"event: {event}\ndata: {payload}\n\n"
+            except Exception as e:
+                # Headers are already sent, so the failure can only be reported in-band
+                logger.exception("Streamed translation failed")
+                payload = json.dumps({"detail": str(e)}, ensure_ascii=False)
+                yield f"event: error\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
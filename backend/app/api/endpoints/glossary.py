@@ -1,9 +1,20 @@
+import uuid
+from typing import Optional
+
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import get_session
-from app.schemas.glossary import ExtractGlossaryRequest, ExtractGlossaryResponse
+from app.core.database import get_async_session
+from app.schemas.glossary import (
+    ExtractGlossaryRequest,
+    ExtractGlossaryResponse,
+    GlossaryItemSchema,
+    RenameGlossaryRequest,
+    RenameGlossaryResponse,
+)
 from app.services import glossary as glossary_service
+from app.services import glossary_index
+from app.services import glossary_rename
 
 router = APIRouter(prefix="/glossary", tags=["glossary"])
 
@@ -11,7 +22,7 @@ router = APIRouter(prefix="/glossary", tags=["glossary"])
 @router.post("/extract", response_model=ExtractGlossaryResponse)
 async def extract_glossary(
     request: ExtractGlossaryRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     result = await glossary_service.extract_glossary(
         session=session,
@@ -24,3 +35,24 @@ async def extract_glossary(
         chapter_id=result["chapter_id"],
     )
 
+
+@router.get("/{book_id}", response_model=list[GlossaryItemSchema])
+async def list_glossary(
+    book_id: uuid.UUID,
+    type: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await glossary_index.get_terms_by_type(session, book_id, type)
+
+
+@router.patch("/{book_id}", response_model=RenameGlossaryResponse, status_code=202)
+async def rename_glossary(
+    book_id: uuid.UUID,
+    request: RenameGlossaryRequest,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Change term translations and queue rewriting them in every stored chapter."""
+    renamed, job = await glossary_rename.rename_terms(
+        session, book_id, [term.model_dump() for term in request.terms]
+    )
+    return RenameGlossaryResponse(renamed=renamed, job_id=job.id if job else None)
@@ -0,0 +1,43 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import get_async_session
+from app.schemas.chapter import TranslateChapterRequest
+from app.schemas.job import JobResponse
+from app.services import job as job_service
+from app.repositories.aio import job as job_repo
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.post("/translate", response_model=JobResponse, status_code=202)
+async def submit_translate_chapter(
+    request: TranslateChapterRequest,
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        job = await job_service.submit_translate_chapter(
+            session=session,
+            text=request.text,
+            book_id=request.book_id,
+            chapter_id=request.chapter_id,
+            chunked=request.chunked,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    session: AsyncSession = Depends(get_async_session),
+):
+    job = await job_repo.get_by_id(session, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
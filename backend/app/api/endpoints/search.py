@@ -0,0 +1,36 @@
+import uuid
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_async_session
+from app.schemas.job import JobResponse
+from app.schemas.search import SearchResponse
+from app.services import search as search_service
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/{book_id}", response_model=SearchResponse)
+async def search(
+    book_id: uuid.UUID,
+    q: str = Query(..., min_length=1, max_length=200),
+    side: Literal["auto", "raw", "translated"] = "auto",
+    sort: Literal["rank", "order"] = Query("rank", description="`order` lists hits in reading order"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Paragraphs of a book matching q, and glossary terms containing it."""
+    return await search_service.search(session, book_id, q, side, sort, offset, limit)
+
+
+@router.post("/{book_id}/reindex", response_model=JobResponse, status_code=202)
+async def reindex(
+    book_id: uuid.UUID,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Queue rebuilding the book's search index from its stored chapters."""
+    return await search_service.submit_reindex_job(session, book_id)
@@ -0,0 +1,54 @@
+import time
+
+from app.core import database, metrics, tracing
+
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from request to the last response byte, by method, route and status",
+)
+request_db_queries = metrics.histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request, by method and route",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+
+class RequestMetricsMiddleware:
+    """Time each HTTP request, count its SQL statements and trace it as the root span.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so streamed responses are
+    measured until their last chunk. Routes are labelled by their template
+    (/api/v1/chapters/{chapter_id}), unmatched paths as "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        with database.count_queries() as queries, tracing.span(
+            f"HTTP {method}", **{"http.request.method": method, "url.path": scope["path"]}
+        ) as current:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                if current is not None:
+                    current.update_name(f"{method} {route}")
+                tracing.set_attributes(
+                    current, **{"http.route": route, "http.response.status_code": status, "db.queries": queries.count}
+                )
+                request_seconds.observe(time.perf_counter() - started, method=method, route=route, status=status)
+                request_db_queries.observe(queries.count, method=method, route=route)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import glossary, chapter, book
+from app.api.endpoints import glossary, chapter, book, job, search
 
 api_router = APIRouter()
 
@@ -13,3 +13,5 @@ async def health_check():
 api_router.include_router(glossary.router)
 api_router.include_router(chapter.router)
 api_router.include_router(book.router)
+api_router.include_router(job.router)
+api_router.include_router(search.router)
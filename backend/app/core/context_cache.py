@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+context_cache_requests = metrics.counter(
+    "llm_context_cache_requests_total",
+    "System prompts served from cached content, by outcome (hit, created, refreshed, skipped, error)",
+)
+context_cache_handles = metrics.gauge(
+    "llm_context_cache_handles", "Cached-content handles currently held by this process"
+)
+
+STATIC_TAG = "static"
+
+
+def book_tag(book_id: Optional[uuid.UUID]) -> str:
+    return f"book:{book_id}"
+
+
+class _Handle:
+    def __init__(self, name: str, expires_at: float, tag: str, llm: Any):
+        self.name = name
+        self.expires_at = expires_at
+        self.tag = tag
+        # The client that created the handle; caches belong to its API key's project
+        self.llm = llm
+
+
+class _GeminiBackend:
+    """Gemini cached contents, managed through the chat model's genai client."""
+
+    async def create(self, llm: Any, model: str, system: str, tag: str, ttl: float) -> str:
+        from google.genai import types
+
+        cache = await llm.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name=tag, system_instruction=system, ttl=f"{int(ttl)}s"
+            ),
+        )
+        return cache.name
+
+    async def refresh(self, llm: Any, name: str, ttl: float) -> None:
+        from google.genai import types
+
+        await llm.client.aio.caches.update(
+            name=name, config=types.UpdateCachedContentConfig(ttl=f"{int(ttl)}s")
+        )
+
+    async def delete(self, llm: Any, name: str) -> None:
+        await llm.client.aio.caches.delete(name=name)
+
+    def bind(self, name: str, messages: list) -> tuple[list, dict]:
+        return messages, {"cached_content": name}
+
+
+class _LocalBackend:
+    """Offline stand-in: keeps prefixes in memory and puts them back into the request.
+
+    Exercises the same create/refresh/evict lifecycle without an API key, so
+    fake models see exactly the prompt they would without caching.
+    """
+
+    def __init__(self):
+        self.prefixes: dict[str, str] = {}
+
+    async def create(self, llm: Any, model: str, system: str, tag: str, ttl: float) -> str:
+        name = f"cachedContents/local-{uuid.uuid4().hex[:12]}"
+        self.prefixes[name] = system
+        return name
+
+    async def refresh(self, llm: Any, name: str, ttl: float) -> None:
+        if name not in self.prefixes:
+            raise LookupError(f"{name} not found")
+
+    async def delete(self, llm: Any, name: str) -> None:
+        self.prefixes.pop(name, None)
+
+    def bind(self, name: str, messages: list) -> tuple[list, dict]:
+        return [("system", self.prefixes[name])] + messages, {}
+
+
+_BACKENDS = {"gemini": _GeminiBackend, "local": _LocalBackend}
+
+_backend: Optional[Any] = None
+_handles: "OrderedDict[tuple[str, str, str], _Handle]" = OrderedDict()
+_creating: dict[tuple[str, str, str], asyncio.Future] = {}
+# Prefixes that failed to cache are sent inline until this time
+_failed: dict[tuple[str, str, str], float] = {}
+_deletions: set[asyncio.Task] = set()
+
+
+def _get_backend() -> Optional[Any]:
+    global _backend
+    if _backend is None and settings.CONTEXT_CACHE_BACKEND in _BACKENDS:
+        _backend = _BACKENDS[settings.CONTEXT_CACHE_BACKEND]()
+        logger.info(f"Context cache backend: {settings.CONTEXT_CACHE_BACKEND}")
+    return _backend
+
+
+def enabled() -> bool:
+    return _get_backend() is not None
+
+
+def _split_system(messages: list) -> tuple[Optional[str], list]:
+    first = messages[0] if messages else None
+    if isinstance(first, tuple) and first[0] == "system" and isinstance(first[1], str):
+        return first[1], list(messages[1:])
+    return None, list(messages)
+
+
+def _schedule_delete(handle: _Handle) -> None:
+    context_cache_handles.dec()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # No loop to delete from; the handle expires with its TTL
+        return
+
+    async def delete():
+        try:
+            await _backend.delete(handle.llm, handle.name)
+        except Exception as e:
+            logger.warning(f"Failed to delete cached content {handle.name}: {e}")
+
+    task = loop.create_task(delete())
+    _deletions.add(task)
+    task.add_done_callback(_deletions.discard)
+
+
+def _store(key: tuple[str, str, str], handle: _Handle) -> None:
+    _handles[key] = handle
+    _handles.move_to_end(key)
+    context_cache_handles.inc()
+    while len(_handles) > settings.CONTEXT_CACHE_MAX_HANDLES:
+        _, oldest = _handles.popitem(last=False)
+        _schedule_delete(oldest)
+
+
+async def _get_handle(
+    llm: Any, model: str, api_key: str, system: str, tag: str
+) -> Optional[_Handle]:
+    digest = hashlib.sha256(system.encode("utf-8")).hexdigest()
+    key = (model, api_key, digest)
+    ttl = settings.CONTEXT_CACHE_TTL
+
+    handle = _handles.get(key)
+    if handle is not None:
+        left = handle.expires_at - time.monotonic()
+        if left > settings.CONTEXT_CACHE_REFRESH_BEFORE:
+            _handles.move_to_end(key)
+            context_cache_requests.inc(outcome="hit")
+            return handle
+        if left > 0:
+            try:
+                await _backend.refresh(llm, handle.name, ttl)
+            except Exception as e:
+                logger.warning(f"Failed to refresh cached content {handle.name}: {e}")
+            else:
+                handle.expires_at = time.monotonic() + ttl
+                context_cache_requests.inc(outcome="refreshed")
+                return handle
+        if _handles.get(key) is handle:
+            del _handles[key]
+            context_cache_handles.dec()
+
+    if _failed.get(key, 0) > time.monotonic():
+        context_cache_requests.inc(outcome="skipped")
+        return None
+
+    # Concurrent requests for the same prefix share one create call
+    pending = _creating.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+    future = asyncio.get_running_loop().create_future()
+    _creating[key] = future
+    handle = None
+    try:
+        name = await _backend.create(llm, model, system, tag, ttl)
+    except Exception as e:
+        logger.warning(f"Failed to cache {tag} prompt prefix, sending it inline: {e}")
+        context_cache_requests.inc(outcome="error")
+        _failed[key] = time.monotonic() + settings.CONTEXT_CACHE_RETRY_AFTER
+    else:
+        handle = _Handle(name, time.monotonic() + ttl, tag, llm)
+        _store(key, handle)
+        context_cache_requests.inc(outcome="created")
+        logger.info(f"Cached {tag} prompt prefix as {name} (ttl={ttl:.0f}s)")
+    finally:
+        del _creating[key]
+        # Waiters fall back to an inline prompt if the create was cancelled
+        future.set_result(handle)
+    return handle
+
+
+async def bind(
+    llm: Any, model: str, api_key: str, messages: list, tag: Optional[str], system_tokens: int
+) -> tuple[list, dict]:
+    """Serve the leading system message from cached content when worthwhile.
+
+    Returns the messages to send and extra invoke kwargs. Without a tag, a
+    backend, or a long enough system prompt, messages are returned unchanged.
+    """
+    if tag is None or _get_backend() is None:
+        return messages, {}
+    system, rest = _split_system(messages)
+    if system is None:
+        return messages, {}
+    if system_tokens < settings.CONTEXT_CACHE_MIN_TOKENS:
+        context_cache_requests.inc(outcome="skipped")
+        return messages, {}
+    handle = await _get_handle(llm, model, api_key, system, tag)
+    if handle is None:
+        return messages, {}
+    return _backend.bind(handle.name, rest)
+
+
+def drop(name: str) -> None:
+    """Forget a handle the API no longer recognises (expired or deleted elsewhere)."""
+    for key, handle in list(_handles.items()):
+        if handle.name == name:
+            del _handles[key]
+            context_cache_handles.dec()
+
+
+def evict(tag: str) -> None:
+    """Delete every handle created for tag, e.g. after the book's glossary changed."""
+    for key, handle in list(_handles.items()):
+        if handle.tag == tag:
+            del _handles[key]
+            _schedule_delete(handle)
+            logger.info(f"Evicted cached content {handle.name} ({tag})")
+
+
+async def close() -> None:
+    """Delete all handles so they stop accruing storage after shutdown."""
+    for key in list(_handles):
+        _schedule_delete(_handles.pop(key))
+    if _deletions:
+        await asyncio.gather(*_deletions, return_exceptions=True)
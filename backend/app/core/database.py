@@ -1,8 +1,134 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core import metrics
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+pool_checkout_wait = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+pool_checked_out = metrics.gauge(
+    "db_pool_checked_out", "DB connections currently checked out of the pool"
+)
+pool_saturation = metrics.gauge(
+    "db_pool_saturation",
+    "Checked-out connections / (pool_size + max_overflow)",
+)
+db_queries = metrics.counter("db_queries_total", "SQL statements executed, by pool")
+
+
+class QueryTally:
+    """Statements executed inside a count_queries() block."""
+
+    def __init__(self):
+        self.count = 0
+
+
+# Shared by reference, so statements run in tasks started inside the block count too
+_tally: ContextVar[Optional[QueryTally]] = ContextVar("db_query_tally", default=None)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryTally]:
+    """Count the statements executed in this context, e.g. per HTTP request."""
+    tally = QueryTally()
+    previous = _tally.get()
+    _tally.set(tally)
+    try:
+        yield tally
+    finally:
+        _tally.set(previous)
+
+
+class _TimedQueuePool(QueuePool):
+    metrics_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start, pool=self.metrics_label)
+
+
+class _TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start, pool=self.metrics_label)
+
+
+def _pool_options() -> dict:
+    return {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _track_pool(pool: QueuePool, label: str) -> None:
+    capacity = max(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW, 1)
+
+    def _on_checkout(*_):
+        pool_checked_out.inc(pool=label)
+        pool_saturation.set(pool_checked_out.get(pool=label) / capacity, pool=label)
+
+    def _on_checkin(*_):
+        pool_checked_out.dec(pool=label)
+        pool_saturation.set(pool_checked_out.get(pool=label) / capacity, pool=label)
+
+    event.listen(pool, "checkout", _on_checkout)
+    event.listen(pool, "checkin", _on_checkin)
+
+
+def _track_queries(sync_engine, label: str) -> None:
+    def _on_execute(*_):
+        db_queries.inc(pool=label)
+        tally = _tally.get()
+        if tally is not None:
+            tally.count += 1
+
+    event.listen(sync_engine, "before_cursor_execute", _on_execute)
+
+
+engine = create_engine(settings.DATABASE_URL, poolclass=_TimedQueuePool, **_pool_options())
+_track_pool(engine.pool, _TimedQueuePool.metrics_label)
+_track_queries(engine, _TimedQueuePool.metrics_label)
+
+
+def _async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    _async_database_url(), poolclass=_TimedAsyncQueuePool, **_pool_options()
+)
+_track_pool(async_engine.sync_engine.pool, _TimedAsyncQueuePool.metrics_label)
+_track_queries(async_engine.sync_engine, _TimedAsyncQueuePool.metrics_label)
 
 
 def init_db():
@@ -12,3 +138,20 @@ def init_db():
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+def new_async_session() -> AsyncSession:
+    # expire_on_commit=False: attribute access after commit must not trigger
+    # an implicit (blocking) refresh outside an awaited call
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+async def get_async_session():
+    async with new_async_session() as session:
+        yield session
+
+
+async def connect_listener() -> asyncpg.Connection:
+    """Open a dedicated asyncpg connection outside the pool, e.g. for LISTEN."""
+    url = make_url(_async_database_url()).set(drivername="postgresql")
+    return await asyncpg.connect(url.render_as_string(hide_password=False))
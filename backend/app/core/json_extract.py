@@ -0,0 +1,218 @@
+import json
+import re
+from typing import Any, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib parser is used instead
+    orjson = None
+
+# Characters that change the bracket state; everything else is skipped in C
+_SPECIAL_RE = re.compile(r'["\[\]{},]')
+# Rest of a string after its opening quote, through the closing quote
+_STRING_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_STRING_OR_TRAILING_COMMA_RE = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*")|,\s*([\]}])', re.S)
+_FENCE_RE = re.compile(r"```[\w-]*[ \t]*\n?(.*?)```", re.S)
+_OPENERS_RE = {kinds: re.compile("[" + re.escape(kinds) + "]") for kinds in ("{[", "{", "[")}
+
+# Openers tried per response before giving up; bounds the work on garbage
+_MAX_CANDIDATES = 16
+
+# Stands in for an array element JsonArrayStream could not decode
+MALFORMED = object()
+
+
+def loads(text: str) -> Any:
+    """json.loads, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def text_content(content) -> str:
+    """Extract text from LangChain response content (can be str or list of blocks)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            block["text"] for block in content
+            if isinstance(block, dict) and block.get("type") == "text"
+        )
+    return str(content)
+
+
+def _scan(text: str, start: int) -> tuple[int, int]:
+    """Match the bracket at start, skipping strings and escapes.
+
+    Returns (end, last_comma): end is just past the matching bracket, or -1
+    if the text ends first; last_comma is the last comma directly inside the
+    outer bracket, used to salvage truncated arrays.
+    """
+    depth = 0
+    last_comma = -1
+    pos = start
+    search = _SPECIAL_RE.search
+    match_string = _STRING_BODY_RE.match
+    while True:
+        m = search(text, pos)
+        if m is None:
+            return -1, last_comma
+        i = m.start()
+        ch = text[i]
+        if ch == '"':
+            s = match_string(text, i + 1)
+            if s is None:
+                return -1, last_comma
+            pos = s.end()
+            continue
+        if ch == "[" or ch == "{":
+            depth += 1
+        elif ch == "]" or ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1, last_comma
+        elif depth == 1:
+            last_comma = i
+        pos = i + 1
+
+
+def _strip_trailing_commas(text: str) -> str:
+    return _STRING_OR_TRAILING_COMMA_RE.sub(lambda m: m.group(1) or m.group(2), text)
+
+
+def _decode(candidate: str) -> Any:
+    """Parse one bracketed candidate, repairing the slips models commonly make."""
+    try:
+        return loads(candidate)
+    except ValueError:
+        pass
+    repaired = _strip_trailing_commas(candidate)
+    # strict=False accepts raw newlines and tabs inside strings
+    return json.loads(repaired, strict=False)
+
+
+def _sources(text: str) -> Iterator[str]:
+    # A fenced block is tried first, so brackets in surrounding prose are ignored
+    if "```" in text:
+        for m in _FENCE_RE.finditer(text):
+            if "{" in m.group(1) or "[" in m.group(1):
+                yield m.group(1)
+                break
+    yield text
+
+
+def extract_json(text: str, kinds: str = "{[") -> Optional[Any]:
+    """Return the first JSON object or array in model output, or None.
+
+    kinds limits which openers count ("{[", "{" or "["). Code fences and
+    surrounding prose are skipped, brackets inside strings are ignored,
+    trailing commas and raw control characters in strings are repaired, and
+    an array cut off mid-way yields its complete elements.
+    """
+    openers = _OPENERS_RE[kinds]
+    for source in _sources(text):
+        pos = 0
+        for _ in range(_MAX_CANDIDATES):
+            m = openers.search(source, pos)
+            if m is None:
+                break
+            start = m.start()
+            end, last_comma = _scan(source, start)
+            if end != -1:
+                candidate = source[start:end]
+            elif source[start] == "[" and last_comma != -1:
+                # Truncated output: keep the elements that were completed
+                candidate = source[start:last_comma] + "]"
+            else:
+                candidate = None
+            if candidate is not None:
+                try:
+                    return _decode(candidate)
+                except ValueError:
+                    pass
+            pos = start + 1
+    return None
+
+
+class JsonArrayStream:
+    """Incrementally yield the elements of one JSON array inside a streamed object.
+
+    Feed raw model output as it arrives; every call returns (index, element)
+    for the elements of the array under `key` that were completed by that
+    chunk. An element that does not decode comes back as MALFORMED, so
+    indices always match positions in the array. Strings and
+    escapes are tracked, so brackets or commas inside values never split an
+    element. Only the unfinished element is kept for rescanning.
+    """
+
+    def __init__(self, key: str):
+        self._key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._chunks: list[str] = []
+        self._buffer = ""  # text from the start of the current element
+        self._pos = 0  # next index of _buffer to scan
+        self._started = False
+        self._depth = 0
+        self.done = False
+        self.count = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far (for the final full parse)."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> list[tuple[int, Any]]:
+        self._chunks.append(chunk)
+        if self.done:
+            return []
+        self._buffer += chunk
+        if not self._started:
+            match = self._key_re.search(self._buffer)
+            if match is None:
+                return []
+            self._started = True
+            self._buffer = self._buffer[match.end() :]
+            self._pos = 0
+
+        items: list[tuple[int, Any]] = []
+        buf = self._buffer
+        pos = self._pos
+        item_start = 0
+        while True:
+            m = _SPECIAL_RE.search(buf, pos)
+            if m is None:
+                pos = len(buf)
+                break
+            i = m.start()
+            ch = buf[i]
+            if ch == '"':
+                s = _STRING_BODY_RE.match(buf, i + 1)
+                if s is None:
+                    # The string continues in a later chunk; rescan it from its quote
+                    pos = i
+                    break
+                pos = s.end()
+                continue
+            if ch == "[" or ch == "{":
+                self._depth += 1
+            elif (ch == "]" or ch == "}") and self._depth > 0:
+                self._depth -= 1
+            elif self._depth == 0 and (ch == "," or ch == "]"):
+                raw = buf[item_start:i].strip()
+                if raw:
+                    try:
+                        item = _decode(raw)
+                    except ValueError:
+                        item = MALFORMED  # the final full parse decides
+                    items.append((self.count, item))
+                    self.count += 1
+                item_start = i + 1
+                if ch == "]":
+                    self.done = True
+                    pos = i + 1
+                    break
+            pos = i + 1
+        self._buffer = buf[item_start:]
+        self._pos = pos - item_start
+        return items
@@ -1,32 +1,444 @@
+import asyncio
 import logging
-from typing import Optional
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
 
+from langchain_core.messages.ai import add_usage
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+from app.core import context_cache, metrics, tracing
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Cached LLM instances per model name
-_llm_cache: dict[str, ChatGoogleGenerativeAI] = {}
+# CJK ideographs and fullwidth punctuation are roughly one token each
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
 
+DEFAULT_MODEL = "gemini-3-flash-preview"
 
-def get_llm(model: str = "gemini-3-flash-preview") -> ChatGoogleGenerativeAI:
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+llm_requests = metrics.counter(
+    "llm_requests_total", "LLM calls by model and outcome (ok, error)"
+)
+llm_retries = metrics.counter(
+    "llm_retries_total", "LLM attempts retried, by reason (quota, server, timeout, network, cache)"
+)
+llm_rate_limit_wait = metrics.histogram(
+    "llm_rate_limit_wait_seconds",
+    "Time spent waiting for an API key with RPM/TPM budget",
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+llm_cached_tokens = metrics.counter(
+    "llm_cached_input_tokens_total", "Input tokens the API reported as read from cached content"
+)
+llm_keys_ejected = metrics.gauge(
+    "llm_keys_ejected", "API keys currently sitting out after quota errors"
+)
+llm_tokens = metrics.counter(
+    "llm_tokens_total", "LLM tokens by model, book and kind (input, cached_input, output)"
+)
+llm_cost = metrics.counter(
+    "llm_cost_usd_total", "Estimated LLM spend in USD by model and book, from the LLM_PRICE_* settings"
+)
+
+# Book that LLM usage in the current context is attributed to
+_book: ContextVar[str] = ContextVar("llm_book", default="none")
+
+
+@contextmanager
+def billed_to(book_id: Any) -> Iterator[None]:
+    """Attribute LLM tokens and cost inside the block (and tasks it starts) to book_id."""
+    previous = _book.get()
+    _book.set(str(book_id) if book_id else "none")
+    try:
+        yield
+    finally:
+        # set rather than reset: an async generator may be closed from another context
+        _book.set(previous)
+
+# Cached LLM instances per (model name, API key)
+_llm_cache: dict[tuple[str, str], ChatGoogleGenerativeAI] = {}
+
+
+def get_llm(model: str = DEFAULT_MODEL, api_key: Optional[str] = None) -> ChatGoogleGenerativeAI:
     """Get or create a cached ChatGoogleGenerativeAI instance."""
-    if model not in _llm_cache:
-        _llm_cache[model] = ChatGoogleGenerativeAI(
+    api_key = api_key or settings.GOOGLE_API_KEY
+    if (model, api_key) not in _llm_cache:
+        _llm_cache[(model, api_key)] = ChatGoogleGenerativeAI(
             model=model,
-            google_api_key=settings.GOOGLE_API_KEY,
+            google_api_key=api_key,
+            # Retries are handled here so they can rotate keys; 1 = no SDK retries
+            max_retries=1,
         )
         logger.info(f"Created LLM instance for model={model}")
-    return _llm_cache[model]
+    return _llm_cache[(model, api_key)]
+
+
+class _TokenBucket:
+    """Allows `per_minute` units per minute, refilled continuously, bursting up to one minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A request larger than the whole bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        # May go negative when correcting an estimate; later callers wait it off
+        self.tokens -= amount
+
+
+class _ApiKey:
+    def __init__(self, value: str, index: int):
+        self.value = value
+        self.name = f"key{index}"
+        self.rpm = _TokenBucket(settings.LLM_RPM) if settings.LLM_RPM > 0 else None
+        self.tpm = _TokenBucket(settings.LLM_TPM) if settings.LLM_TPM > 0 else None
+        self.ejected_until = 0.0
+        self.ejected = False  # until a call on it succeeds again
+        self.strikes = 0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        if now < self.ejected_until:
+            return self.ejected_until - now
+        wait = 0.0
+        if self.rpm is not None:
+            wait = max(wait, self.rpm.wait_time(1, now))
+        if self.tpm is not None:
+            wait = max(wait, self.tpm.wait_time(tokens, now))
+        return wait
+
+    def take(self, tokens: int) -> None:
+        if self.rpm is not None:
+            self.rpm.take(1)
+        if self.tpm is not None:
+            self.tpm.take(tokens)
+
+    def charge(self, tokens: int) -> None:
+        if self.tpm is not None:
+            self.tpm.take(tokens)
+
+    def eject(self) -> None:
+        # Consecutive quota errors back the key off for longer, up to 16x the cooldown
+        self.strikes += 1
+        cooldown = settings.LLM_KEY_COOLDOWN * 2 ** min(self.strikes - 1, 4)
+        if not self.ejected:
+            self.ejected = True
+            llm_keys_ejected.inc()
+        self.ejected_until = time.monotonic() + cooldown
+        logger.warning(f"LLM {self.name} hit its quota, ejected for {cooldown:.0f}s")
+
+    def recovered(self) -> None:
+        if self.ejected:
+            self.ejected = False
+            logger.info(f"LLM {self.name} recovered")
+            llm_keys_ejected.dec()
+        self.strikes = 0
+
+
+class _KeyPool:
+    """Round-robin over API keys, skipping keys that are ejected or out of budget."""
+
+    def __init__(self, values: list[str]):
+        self.keys = [_ApiKey(v, i) for i, v in enumerate(values)]
+        self._next = 0
+
+    async def acquire(self, tokens: int) -> _ApiKey:
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            best_wait = None
+            for i in range(len(self.keys)):
+                index = (self._next + i) % len(self.keys)
+                key = self.keys[index]
+                wait = key.wait_time(tokens, now)
+                if wait == 0:
+                    self._next = (index + 1) % len(self.keys)
+                    key.take(tokens)
+                    llm_rate_limit_wait.observe(now - started)
+                    return key
+                best_wait = wait if best_wait is None else min(best_wait, wait)
+            await asyncio.sleep(best_wait)
+
+
+_pool: Optional[_KeyPool] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_pool() -> _KeyPool:
+    global _pool
+    if _pool is None:
+        keys = [k.strip() for k in settings.GOOGLE_API_KEYS.split(",") if k.strip()]
+        _pool = _KeyPool(keys or [settings.GOOGLE_API_KEY])
+        logger.info(f"LLM key pool with {len(_pool.keys)} keys")
+    return _pool
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    # langchain wraps the SDK's APIError, which carries the HTTP status as .code
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        for attr in ("code", "status_code"):
+            code = getattr(exc, attr, None)
+            if isinstance(code, int):
+                return code
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def _retry_reason(exc: Exception) -> Optional[str]:
+    """Why a failed call is worth retrying, or None if it is not."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    code = _status_code(exc)
+    if code == 429 or "RESOURCE_EXHAUSTED" in str(exc):
+        return "quota"
+    if code in _RETRYABLE_STATUS:
+        return "server"
+    if code is None and isinstance(exc, (ConnectionError, OSError)):
+        return "network"
+    return None
+
+
+def _messages_tokens(messages: list) -> int:
+    total = 0
+    for message in messages:
+        content = message[1] if isinstance(message, tuple) else getattr(message, "content", message)
+        total += estimate_tokens(content if isinstance(content, str) else str(content))
+    return total
+
+
+def _system_tokens(messages: list) -> int:
+    first = messages[0] if messages else None
+    if isinstance(first, tuple) and first[0] == "system":
+        return estimate_tokens(first[1])
+    return 0
+
+
+def _time_left(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def _call_with_retries(
+    model: str,
+    messages: list,
+    call: Callable[[ChatGoogleGenerativeAI, list, dict, float], Awaitable[Any]],
+    timeout: Optional[float],
+    deadline: Optional[float],
+    cache_tag: Optional[str] = None,
+    span: Any = None,
+) -> Any:
+    tokens = _messages_tokens(messages)
+    system_tokens = _system_tokens(messages) if cache_tag else 0
+    attempts = settings.LLM_MAX_RETRIES + 1
+    for attempt in range(1, attempts + 1):
+        async with _get_semaphore():
+            key = await _get_pool().acquire(tokens)
+            attempt_timeout = timeout or settings.LLM_TIMEOUT
+            left = _time_left(deadline)
+            if left is not None:
+                attempt_timeout = min(attempt_timeout, left)
+            llm = get_llm(model, key.value)
+            kwargs = {}
+            try:
+                # Creating the cached content is an API call too, retried like the request
+                bound, kwargs = await context_cache.bind(
+                    llm, model, key.value, messages, cache_tag, system_tokens
+                )
+                result = await call(llm, bound, kwargs, attempt_timeout)
+            except Exception as e:
+                error = e
+            else:
+                key.recovered()
+                usage = getattr(result, "usage_metadata", None) or {}
+                if usage.get("total_tokens", 0) > tokens:
+                    # Charge real usage (including output) against the key's TPM budget
+                    key.charge(usage["total_tokens"] - tokens)
+                llm_requests.inc(model=model, outcome="ok")
+                tracing.set_attributes(span, **{"llm.attempts": attempt, "llm.api_key": key.name})
+                return result
+
+        reason = _retry_reason(error)
+        if "cached_content" in kwargs and _status_code(error) in (403, 404):
+            # The cache expired or was deleted elsewhere; the next attempt recreates it
+            context_cache.drop(kwargs["cached_content"])
+            reason = "cache"
+        if reason == "quota":
+            key.eject()
+        # Full jitter keeps concurrent windows from retrying in lockstep
+        backoff = settings.LLM_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+        delay = random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, backoff))
+        left = _time_left(deadline)
+        if reason is None or attempt == attempts or (left is not None and left <= delay):
+            llm_requests.inc(model=model, outcome="error")
+            tracing.set_attributes(span, **{"llm.attempts": attempt, "llm.api_key": key.name})
+            raise error
+        llm_retries.inc(reason=reason)
+        logger.warning(
+            f"LLM call failed on {key.name} ({reason}, attempt {attempt}/{attempts}), "
+            f"retrying in {delay:.1f}s: {error}"
+        )
+        await asyncio.sleep(delay)
+
+
+def _record_usage(model: str, usage: Optional[dict], input_estimate: int, output_estimate: int, span: Any) -> None:
+    """Count one call's tokens and estimated cost; estimates stand in where the API reports none."""
+    usage = usage or {}
+    input_tokens = usage.get("input_tokens") or input_estimate
+    output_tokens = usage.get("output_tokens") or output_estimate
+    cached = min((usage.get("input_token_details") or {}).get("cache_read", 0), input_tokens)
+    book = _book.get()
+    llm_tokens.inc(input_tokens - cached, model=model, book=book, kind="input")
+    llm_tokens.inc(output_tokens, model=model, book=book, kind="output")
+    if cached:
+        llm_tokens.inc(cached, model=model, book=book, kind="cached_input")
+        llm_cached_tokens.inc(cached, model=model)
+    cost = (
+        (input_tokens - cached) * settings.LLM_PRICE_INPUT
+        + cached * settings.LLM_PRICE_CACHED_INPUT
+        + output_tokens * settings.LLM_PRICE_OUTPUT
+    ) / 1_000_000
+    llm_cost.inc(cost, model=model, book=book)
+    tracing.set_attributes(
+        span,
+        **{
+            "gen_ai.usage.input_tokens": input_tokens,
+            "gen_ai.usage.output_tokens": output_tokens,
+            "llm.cached_input_tokens": cached,
+            "llm.cost_usd": cost,
+        },
+    )
+
+
+def _span_attributes(model: str, cache_tag: Optional[str]) -> dict:
+    return {"gen_ai.request.model": model, "llm.cache_tag": cache_tag, "llm.book": _book.get()}
 
 
 async def invoke_llm(
     messages: list,
-    model: str = "gemini-3-flash-preview",
-) -> str:
-    """Invoke LLM with a single API key."""
-    llm = get_llm(model)
-    result = await llm.ainvoke(messages)
-    return result
+    model: str = DEFAULT_MODEL,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    cache_tag: Optional[str] = None,
+):
+    """Invoke the LLM with rate limiting, retries and API key rotation.
+
+    timeout bounds each attempt (default LLM_TIMEOUT). deadline is an absolute
+    time.monotonic() value bounding the whole call, including rate limit
+    waits and backoff; TimeoutError is raised once it passes. With a
+    cache_tag, a long system message is sent as cached content (see
+    app.core.context_cache); the tag groups handles for eviction. Tokens and
+    estimated cost are counted per model and book (see billed_to).
+    """
+
+    async def call(llm: ChatGoogleGenerativeAI, bound: list, kwargs: dict, attempt_timeout: float):
+        return await asyncio.wait_for(llm.ainvoke(bound, **kwargs), attempt_timeout)
+
+    with tracing.span("llm.invoke", **_span_attributes(model, cache_tag)) as span:
+        if deadline is None:
+            result = await _call_with_retries(model, messages, call, timeout, None, cache_tag, span)
+        else:
+            left = _time_left(deadline)
+            if left <= 0:
+                raise asyncio.TimeoutError("LLM deadline already passed")
+            async with asyncio.timeout(left):
+                result = await _call_with_retries(model, messages, call, timeout, deadline, cache_tag, span)
+        _record_usage(
+            model,
+            getattr(result, "usage_metadata", None),
+            _messages_tokens(messages),
+            estimate_tokens(_chunk_text(result)),
+            span,
+        )
+        return result
+
+
+def _chunk_text(chunk) -> str:
+    content = chunk.content
+    if isinstance(content, list):
+        content = "".join(
+            block.get("text", "") for block in content
+            if isinstance(block, dict) and block.get("type") == "text"
+        )
+    return content
+
+
+async def stream_llm(
+    messages: list,
+    model: str = DEFAULT_MODEL,
+    timeout: Optional[float] = None,
+    cache_tag: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Stream the LLM response as text chunks.
+
+    Connecting and waiting for the first chunk goes through the same limiter
+    and retries as invoke_llm; once text has been yielded a failure is raised,
+    since the caller has already consumed part of the answer. timeout bounds
+    the wait for each chunk.
+    """
+    chunk_timeout = timeout or settings.LLM_TIMEOUT
+
+    async def first_chunk(llm: ChatGoogleGenerativeAI, bound: list, kwargs: dict, attempt_timeout: float):
+        stream = llm.astream(bound, **kwargs)
+        try:
+            return stream, await asyncio.wait_for(anext(stream), attempt_timeout)
+        except StopAsyncIteration:
+            return stream, None
+        except BaseException:
+            await stream.aclose()
+            raise
+
+    # Not the active span: it stays open across the yields below
+    with tracing.span("llm.stream", current=False, **_span_attributes(model, cache_tag)) as span:
+        stream, chunk = await _call_with_retries(model, messages, first_chunk, timeout, None, cache_tag, span)
+        usage = None
+        output_estimate = 0
+        try:
+            while chunk is not None:
+                # Gemini reports usage per chunk as increments over the previous chunk
+                if getattr(chunk, "usage_metadata", None):
+                    usage = add_usage(usage, chunk.usage_metadata)
+                content = _chunk_text(chunk)
+                if content:
+                    output_estimate += estimate_tokens(content)
+                    yield content
+                try:
+                    chunk = await asyncio.wait_for(anext(stream), chunk_timeout)
+                except StopAsyncIteration:
+                    chunk = None
+        finally:
+            await stream.aclose()
+            _record_usage(model, usage, _messages_tokens(messages), output_estimate, span)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: one per CJK character, ~4 characters per token otherwise."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
@@ -0,0 +1,101 @@
+from collections import deque
+from typing import Any, Iterable, Iterator
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher (Aho–Corasick automaton).
+
+    Patterns can be added at any time; the failure links are rebuilt lazily
+    on the next search, so adding a handful of terms to a large automaton
+    only costs one BFS pass instead of re-inserting every pattern.
+    """
+
+    def __init__(self, patterns: Iterable[tuple[str, Any]] = ()):
+        # Node i: goto[i] (char -> node), fail[i], outputs[i] (pattern values)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._outputs: list[list[tuple[int, Any]]] = [[]]
+        self._size = 0
+        self._dirty = False
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pattern: str, value: Any = None) -> None:
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = nxt
+        self._outputs[node].append((len(pattern), pattern if value is None else value))
+        self._size += 1
+        self._dirty = True
+
+    def _build(self) -> None:
+        goto, fail = self._goto, self._fail
+        # Only terminal outputs are stored per node; inherited ones are
+        # reached through `_dict_link` so rebuilds never duplicate entries.
+        self._dict_link = [0] * len(goto)
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(ch, 0)
+                fail[child] = target if target != child else 0
+                self._dict_link[child] = (
+                    fail[child] if self._outputs[fail[child]] else self._dict_link[fail[child]]
+                )
+                queue.append(child)
+        self._dirty = False
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, Any]]:
+        """Yield (start, end, value) for every pattern occurrence in text."""
+        if self._size == 0:
+            return
+        if self._dirty:
+            self._build()
+        goto, fail, outputs, dict_link = self._goto, self._fail, self._outputs, self._dict_link
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            out = node
+            while out:
+                for length, value in outputs[out]:
+                    yield i - length + 1, i + 1, value
+                out = dict_link[out]
+
+    def find_all(self, text: str) -> set:
+        """Return the set of values whose pattern occurs in text."""
+        return {value for _, _, value in self.iter_matches(text)}
+
+
+def leftmost_longest(matches: Iterable[tuple[int, int, Any]]) -> list[tuple[int, int, Any]]:
+    """Keep non-overlapping matches, preferring the earliest and then the longest.
+
+    A term nested in a longer one (林动 inside 林动天) is dropped; on equal
+    spans the match that came first wins.
+    """
+    kept = []
+    last_end = 0
+    for match in sorted(matches, key=lambda m: (m[0], -m[1])):
+        if match[0] >= last_end:
+            kept.append(match)
+            last_end = match[1]
+    return kept
@@ -0,0 +1,152 @@
+import threading
+from typing import Optional
+
+# Process-local metric registry, keyed by metric name
+_registry: dict[str, "_Metric"] = {}
+_registry_lock = threading.Lock()
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def get(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> list[tuple[str, tuple, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def get(self, **labels) -> float:
+        """Return the sum of observed values."""
+        return self._sums.get(_label_key(labels), 0.0)
+
+    def count(self, **labels) -> int:
+        counts = self._counts.get(_label_key(labels))
+        return counts[-1] if counts else 0
+
+    def samples(self) -> list[tuple[str, tuple, float]]:
+        result = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                for bound, count in zip(self.buckets, counts):
+                    result.append((f"{self.name}_bucket", key + (("le", str(bound)),), count))
+                result.append((f"{self.name}_bucket", key + (("le", "+Inf"),), counts[-1]))
+                result.append((f"{self.name}_count", key, counts[-1]))
+                result.append((f"{self.name}_sum", key, self._sums[key]))
+        return result
+
+
+def _register(cls, name: str, documentation: str, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = cls(name, documentation, **kwargs)
+            _registry[name] = metric
+        return metric
+
+
+def counter(name: str, documentation: str) -> Counter:
+    return _register(Counter, name, documentation)
+
+
+def gauge(name: str, documentation: str) -> Gauge:
+    return _register(Gauge, name, documentation)
+
+
+def histogram(
+    name: str, documentation: str, buckets: Optional[tuple] = None
+) -> Histogram:
+    return _register(Histogram, name, documentation, buckets=buckets or DEFAULT_BUCKETS)
+
+
+def all_metrics() -> list[_Metric]:
+    with _registry_lock:
+        return list(_registry.values())
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, key: tuple, value: float) -> str:
+    labels = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+    if value == float("inf"):
+        number = "+Inf"
+    elif float(value).is_integer():
+        number = str(int(value))
+    else:
+        number = repr(float(value))
+    return f"{name}{{{labels}}} {number}" if labels else f"{name} {number}"
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in sorted(all_metrics(), key=lambda m: m.name):
+        documentation = metric.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {metric.name} {documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(_format_sample(*sample) for sample in metric.samples())
+    return "\n".join(lines) + "\n"
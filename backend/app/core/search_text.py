@@ -0,0 +1,53 @@
+import re
+from typing import Optional
+
+# CJK ideographs (basic, extension A, compatibility) have no word breaks and
+# are indexed as overlapping bigrams; any other run of letters or digits is a word
+_CJK = "㐀-䶿一-鿿豈-﫿"
+_RUN_RE = re.compile(f"(?P<cjk>[{_CJK}]+)|(?P<word>[^\\W_{_CJK}]+)")
+
+
+def _runs(text: str) -> list[tuple[bool, str]]:
+    return [(match.lastgroup == "cjk", match.group()) for match in _RUN_RE.finditer(text)]
+
+
+def raw_tokens(text: str) -> str:
+    """Space-separated tokens of a raw paragraph, for to_tsvector('simple', ...).
+
+    A CJK run 林动天 becomes 林动 动天 天: its bigrams, in order so phrase
+    queries can require adjacency, then its last character so that a
+    one-character query matches at the end of a run too.
+    """
+    tokens: list[str] = []
+    for cjk, run in _runs(text):
+        if cjk:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+            tokens.append(run[-1])
+        else:
+            tokens.append(run.lower())
+    return " ".join(tokens)
+
+
+def raw_tsquery(query: str) -> Optional[str]:
+    """to_tsquery('simple', ...) text matching every run of query on the raw side (None if empty).
+
+    A CJK run becomes a phrase of its bigrams; a single character matches as
+    a prefix of any token.
+    """
+    parts = []
+    for cjk, run in _runs(query):
+        if cjk and len(run) > 1:
+            bigrams = [run[i : i + 2] for i in range(len(run) - 1)]
+            parts.append("(" + " <-> ".join(f"'{bigram}'" for bigram in bigrams) + ")")
+        else:
+            parts.append(f"'{run if cjk else run.lower()}':*")
+    return " & ".join(parts) or None
+
+
+def query_runs(query: str) -> list[str]:
+    """The parts of a raw query that a hit contains verbatim (for highlighting)."""
+    return [run for _, run in _runs(query)]
+
+
+def has_cjk(text: str) -> bool:
+    return any(cjk for cjk, _ in _runs(text))
@@ -0,0 +1,105 @@
+import re
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from app.core.config import settings
+from app.core.llm import estimate_tokens
+
+_TERMINATORS = "。！？；"
+_OPENERS = "“‘「『（《【〔"
+_CLOSERS = "”’」』）》】〕"
+
+# Events that matter for cutting: a run of sentence terminators (with the
+# closing quotes or brackets right after it), an opening or a closing mark
+_EVENT_RE = re.compile(
+    "(?P<end>[%(t)s]+)(?P<tail>[%(c)s\"')]*)|(?P<open>[%(o)s])|(?P<close>[%(c)s])"
+    % {"t": _TERMINATORS, "o": _OPENERS, "c": _CLOSERS}
+)
+_LINE_BLOCK = 1 << 16  # characters of a str input split into lines at a time
+
+_UNITS: dict[str, Callable[[str], int]] = {"chars": len, "tokens": estimate_tokens}
+
+
+def _split_long(paragraph: str, target: int, max_size: int, size: Callable[[str], int]) -> Iterator[str]:
+    """Cut a long paragraph at sentence ends once a chunk passes target.
+
+    Sentence ends inside a quote or bracket are skipped until the chunk also
+    passes max_size, so dialogue stays whole unless it is very long.
+    """
+    start = counted = 0
+    depth = chunk_size = 0
+    for match in _EVENT_RE.finditer(paragraph):
+        kind = match.lastgroup
+        if kind == "open":
+            depth += 1
+            continue
+        if kind == "close":
+            depth = max(0, depth - 1)
+            continue
+        tail = match.group("tail")
+        if tail:
+            depth = max(0, depth - sum(ch in _CLOSERS for ch in tail))
+        end = match.end()
+        if size is len:
+            chunk_size = end - start
+        else:
+            # Grow the estimate by the new stretch only, so long lines stay linear
+            chunk_size += size(paragraph[counted:end])
+            counted = end
+        if chunk_size > target and (depth == 0 or chunk_size > max_size):
+            chunk = paragraph[start:end].strip()
+            if chunk:
+                yield chunk
+            start, chunk_size = end, 0
+    chunk = paragraph[start:].strip()
+    if chunk:
+        yield chunk
+
+
+def _lines(text: Union[str, Iterable[str]]) -> Iterator[str]:
+    if isinstance(text, str):
+        # Split a block at a time: C-speed split without a list of every line
+        start = 0
+        while start < len(text):
+            end = text.find("\n", start + _LINE_BLOCK)
+            end = len(text) if end == -1 else end
+            yield from text[start:end].split("\n")
+            start = end + 1
+    else:
+        # Any iterable of lines or text chunks, e.g. an open file
+        buffer = ""
+        for chunk in text:
+            buffer += chunk
+            if "\n" in chunk:
+                *lines, buffer = buffer.split("\n")
+                yield from lines
+        if buffer:
+            yield buffer
+
+
+def iter_paragraphs(
+    text: Union[str, Iterable[str]],
+    target: Optional[int] = None,
+    max_size: Optional[int] = None,
+    unit: Optional[str] = None,
+) -> Iterator[str]:
+    """Yield the non-empty lines of text, splitting lines longer than max_size.
+
+    Sizes are in characters or estimated tokens (unit "chars" or "tokens",
+    defaults from SEGMENT_* settings). A long line is cut at the first
+    sentence end (。！？； plus any closing quotes or brackets) after each
+    chunk passes target, and not inside quotes or brackets unless the chunk
+    also exceeds max_size. text may be a string or an iterable of chunks, so
+    MB-scale input streams without building a list of lines.
+    """
+    target = settings.SEGMENT_TARGET_SIZE if target is None else target
+    max_size = settings.SEGMENT_MAX_SIZE if max_size is None else max_size
+    size = _UNITS[unit or settings.SEGMENT_UNIT]
+    for line in _lines(text):
+        paragraph = line.strip()
+        if not paragraph:
+            continue
+        # Both units count at most one per character, so short lines skip the estimate
+        if len(paragraph) <= max_size or size(paragraph) <= max_size:
+            yield paragraph
+        else:
+            yield from _split_long(paragraph, target, max_size, size)
@@ -0,0 +1,164 @@
+import functools
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # optional; spans are skipped without it
+    trace = None
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+stage_seconds = metrics.histogram(
+    "pipeline_stage_seconds",
+    "Time per pipeline (translate, extract) and stage (segment, glossary, prompt, llm, parse, db_write)",
+)
+
+_provider: Optional["TracerProvider"] = None
+_tracer: Any = None
+_exporters: set[str] = set()
+_memory: Optional["InMemorySpanExporter"] = None
+
+
+def setup(exporter: Optional[str] = None) -> None:
+    """Start recording spans to exporter (default TRACING_EXPORTER).
+
+    "memory" keeps finished spans in process for finished_spans(), so tests
+    and benchmarks can assert on them. Calling it again with another
+    exporter adds that exporter. Without opentelemetry-sdk installed
+    tracing stays off.
+    """
+    global _provider, _tracer, _memory
+    exporter = exporter or settings.TRACING_EXPORTER
+    if exporter == "off" or exporter in _exporters:
+        return
+    if trace is None:
+        logger.warning(f"TRACING_EXPORTER={exporter} needs opentelemetry-sdk; tracing is off")
+        return
+    if exporter == "memory":
+        _memory = InMemorySpanExporter()
+        processor = SimpleSpanProcessor(_memory)
+    elif exporter == "console":
+        processor = BatchSpanProcessor(ConsoleSpanExporter())
+    elif exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-http; tracing is off")
+            return
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        processor = BatchSpanProcessor(OTLPSpanExporter())
+    else:
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+    if _provider is None:
+        _provider = TracerProvider(resource=Resource.create({"service.name": settings.PROJECT_NAME}))
+        trace.set_tracer_provider(_provider)
+        _tracer = _provider.get_tracer(__name__)
+    _provider.add_span_processor(processor)
+    _exporters.add(exporter)
+    logger.info(f"Tracing spans to {exporter}")
+
+
+def shutdown() -> None:
+    """Flush buffered spans to their exporters."""
+    if _provider is not None:
+        _provider.force_flush()
+
+
+def finished_spans() -> list:
+    """Spans ended so far, when the "memory" exporter is set up."""
+    return list(_memory.get_finished_spans()) if _memory is not None else []
+
+
+def clear_spans() -> None:
+    if _memory is not None:
+        _memory.clear()
+
+
+def _attributes(attributes: dict) -> dict:
+    # OpenTelemetry takes str/bool/int/float only; None means "not set"
+    return {
+        k: v if isinstance(v, (str, bool, int, float)) else str(v)
+        for k, v in attributes.items()
+        if v is not None
+    }
+
+
+def set_attributes(current: Any, **attributes) -> None:
+    """Set attributes on a span yielded by span(); a no-op when tracing is off."""
+    if current is not None:
+        current.set_attributes(_attributes(attributes))
+
+
+@contextmanager
+def span(name: str, current: bool = True, **attributes) -> Iterator[Any]:
+    """Record a span around the block and yield it (None when tracing is off).
+
+    current=False leaves the caller's active span unchanged, for blocks that
+    yield from an async generator, where the active span cannot follow.
+    """
+    if _tracer is None:
+        yield None
+        return
+    if current:
+        with _tracer.start_as_current_span(name, attributes=_attributes(attributes)) as active:
+            yield active
+        return
+    detached = _tracer.start_span(name, attributes=_attributes(attributes))
+    try:
+        yield detached
+    except Exception as e:
+        detached.record_exception(e)
+        detached.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        detached.end()
+
+
+@contextmanager
+def stage(pipeline: str, name: str, current: bool = True, **attributes) -> Iterator[Any]:
+    """Time one pipeline stage into pipeline_stage_seconds, inside a span named pipeline.name."""
+    started = time.perf_counter()
+    try:
+        with span(f"{pipeline}.{name}", current, **attributes) as active:
+            yield active
+    finally:
+        stage_seconds.observe(time.perf_counter() - started, pipeline=pipeline, stage=name)
+
+
+def traced(fn: Callable) -> Callable:
+    """Wrap a sync or async function in a span named after its module, e.g. repositories.aio.chapter.create."""
+    if trace is None:
+        return fn
+    name = f"{fn.__module__.removeprefix('app.')}.{fn.__name__}"
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def traced_async(*args, **kwargs):
+            if _tracer is None:
+                return await fn(*args, **kwargs)
+            with _tracer.start_as_current_span(name):
+                return await fn(*args, **kwargs)
+
+        return traced_async
+
+    @functools.wraps(fn)
+    def traced_sync(*args, **kwargs):
+        if _tracer is None:
+            return fn(*args, **kwargs)
+        with _tracer.start_as_current_span(name):
+            return fn(*args, **kwargs)
+
+    return traced_sync
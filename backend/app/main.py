@@ -1,22 +1,49 @@
 import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logging.getLogger("app").setLevel(logging.INFO)
 
+from app.core import context_cache, metrics, tracing
 from app.core.config import settings
+from app.api.middleware import RequestMetricsMiddleware
 from app.api.router import api_router
+from app.services import glossary_index
+from app.services import job as job_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tracing.setup()
+    glossary_index.start_listener()
+    job_service.start_workers()
+    yield
+    await job_service.stop_workers()
+    await glossary_index.stop_listener()
+    await context_cache.close()
+    tracing.shutdown()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
+app.add_middleware(RequestMetricsMiddleware)
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
 @app.get("/")
 async def root():
     return {"message": f"Welcome to {settings.PROJECT_NAME}"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -2,10 +2,16 @@ from app.models.base import BaseModelWithTimestamp
 from app.models.book import Book
 from app.models.chapter import Chapter
 from app.models.glossary import Glossary
+from app.models.job import Job
+from app.models.search import SearchParagraph
+from app.models.translation_cache import TranslationCacheEntry
 
 __all__ = [
     "BaseModelWithTimestamp",
     "Book",
     "Chapter",
     "Glossary",
+    "Job",
+    "SearchParagraph",
+    "TranslationCacheEntry",
 ]
@@ -1,29 +1,71 @@
 import uuid as uuid_module
+from enum import Enum
 from typing import Optional, List, Any
 
 from sqlmodel import Field, Relationship, Column
-from sqlalchemy import JSON, UniqueConstraint, Index, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import UniqueConstraint, Index, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 from app.models.base import BaseModelWithTimestamp
 
 
+class ChapterStatus(str, Enum):
+    PENDING = "pending"  # placeholder (glossary not extracted yet for ingested chapters)
+    QUEUED = "queued"  # translation job submitted
+    RUNNING = "running"  # translation job in progress
+    FAILED = "failed"  # translation job gave up
+    TRANSLATED = "translated"
+
+
+# Allowed status transitions; the synchronous translate endpoint goes
+# straight to TRANSLATED, background jobs go through QUEUED/RUNNING.
+CHAPTER_STATUS_TRANSITIONS: dict[ChapterStatus, set[ChapterStatus]] = {
+    ChapterStatus.PENDING: {ChapterStatus.QUEUED, ChapterStatus.RUNNING, ChapterStatus.TRANSLATED},
+    ChapterStatus.QUEUED: {ChapterStatus.RUNNING, ChapterStatus.FAILED},
+    ChapterStatus.RUNNING: {ChapterStatus.TRANSLATED, ChapterStatus.FAILED, ChapterStatus.QUEUED},
+    ChapterStatus.FAILED: {ChapterStatus.QUEUED, ChapterStatus.RUNNING, ChapterStatus.TRANSLATED},
+    ChapterStatus.TRANSLATED: {ChapterStatus.QUEUED, ChapterStatus.RUNNING, ChapterStatus.TRANSLATED},
+}
+
+
+def can_transition(current: str, new: str) -> bool:
+    return ChapterStatus(new) in CHAPTER_STATUS_TRANSITIONS[ChapterStatus(current)]
+
+
+def translation_error(index: int) -> str:
+    """Stored in place of paragraph index (0-based) when its translation failed."""
+    return f"[Translation error: paragraph {index + 1}]"
+
+
+def is_translation_error(translated: str) -> bool:
+    return translated.startswith("[Translation error")
+
+
 class Chapter(BaseModelWithTimestamp, table=True):
     __tablename__ = "chapters"
     __table_args__ = (
         UniqueConstraint("book_id", "order", name="uq_chapters_book_id_order"),
         Index("ix_chapters_book_id", "book_id"),
+        # Table of contents: range scan over a book's translated chapters in order
+        Index(
+            "ix_chapters_book_id_status_order",
+            "book_id",
+            "status",
+            "order",
+            postgresql_include=["id"],
+        ),
     )
 
     id: uuid_module.UUID = Field(
         default_factory=uuid_module.uuid4,
         sa_column=Column(UUID(as_uuid=True), primary_key=True, default=uuid_module.uuid4),
     )
-    title: Optional[Any] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    title: Optional[Any] = Field(default=None, sa_column=Column(JSONB, nullable=True))
     order: Optional[int] = None
     summary: Optional[str] = None
-    paragraphs: Optional[Any] = Field(default=None, sa_column=Column(JSON, nullable=True))
-    status: str = Field(default="pending")  # "pending" | "translated"
+    paragraphs: Optional[Any] = Field(default=None, sa_column=Column(JSONB, nullable=True))
+    status: str = Field(default=ChapterStatus.PENDING.value)  # see ChapterStatus
+    raw_text: Optional[str] = None  # source text of chapters created by bulk ingestion
     book_id: uuid_module.UUID = Field(
         sa_column=Column(UUID(as_uuid=True), ForeignKey("books.id"), nullable=False)
     )
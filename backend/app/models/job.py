@@ -0,0 +1,47 @@
+import uuid as uuid_module
+from datetime import datetime
+from enum import Enum
+from typing import Optional, Any
+
+from sqlmodel import Field, Column
+from sqlalchemy import JSON, Index, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import BaseModelWithTimestamp
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    SUCCEEDED = "succeeded"
+
+
+class Job(BaseModelWithTimestamp, table=True):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        Index("ix_jobs_chapter_id", "chapter_id"),
+    )
+
+    id: uuid_module.UUID = Field(
+        default_factory=uuid_module.uuid4,
+        sa_column=Column(UUID(as_uuid=True), primary_key=True, default=uuid_module.uuid4),
+    )
+    kind: str
+    status: str = Field(default=JobStatus.QUEUED.value)
+    payload: Any = Field(default=None, sa_column=Column(JSON, nullable=False))
+    result: Optional[Any] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    error: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int = 3
+    run_after: datetime = Field(default_factory=datetime.utcnow)
+    locked_at: Optional[datetime] = None
+    book_id: Optional[uuid_module.UUID] = Field(
+        default=None,
+        sa_column=Column(UUID(as_uuid=True), ForeignKey("books.id"), nullable=True),
+    )
+    chapter_id: Optional[uuid_module.UUID] = Field(
+        default=None,
+        sa_column=Column(UUID(as_uuid=True), ForeignKey("chapters.id"), nullable=True),
+    )
@@ -0,0 +1,38 @@
+import uuid as uuid_module
+
+from sqlmodel import Field, Column, SQLModel
+from sqlalchemy import Index, ForeignKey
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+
+
+class SearchParagraph(SQLModel, table=True):
+    """One stored paragraph in the search index, written alongside Chapter.paragraphs.
+
+    raw_tsv holds overlapping character bigrams of the Chinese text (see
+    app.services.search.raw_tokens); translated_tsv holds the Vietnamese words.
+    """
+
+    __tablename__ = "search_paragraphs"
+    __table_args__ = (
+        # book_id inside the GIN index (btree_gin) so a search never scans other books
+        Index("ix_search_paragraphs_book_id_raw_tsv", "book_id", "raw_tsv", postgresql_using="gin"),
+        Index(
+            "ix_search_paragraphs_book_id_translated_tsv",
+            "book_id",
+            "translated_tsv",
+            postgresql_using="gin",
+        ),
+    )
+
+    chapter_id: uuid_module.UUID = Field(
+        sa_column=Column(
+            UUID(as_uuid=True), ForeignKey("chapters.id", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    paragraph: int = Field(primary_key=True)
+    book_id: uuid_module.UUID = Field(sa_column=Column(UUID(as_uuid=True), nullable=False))
+    chapter_order: int
+    raw: str
+    translated: str
+    raw_tsv: str = Field(sa_column=Column(TSVECTOR, nullable=False))
+    translated_tsv: str = Field(sa_column=Column(TSVECTOR, nullable=False))
@@ -0,0 +1,29 @@
+import uuid as uuid_module
+from typing import Optional, List
+
+from sqlmodel import Field, Column
+from sqlalchemy import String, Index
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+
+from app.models.base import BaseModelWithTimestamp
+
+
+class TranslationCacheEntry(BaseModelWithTimestamp, table=True):
+    """One translated paragraph, addressed by a hash of everything that shaped it."""
+
+    __tablename__ = "translation_cache"
+    __table_args__ = (
+        Index("ix_translation_cache_book_id", "book_id"),
+        Index("ix_translation_cache_terms", "terms", postgresql_using="gin"),
+    )
+
+    key: str = Field(sa_column=Column(String(64), primary_key=True))
+    book_id: Optional[uuid_module.UUID] = Field(
+        default=None, sa_column=Column(UUID(as_uuid=True), nullable=True)
+    )
+    raw: str
+    translated: str
+    model: str
+    prompt_version: str
+    # Glossary raw terms that applied to the paragraph (for invalidation)
+    terms: List[str] = Field(default_factory=list, sa_column=Column(ARRAY(String), nullable=False))
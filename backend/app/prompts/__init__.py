@@ -1,4 +1,19 @@
-from app.prompts.extract_glossary import EXTRACT_GLOSSARY_PROMPT
-from app.prompts.translate_chapter import build_translate_chapter_prompt
+from app.prompts.chapter_metadata import CHAPTER_METADATA_PROMPT
+from app.prompts.extract_glossary import (
+    EXTRACT_GLOSSARY_BATCH_PROMPT,
+    EXTRACT_GLOSSARY_PROMPT,
+    build_extract_glossary_batch_input,
+)
+from app.prompts.translate_chapter import (
+    build_translate_chapter_prompt,
+    build_translate_window_prompt,
+)
 
-__all__ = ["EXTRACT_GLOSSARY_PROMPT", "build_translate_chapter_prompt"]
+__all__ = [
+    "CHAPTER_METADATA_PROMPT",
+    "EXTRACT_GLOSSARY_BATCH_PROMPT",
+    "EXTRACT_GLOSSARY_PROMPT",
+    "build_extract_glossary_batch_input",
+    "build_translate_chapter_prompt",
+    "build_translate_window_prompt",
+]
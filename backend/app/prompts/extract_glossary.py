@@ -50,3 +50,21 @@ Format mỗi phần tử:
   "translated": "bản dịch tiếng Việt",
   "type": "một trong 9 giá trị trên"
 }"""
+
+
+EXTRACT_GLOSSARY_BATCH_PROMPT = EXTRACT_GLOSSARY_PROMPT + """
+
+Chế độ nhiều chương:
+- Input gồm nhiều chương liên tiếp, mỗi chương bắt đầu bằng dòng "=== Chương N ===".
+- Trích xuất thuật ngữ từ TẤT CẢ các chương và trả về MỘT JSON array duy nhất, không trùng lặp giữa các chương.
+- Nếu input có mục "Đã có trong glossary", KHÔNG trích xuất lại các thuật ngữ trong danh sách đó."""
+
+
+def build_extract_glossary_batch_input(chapters: list[str], known_raws: list[str]) -> str:
+    """Human message for batch extraction; known terms go here so the system prompt stays constant."""
+    parts = []
+    if known_raws:
+        parts.append("Đã có trong glossary:\n" + "、".join(known_raws))
+    for i, text in enumerate(chapters, start=1):
+        parts.append(f"=== Chương {i} ===\n{text}")
+    return "\n\n".join(parts)
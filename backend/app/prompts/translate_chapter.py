@@ -1,5 +1,31 @@
 from typing import Optional
 
+# Bump whenever the translation prompts change; part of the translation cache key
+PROMPT_VERSION = "1"
+
+TRANSLATION_RULES = """Yêu cầu dịch thuật:
+1. Dịch sát nghĩa nhưng phải tự nhiên, mượt mà, đúng văn phong truyện tiên hiệp.
+2. Giữ nguyên tên riêng nhân vật, địa danh, môn phái theo Hán Việt (không phiên âm sang tiếng Việt hiện đại).
+3. Các thuật ngữ tu luyện phải dịch theo phong cách tiên hiệp quen thuộc (ví dụ: Luyện Khí, Trúc Cơ, Kim Đan, Nguyên Anh, Hóa Thần…).
+4. Không dịch word-by-word gây cứng câu, ưu tiên câu văn trôi chảy như truyện xuất bản.
+5. Giữ nguyên thứ tự nội dung, không thêm bớt ý.
+6. Nếu gặp thành ngữ hoặc điển tích Trung Quốc, hãy chuyển sang cách diễn đạt tương đương dễ hiểu với độc giả Việt.
+7. Giữ nguyên cách xưng hô phù hợp bối cảnh cổ trang (ta, ngươi, bổn tọa, tiền bối, vãn bối…).
+8. MỖI đoạn trong input phải có MỘT đoạn tương ứng trong output. Không gộp hay tách đoạn.
+9. Nếu đoạn input CHỈ chứa URL, link, ký tự đặc biệt, hoặc text quảng cáo/watermark không phải nội dung truyện (ví dụ: "¤ttkΛn¤co", "Www?TTKΛN?co", "www.xxx.com", hoặc các biến thể tương tự) → trả về chuỗi rỗng "" cho đoạn đó. VẪN PHẢI giữ đúng vị trí trong array để không sai thứ tự."""
+
+
+def build_glossary_block(glossary: list[dict]) -> str:
+    glossary_lines = "\n".join(
+        f"{g['raw']} → {g['translated']} ({g['type']})" for g in glossary
+    )
+    return f"""
+
+QUAN TRỌNG - Bảng thuật ngữ tham chiếu (BẮT BUỘC dùng bản dịch này):
+{glossary_lines}
+
+Khi gặp bất kỳ thuật ngữ nào trong bảng trên, BẮT BUỘC sử dụng bản dịch tương ứng. KHÔNG tự ý dịch khác."""
+
 
 def build_translate_chapter_prompt(glossary: Optional[list[dict]] = None) -> str:
     prompt = """Bạn là dịch giả chuyên dịch truyện tiên hiệp Trung Quốc sang tiếng Việt.
@@ -12,16 +38,7 @@ Output: Bạn PHẢI trả về một JSON object với các trường sau:
 - "translations": JSON array chứa danh sách các ĐOẠN văn tiếng Việt đã dịch, CHỈ bao gồm nội dung truyện. KHÔNG bao gồm dòng tiêu đề/số chương trong translations.
 - "summary": Một đoạn tóm tắt ngắn gọn (2-4 câu) bằng tiếng Việt, miêu tả các sự kiện chính xảy ra trong chương.
 
-Yêu cầu dịch thuật:
-1. Dịch sát nghĩa nhưng phải tự nhiên, mượt mà, đúng văn phong truyện tiên hiệp.
-2. Giữ nguyên tên riêng nhân vật, địa danh, môn phái theo Hán Việt (không phiên âm sang tiếng Việt hiện đại).
-3. Các thuật ngữ tu luyện phải dịch theo phong cách tiên hiệp quen thuộc (ví dụ: Luyện Khí, Trúc Cơ, Kim Đan, Nguyên Anh, Hóa Thần…).
-4. Không dịch word-by-word gây cứng câu, ưu tiên câu văn trôi chảy như truyện xuất bản.
-5. Giữ nguyên thứ tự nội dung, không thêm bớt ý.
-6. Nếu gặp thành ngữ hoặc điển tích Trung Quốc, hãy chuyển sang cách diễn đạt tương đương dễ hiểu với độc giả Việt.
-7. Giữ nguyên cách xưng hô phù hợp bối cảnh cổ trang (ta, ngươi, bổn tọa, tiền bối, vãn bối…).
-8. MỖI đoạn trong input phải có MỘT đoạn tương ứng trong output. Không gộp hay tách đoạn.
-9. Nếu đoạn input CHỈ chứa URL, link, ký tự đặc biệt, hoặc text quảng cáo/watermark không phải nội dung truyện (ví dụ: "¤ttkΛn¤co", "Www?TTKΛN?co", "www.xxx.com", hoặc các biến thể tương tự) → trả về chuỗi rỗng "" cho đoạn đó. VẪN PHẢI giữ đúng vị trí trong array để không sai thứ tự.
+""" + TRANSLATION_RULES + """
 
 Yêu cầu cho summary:
 - KHÔNG bắt đầu bằng câu giới thiệu tác phẩm hay tác giả (ví dụ: "Đây là phần giới thiệu tác phẩm X của tác giả Y").
@@ -30,15 +47,7 @@ Yêu cầu cho summary:
 - Dài 2-4 câu."""
 
     if glossary:
-        glossary_lines = "\n".join(
-            f"{g['raw']} → {g['translated']} ({g['type']})" for g in glossary
-        )
-        prompt += f"""
-
-QUAN TRỌNG - Bảng thuật ngữ tham chiếu (BẮT BUỘC dùng bản dịch này):
-{glossary_lines}
-
-Khi gặp bất kỳ thuật ngữ nào trong bảng trên, BẮT BUỘC sử dụng bản dịch tương ứng. KHÔNG tự ý dịch khác."""
+        prompt += build_glossary_block(glossary)
 
     prompt += """
 
@@ -51,3 +60,29 @@ Lưu ý: Input có 3 đoạn nhưng translations chỉ có 2 vì dòng tiêu đ
 CHỈ trả về JSON object, KHÔNG giải thích thêm."""
 
     return prompt
+
+
+def build_translate_window_prompt(glossary: Optional[list[dict]] = None) -> str:
+    """Prompt for translating one window of a chunked chapter (paragraphs only)."""
+    prompt = """Bạn là dịch giả chuyên dịch truyện tiên hiệp Trung Quốc sang tiếng Việt.
+
+Input: Bạn sẽ nhận được một JSON object gồm:
+- "context": các đoạn văn tiếng Trung đứng NGAY TRƯỚC phần cần dịch, chỉ để tham khảo ngữ cảnh. KHÔNG dịch các đoạn này.
+- "paragraphs": JSON array các ĐOẠN văn tiếng Trung cần dịch.
+
+Output: Bạn PHẢI trả về một JSON array chứa các ĐOẠN văn tiếng Việt đã dịch, có ĐÚNG số phần tử bằng số phần tử của "paragraphs", theo đúng thứ tự. Nếu một đoạn là dòng tiêu đề chương (dạng "第X章 ...") thì vẫn dịch bình thường (ví dụ: "Chương X: ...").
+
+""" + TRANSLATION_RULES
+
+    if glossary:
+        prompt += build_glossary_block(glossary)
+
+    prompt += """
+
+Ví dụ:
+Input: {"context": ["张三走进房间。"], "paragraphs": ["他看到一个宝箱。", "宝箱里有一颗金丹。他小心翼翼地拿起来。"]}
+Output: ["Hắn nhìn thấy một chiếc rương báu.", "Trong rương có một viên Kim Đan. Hắn cẩn thận cầm lấy."]
+
+CHỈ trả về JSON array, KHÔNG giải thích thêm."""
+
+    return prompt
@@ -0,0 +1,335 @@
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Optional, Any
+
+from sqlalchemy import String, cast, or_, text, tuple_
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import tracing
+from app.models.chapter import Chapter, ChapterStatus, can_transition, is_translation_error
+from app.repositories.aio import search as search_repo
+from app.repositories.chapter import paragraph_texts, title_text
+
+
+@tracing.traced
+async def lock_orders(session: AsyncSession, book_id: uuid.UUID) -> None:
+    """Serialize order allocation for a book until the caller's transaction ends."""
+    key = int.from_bytes(book_id.bytes[:8], "big", signed=True)
+    await session.exec(text("SELECT pg_advisory_xact_lock(:key)"), params={"key": key})
+
+
+@tracing.traced
+async def get_next_order(session: AsyncSession, book_id: uuid.UUID) -> int:
+    statement = select(func.coalesce(func.max(Chapter.order), 0)).where(
+        Chapter.book_id == book_id
+    )
+    max_order = (await session.exec(statement)).one()
+    return max_order + 1
+
+
+@tracing.traced
+async def create_placeholder(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    status: ChapterStatus = ChapterStatus.PENDING,
+    order: Optional[int] = None,
+    raw_text: Optional[str] = None,
+) -> Chapter:
+    """Create an empty chapter placeholder for glossary linking."""
+    chapter = Chapter(book_id=book_id, status=status.value, order=order, raw_text=raw_text)
+    session.add(chapter)
+    await session.commit()
+    await session.refresh(chapter)
+    return chapter
+
+
+@tracing.traced
+async def create_placeholders(
+    session: AsyncSession, book_id: uuid.UUID, chapters: list[tuple[int, str]]
+) -> int:
+    """Bulk variant of create_placeholder for (order, raw_text) pairs; the caller commits."""
+    session.add_all(
+        Chapter(
+            book_id=book_id,
+            status=ChapterStatus.PENDING.value,
+            order=order,
+            raw_text=raw_text,
+        )
+        for order, raw_text in chapters
+    )
+    # Flushed rows are no longer held by the session, so a long upload stays small
+    await session.flush()
+    return len(chapters)
+
+
+@tracing.traced
+async def list_unfinished_ingested(
+    session: AsyncSession, book_id: uuid.UUID
+) -> list[tuple[uuid.UUID, int, str]]:
+    """Return (id, order, status) of ingested chapters that are not translated yet."""
+    statement = (
+        select(Chapter.id, Chapter.order, Chapter.status)
+        .where(
+            Chapter.book_id == book_id,
+            Chapter.raw_text.is_not(None),
+            Chapter.status != ChapterStatus.TRANSLATED.value,
+        )
+        .order_by(Chapter.order)
+    )
+    return [tuple(r) for r in (await session.exec(statement)).all()]
+
+
+@tracing.traced
+async def count_ingested(session: AsyncSession, book_id: uuid.UUID) -> dict[str, int]:
+    """Count ingested chapters of a book per status."""
+    statement = (
+        select(Chapter.status, func.count())
+        .where(Chapter.book_id == book_id, Chapter.raw_text.is_not(None))
+        .group_by(Chapter.status)
+    )
+    return {status: count for status, count in (await session.exec(statement)).all()}
+
+
+@tracing.traced
+async def set_status(
+    session: AsyncSession, chapter_id: uuid.UUID, status: ChapterStatus
+) -> Optional[Chapter]:
+    """Move a chapter to a new status, enforcing CHAPTER_STATUS_TRANSITIONS."""
+    chapter = await session.get(Chapter, chapter_id)
+    if chapter is None:
+        return None
+    if chapter.status != status.value:
+        if not can_transition(chapter.status, status.value):
+            raise ValueError(f"Invalid chapter status transition {chapter.status} -> {status.value}")
+        chapter.status = status.value
+        session.add(chapter)
+        await session.commit()
+    return chapter
+
+
+@tracing.traced
+async def update_translation(
+    session: AsyncSession,
+    chapter_id: uuid.UUID,
+    order: int,
+    paragraphs: Any,
+    title: str,
+    summary: Optional[str] = None,
+) -> Optional[Chapter]:
+    """Fill in translation data for an existing placeholder chapter."""
+    chapter = await session.get(Chapter, chapter_id)
+    if chapter is None:
+        return None
+    chapter.order = order
+    chapter.paragraphs = paragraphs
+    chapter.title = title
+    chapter.summary = summary
+    chapter.status = ChapterStatus.TRANSLATED.value
+    session.add(chapter)
+    await search_repo.index_chapters(session, [(chapter.id, chapter.book_id, order, paragraphs)])
+    await session.commit()
+    await session.refresh(chapter)
+    return chapter
+
+
+@tracing.traced
+async def create(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    order: int,
+    paragraphs: Any,
+    title: str,
+    summary: Optional[str] = None,
+) -> Chapter:
+    chapter = Chapter(
+        book_id=book_id,
+        order=order,
+        paragraphs=paragraphs,
+        title=title,
+        summary=summary,
+        status=ChapterStatus.TRANSLATED.value,
+    )
+    session.add(chapter)
+    # The search rows reference the chapter, so it has to exist first
+    await session.flush()
+    await search_repo.index_chapters(session, [(chapter.id, book_id, order, paragraphs)])
+    await session.commit()
+    await session.refresh(chapter)
+    return chapter
+
+
+@tracing.traced
+async def get_by_id(session: AsyncSession, id: uuid.UUID) -> Optional[Chapter]:
+    return await session.get(Chapter, id)
+
+
+@tracing.traced
+async def get_by_book_id(session: AsyncSession, book_id: uuid.UUID) -> list[Chapter]:
+    statement = (
+        select(Chapter).where(Chapter.book_id == book_id).order_by(Chapter.order)
+    )
+    return list((await session.exec(statement)).all())
+
+
+@tracing.traced
+async def get_export_version(session: AsyncSession, book_id: uuid.UUID) -> tuple[int, Optional[datetime]]:
+    """(count, max updated_date) of a book's translated chapters; changes whenever an export would."""
+    statement = select(func.count(), func.max(Chapter.updated_date)).where(
+        Chapter.book_id == book_id,
+        Chapter.status == ChapterStatus.TRANSLATED.value,
+    )
+    count, updated = (await session.exec(statement)).one()
+    return count, updated
+
+
+async def stream_for_export(
+    session: AsyncSession, book_id: uuid.UUID, yield_per: int
+) -> AsyncIterator[tuple[int, Optional[str], list[str]]]:
+    """(order, title, translated paragraphs) of translated chapters, in order.
+
+    Rows come from a server-side cursor, yield_per at a time, with the text
+    projected in the database, so no ORM objects or whole book are held.
+    Paragraphs whose translation failed are exported as the raw text.
+    """
+    statement = (
+        select(Chapter.order, title_text(), paragraph_texts("translated"), paragraph_texts("raw"))
+        .where(
+            Chapter.book_id == book_id,
+            Chapter.status == ChapterStatus.TRANSLATED.value,
+        )
+        .order_by(Chapter.order)
+        .execution_options(yield_per=yield_per)
+    )
+    result = await session.stream(statement)
+    async for order, title, paragraphs, raws in result:
+        yield order, title, [
+            raw if is_translation_error(translated) else translated
+            for translated, raw in zip(paragraphs or [], raws or [])
+        ]
+
+
+@tracing.traced
+async def get_by_book_and_order(
+    session: AsyncSession, book_id: uuid.UUID, order: int
+) -> Optional[Chapter]:
+    """Get a chapter by book_id and order number."""
+    statement = select(Chapter).where(
+        Chapter.book_id == book_id,
+        Chapter.order == order,
+        Chapter.status == ChapterStatus.TRANSLATED.value,
+    )
+    return (await session.exec(statement)).first()
+
+
+@tracing.traced
+async def list_paragraphs_page(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    after: Optional[tuple[int, uuid.UUID]],
+    limit: int,
+) -> list[tuple[uuid.UUID, int, Any]]:
+    """(id, order, paragraphs) of translated chapters past the (order, id) keyset cursor."""
+    statement = select(Chapter.id, Chapter.order, Chapter.paragraphs).where(
+        Chapter.book_id == book_id,
+        Chapter.status == ChapterStatus.TRANSLATED.value,
+    )
+    if after is not None:
+        statement = statement.where(tuple_(Chapter.order, Chapter.id) > tuple_(*after))
+    statement = statement.order_by(Chapter.order, Chapter.id).limit(limit)
+    return [tuple(r) for r in (await session.exec(statement)).all()]
+
+
+@tracing.traced
+async def set_paragraph_translations(
+    session: AsyncSession, chapter_id: uuid.UUID, translations: dict[int, str]
+) -> Optional[Chapter]:
+    """Replace the translated side of the paragraphs at the given indices."""
+    chapter = await session.get(Chapter, chapter_id)
+    if chapter is None:
+        return None
+    paragraphs = [dict(p) for p in chapter.paragraphs or []]
+    for index, translated in translations.items():
+        if 0 <= index < len(paragraphs):
+            paragraphs[index]["translated"] = translated
+    # A new list, so the JSONB column is flagged as changed
+    chapter.paragraphs = paragraphs
+    session.add(chapter)
+    await search_repo.index_chapters(session, [(chapter.id, chapter.book_id, chapter.order, paragraphs)])
+    await session.commit()
+    await session.refresh(chapter)
+    return chapter
+
+
+@tracing.traced
+async def list_containing_page(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    forms: list[str],
+    after: Optional[tuple[int, uuid.UUID]],
+    limit: int,
+) -> list[tuple[uuid.UUID, int, Any, Any, datetime]]:
+    """(id, order, title, paragraphs, updated_date) of chapters whose stored JSON contains any form.
+
+    The filter runs on the JSONB text in the database, so chapters that
+    cannot need a rewrite are never sent back. Keyset cursor on (order, id).
+    """
+    # Match the forms as they are serialised inside JSON strings
+    patterns = [json.dumps(form, ensure_ascii=False)[1:-1] for form in forms]
+    columns = (cast(Chapter.paragraphs, String), cast(Chapter.title, String))
+    statement = select(
+        Chapter.id, Chapter.order, Chapter.title, Chapter.paragraphs, Chapter.updated_date
+    ).where(
+        Chapter.book_id == book_id,
+        or_(*(column.contains(p, autoescape=True) for column in columns for p in patterns)),
+    )
+    if after is not None:
+        statement = statement.where(tuple_(Chapter.order, Chapter.id) > tuple_(*after))
+    statement = statement.order_by(Chapter.order, Chapter.id).limit(limit)
+    return [tuple(r) for r in (await session.exec(statement)).all()]
+
+
+# Only rows still at the updated_date they were read with are written, so a
+# chapter re-translated in the meantime is never overwritten with stale text
+_REPLACE_TRANSLATIONS_SQL = """
+UPDATE chapters c
+SET title = CAST(v.title AS jsonb), paragraphs = CAST(v.paragraphs AS jsonb), updated_date = :now
+FROM unnest(
+    CAST(:ids AS uuid[]), CAST(:titles AS text[]),
+    CAST(:paragraphs AS text[]), CAST(:seen AS timestamp[])
+) AS v(id, title, paragraphs, seen)
+WHERE c.id = v.id AND c.updated_date = v.seen
+RETURNING c.id
+"""
+
+
+@tracing.traced
+async def replace_translations(
+    session: AsyncSession, book_id: uuid.UUID, rows: list[dict]
+) -> set[uuid.UUID]:
+    """Write {id, order, title, paragraphs, updated_date} rows in one UPDATE; the caller commits.
+
+    Returns the ids that were written (rows changed since they were read are skipped).
+    """
+    if not rows:
+        return set()
+    result = await session.exec(
+        text(_REPLACE_TRANSLATIONS_SQL),
+        params={
+            "ids": [row["id"] for row in rows],
+            "titles": [
+                json.dumps(row["title"], ensure_ascii=False) if row["title"] is not None else None
+                for row in rows
+            ],
+            "paragraphs": [json.dumps(row["paragraphs"], ensure_ascii=False) for row in rows],
+            "seen": [row["updated_date"] for row in rows],
+            "now": datetime.utcnow(),
+        },
+    )
+    written = {row.id for row in result.all()}
+    await search_repo.index_chapters(
+        session,
+        [(row["id"], book_id, row["order"], row["paragraphs"]) for row in rows if row["id"] in written],
+    )
+    return written
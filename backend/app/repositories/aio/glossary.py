@@ -0,0 +1,209 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlmodel import select, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import tracing
+from app.models.glossary import Glossary
+
+GLOSSARY_CHANNEL = "glossary_changed"
+
+
+@tracing.traced
+async def find_by_raw_values(
+    session: AsyncSession, raw_values: list[str], book_id: Optional[uuid.UUID] = None
+) -> list[Glossary]:
+    statement = select(Glossary).where(col(Glossary.raw).in_(raw_values))
+    if book_id is not None:
+        statement = statement.where(Glossary.book_id == book_id)
+    return list((await session.exec(statement)).all())
+
+
+# One round trip: dedup the batch by raw (first wins), skip raws the book
+# already has under any type, insert the rest and return both sides. The
+# ON CONFLICT covers concurrent extractions racing on the same (raw, type);
+# the rows they won with are not in this statement's snapshot, so
+# create_missing reads them back separately.
+_CREATE_MISSING_SQL = """
+WITH input AS (
+    SELECT * FROM unnest(
+        CAST(:ids AS uuid[]), CAST(:raws AS varchar[]),
+        CAST(:translateds AS varchar[]), CAST(:types AS varchar[]),
+        CAST(:chapter_ids AS uuid[])
+    ) WITH ORDINALITY AS t(id, raw, translated, type, first_chapter_id, idx)
+),
+existing AS (
+    SELECT g.raw, g.translated, g.type FROM glossaries g
+    WHERE g.raw IN (SELECT raw FROM input) {book_filter}
+),
+fresh AS (
+    SELECT DISTINCT ON (raw) id, raw, translated, type, first_chapter_id FROM input
+    WHERE NOT EXISTS (SELECT 1 FROM existing e WHERE e.raw = input.raw)
+    ORDER BY raw, idx
+),
+inserted AS (
+    INSERT INTO glossaries (id, raw, translated, type, book_id, first_chapter_id, created_date, updated_date)
+    SELECT id, raw, translated, type, :book_id, first_chapter_id, :now, :now FROM fresh
+    ON CONFLICT ON CONSTRAINT uq_glossaries_raw_type_book_id DO NOTHING
+    RETURNING raw, translated, type
+)
+SELECT raw, translated, type, true AS inserted FROM inserted
+UNION ALL
+SELECT raw, translated, type, false AS inserted FROM existing
+"""
+
+
+@tracing.traced
+async def create_missing(
+    session: AsyncSession,
+    items: list[dict],
+    book_id: Optional[uuid.UUID] = None,
+    first_chapter_id: Optional[uuid.UUID] = None,
+) -> tuple[list[dict], list[dict]]:
+    """Insert terms whose raw the book does not have yet, in a single statement.
+
+    An item may carry its own first_chapter_id; the argument is the default.
+    When a raw repeats in the batch, the first item wins.
+    Returns (inserted, existing) as lists of {raw, translated, type}. Without
+    a book_id, raws are deduped against every book. Never raises on the
+    unique constraint, even with concurrent extractions.
+    """
+    if not items:
+        return [], []
+    # Without a book the old lookup matched any book; NULL book_ids never conflict
+    book_filter = "AND g.book_id = :book_id" if book_id is not None else ""
+    statement = text(_CREATE_MISSING_SQL.format(book_filter=book_filter)).bindparams(
+        bindparam("book_id", type_=UUID(as_uuid=True)),
+    )
+    now = datetime.utcnow()
+    rows = (
+        await session.exec(
+            statement,
+            params={
+                "ids": [uuid.uuid4() for _ in items],
+                "raws": [item["raw"] for item in items],
+                "translateds": [item["translated"] for item in items],
+                "types": [item["type"] for item in items],
+                "chapter_ids": [item.get("first_chapter_id") or first_chapter_id for item in items],
+                "book_id": book_id,
+                "now": now,
+            },
+        )
+    ).all()
+    inserted, existing = [], []
+    for row in rows:
+        item = {"raw": row.raw, "translated": row.translated, "type": row.type}
+        (inserted if row.inserted else existing).append(item)
+    # The INSERT waited for the concurrent writer, so its rows are visible now
+    lost = {item["raw"] for item in items} - {row.raw for row in rows}
+    if lost:
+        for term in await find_by_raw_values(session, sorted(lost), book_id):
+            existing.append({"raw": term.raw, "translated": term.translated, "type": term.type})
+    if inserted:
+        await notify_changed(session, book_id)
+    await session.commit()
+    return inserted, existing
+
+
+# Locks the rows being renamed and returns each one's previous translation;
+# terms whose translation does not change are left alone
+_UPDATE_TRANSLATIONS_SQL = """
+WITH input AS (
+    SELECT * FROM unnest(
+        CAST(:raws AS varchar[]), CAST(:types AS varchar[]), CAST(:translateds AS varchar[])
+    ) AS t(raw, type, translated)
+),
+old AS (
+    SELECT g.id, g.translated FROM glossaries g
+    JOIN input i ON g.raw = i.raw AND g.type = i.type
+    WHERE g.book_id = :book_id AND g.translated <> i.translated
+    FOR UPDATE OF g
+)
+UPDATE glossaries g SET translated = i.translated, updated_date = :now
+FROM old, input i
+WHERE g.id = old.id AND g.raw = i.raw AND g.type = i.type
+RETURNING g.raw, g.type, old.translated AS old_translated, g.translated
+"""
+
+
+@tracing.traced
+async def update_translations(
+    session: AsyncSession, items: list[dict], book_id: uuid.UUID
+) -> list[dict]:
+    """Set the translation of existing (raw, type) terms of a book in one statement; the caller commits.
+
+    When a term repeats in the batch, the last item wins. Returns
+    {raw, type, old, translated} for the terms that actually changed.
+    """
+    latest = {(item["raw"], item["type"]): item["translated"] for item in items}
+    if not latest:
+        return []
+    statement = text(_UPDATE_TRANSLATIONS_SQL).bindparams(
+        bindparam("book_id", type_=UUID(as_uuid=True)),
+    )
+    rows = (
+        await session.exec(
+            statement,
+            params={
+                "raws": [raw for raw, _ in latest],
+                "types": [type for _, type in latest],
+                "translateds": list(latest.values()),
+                "book_id": book_id,
+                "now": datetime.utcnow(),
+            },
+        )
+    ).all()
+    if rows:
+        await notify_changed(session, book_id)
+    return [
+        {"raw": row.raw, "type": row.type, "old": row.old_translated, "translated": row.translated}
+        for row in rows
+    ]
+
+
+@tracing.traced
+async def get_by_type(
+    session: AsyncSession, type: str, book_id: Optional[uuid.UUID] = None
+) -> list[Glossary]:
+    statement = select(Glossary).where(Glossary.type == type)
+    if book_id is not None:
+        statement = statement.where(Glossary.book_id == book_id)
+    return list((await session.exec(statement)).all())
+
+
+@tracing.traced
+async def get_all(
+    session: AsyncSession, book_id: Optional[uuid.UUID] = None
+) -> list[Glossary]:
+    statement = select(Glossary)
+    if book_id is not None:
+        statement = statement.where(Glossary.book_id == book_id)
+    return list((await session.exec(statement)).all())
+
+
+@tracing.traced
+async def get_updated_since(
+    session: AsyncSession,
+    book_id: Optional[uuid.UUID] = None,
+    since: Optional[datetime] = None,
+) -> list[tuple[str, str, str, datetime]]:
+    """(raw, translated, type, updated_date) of terms changed after since (all terms if None)."""
+    statement = select(Glossary.raw, Glossary.translated, Glossary.type, Glossary.updated_date)
+    if book_id is not None:
+        statement = statement.where(Glossary.book_id == book_id)
+    if since is not None:
+        statement = statement.where(Glossary.updated_date > since)
+    return [tuple(row) for row in (await session.exec(statement)).all()]
+
+
+@tracing.traced
+async def notify_changed(session: AsyncSession, book_id: Optional[uuid.UUID]) -> None:
+    """Queue a glossary_changed notification; it is delivered when the transaction commits."""
+    await session.exec(
+        text("SELECT pg_notify(:channel, :payload)"),
+        params={"channel": GLOSSARY_CHANNEL, "payload": str(book_id) if book_id else ""},
+    )
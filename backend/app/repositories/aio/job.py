@@ -0,0 +1,175 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Any
+
+from sqlalchemy import case, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import tracing
+from app.models.job import Job, JobStatus
+
+
+@tracing.traced
+async def create(
+    session: AsyncSession,
+    kind: str,
+    payload: Any,
+    book_id: Optional[uuid.UUID] = None,
+    chapter_id: Optional[uuid.UUID] = None,
+    max_attempts: int = 3,
+) -> Job:
+    job = Job(
+        kind=kind,
+        payload=payload,
+        book_id=book_id,
+        chapter_id=chapter_id,
+        max_attempts=max_attempts,
+    )
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    return job
+
+
+@tracing.traced
+async def get_by_id(session: AsyncSession, id: uuid.UUID) -> Optional[Job]:
+    return await session.get(Job, id)
+
+
+@tracing.traced
+async def claim_next(session: AsyncSession, kinds: list[str]) -> Optional[Job]:
+    """Atomically move the oldest runnable queued job to running.
+
+    FOR UPDATE SKIP LOCKED lets any number of workers, in any process, poll
+    the same table without handing out a job twice.
+    """
+    now = datetime.utcnow()
+    next_id = (
+        select(Job.id)
+        .where(
+            Job.status == JobStatus.QUEUED.value,
+            Job.run_after <= now,
+            Job.kind.in_(kinds),
+        )
+        .order_by(Job.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    statement = (
+        update(Job)
+        .where(Job.id == next_id)
+        .values(
+            status=JobStatus.RUNNING.value,
+            attempts=Job.attempts + 1,
+            locked_at=now,
+            updated_date=now,
+        )
+        .returning(Job)
+    )
+    job = (await session.execute(statement)).scalars().first()
+    await session.commit()
+    return job
+
+
+@tracing.traced
+async def heartbeat(session: AsyncSession, id: uuid.UUID) -> None:
+    now = datetime.utcnow()
+    await session.execute(
+        update(Job)
+        .where(Job.id == id, Job.status == JobStatus.RUNNING.value)
+        .values(locked_at=now, updated_date=now)
+    )
+    await session.commit()
+
+
+@tracing.traced
+async def save_progress(session: AsyncSession, id: uuid.UUID, result: Any) -> None:
+    await session.execute(
+        update(Job).where(Job.id == id).values(result=result, updated_date=datetime.utcnow())
+    )
+    await session.commit()
+
+
+@tracing.traced
+async def mark_succeeded(session: AsyncSession, id: uuid.UUID, result: Any = None) -> None:
+    now = datetime.utcnow()
+    await session.execute(
+        update(Job)
+        .where(Job.id == id)
+        .values(
+            status=JobStatus.SUCCEEDED.value,
+            result=result,
+            error=None,
+            locked_at=None,
+            updated_date=now,
+        )
+    )
+    await session.commit()
+
+
+@tracing.traced
+async def release(session: AsyncSession, id: uuid.UUID) -> None:
+    """Hand a running job back to the queue without counting the attempt (shutdown)."""
+    now = datetime.utcnow()
+    await session.execute(
+        update(Job)
+        .where(Job.id == id, Job.status == JobStatus.RUNNING.value)
+        .values(
+            status=JobStatus.QUEUED.value,
+            attempts=Job.attempts - 1,
+            locked_at=None,
+            run_after=now,
+            updated_date=now,
+        )
+    )
+    await session.commit()
+
+
+@tracing.traced
+async def mark_failed(
+    session: AsyncSession, job: Job, error: str, retry_delay: float
+) -> bool:
+    """Requeue with exponential backoff, or fail for good. Returns True if requeued."""
+    now = datetime.utcnow()
+    retry = job.attempts < job.max_attempts
+    values: dict = {"error": error, "locked_at": None, "updated_date": now}
+    if retry:
+        delay = retry_delay * (2 ** (job.attempts - 1))
+        values.update(status=JobStatus.QUEUED.value, run_after=now + timedelta(seconds=delay))
+    else:
+        values.update(status=JobStatus.FAILED.value)
+    await session.execute(update(Job).where(Job.id == job.id).values(**values))
+    await session.commit()
+    return retry
+
+
+@tracing.traced
+async def requeue_stale(session: AsyncSession, stale_after: float) -> list[Job]:
+    """Requeue running jobs whose worker stopped heartbeating (crash, restart).
+
+    Jobs that already used all their attempts are failed instead.
+    """
+    now = datetime.utcnow()
+    statement = (
+        update(Job)
+        .where(
+            Job.status == JobStatus.RUNNING.value,
+            Job.locked_at < now - timedelta(seconds=stale_after),
+        )
+        .values(
+            status=case(
+                (Job.attempts >= Job.max_attempts, JobStatus.FAILED.value),
+                else_=JobStatus.QUEUED.value,
+            ),
+            error="Worker stopped responding",
+            locked_at=None,
+            run_after=now,
+            updated_date=now,
+        )
+        .returning(Job)
+    )
+    jobs = list((await session.execute(statement)).scalars().all())
+    await session.commit()
+    return jobs
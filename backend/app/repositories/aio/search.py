@@ -0,0 +1,125 @@
+import uuid
+from typing import Any, Literal, Optional
+
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import tracing
+from app.core.search_text import raw_tokens
+from app.models.chapter import is_translation_error
+
+_INSERT_SQL = """
+INSERT INTO search_paragraphs
+    (chapter_id, paragraph, book_id, chapter_order, raw, translated, raw_tsv, translated_tsv)
+SELECT chapter_id, paragraph, book_id, chapter_order, raw, translated,
+       to_tsvector('simple', tokens), to_tsvector('simple', translated)
+FROM unnest(
+    CAST(:chapter_ids AS uuid[]), CAST(:paragraphs AS int[]), CAST(:book_ids AS uuid[]),
+    CAST(:orders AS int[]), CAST(:raws AS text[]), CAST(:translateds AS text[]),
+    CAST(:tokens AS text[])
+) AS t(chapter_id, paragraph, book_id, chapter_order, raw, translated, tokens)
+"""
+
+
+@tracing.traced
+async def index_chapters(
+    session: AsyncSession, chapters: list[tuple[uuid.UUID, uuid.UUID, Optional[int], Any]]
+) -> int:
+    """Replace the search rows of (chapter_id, book_id, order, paragraphs) chapters; the caller commits.
+
+    Runs in the caller's transaction, so the index changes together with
+    Chapter.paragraphs. Chapters without an order are only removed.
+    """
+    if not chapters:
+        return 0
+    await session.exec(
+        text("DELETE FROM search_paragraphs WHERE chapter_id = ANY(CAST(:ids AS uuid[]))"),
+        params={"ids": [chapter_id for chapter_id, _, _, _ in chapters]},
+    )
+    columns: dict[str, list] = {
+        "chapter_ids": [], "paragraphs": [], "book_ids": [], "orders": [],
+        "raws": [], "translateds": [], "tokens": [],
+    }
+    for chapter_id, book_id, order, paragraphs in chapters:
+        if order is None:
+            continue
+        for index, paragraph in enumerate(paragraphs or []):
+            raw = paragraph.get("raw") or ""
+            translated = paragraph.get("translated") or ""
+            if is_translation_error(translated):
+                translated = ""
+            if not raw.strip() and not translated.strip():
+                continue
+            columns["chapter_ids"].append(chapter_id)
+            columns["paragraphs"].append(index)
+            columns["book_ids"].append(book_id)
+            columns["orders"].append(order)
+            columns["raws"].append(raw)
+            columns["translateds"].append(translated)
+            columns["tokens"].append(raw_tokens(raw))
+    if columns["chapter_ids"]:
+        await session.exec(text(_INSERT_SQL), params=columns)
+    return len(columns["chapter_ids"])
+
+
+# The matching page is picked first; only its rows get a headline, which is
+# the expensive part of the query
+_SEARCH_SQL = """
+WITH hits AS (
+    SELECT chapter_id, chapter_order, paragraph, raw, translated, ts_rank_cd({tsv}, q) AS rank
+    FROM search_paragraphs, {tsquery} AS q
+    WHERE book_id = :book_id AND {tsv} @@ q
+    ORDER BY {order_by}
+    LIMIT :limit OFFSET :offset
+)
+SELECT chapter_id, chapter_order, paragraph, raw, translated, rank,
+       {headline} AS headline
+FROM hits
+ORDER BY {order_by}
+"""
+
+_TRANSLATED_HEADLINE = (
+    "ts_headline('simple', translated, websearch_to_tsquery('simple', :query), "
+    "'StartSel=<mark>, StopSel=</mark>, HighlightAll=true')"
+)
+
+# Raw queries come tokenized from raw_tsquery; translated ones are what the user typed
+_TSQUERY = {
+    "raw": "to_tsquery('simple', :query)",
+    "translated": "websearch_to_tsquery('simple', :query)",
+}
+
+_ORDER_BY = {
+    "rank": "rank DESC, chapter_order, paragraph",
+    "order": "chapter_order, paragraph",
+}
+
+
+@tracing.traced
+async def search(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    query: str,
+    side: Literal["raw", "translated"],
+    sort: Literal["rank", "order"],
+    offset: int,
+    limit: int,
+) -> list[Any]:
+    """Matching paragraphs of a book, a page at a time.
+
+    On the raw side query is to_tsquery text (see raw_tsquery); on the
+    translated side it is web search syntax (words, "phrases", -excluded).
+
+    Rows have chapter_id, chapter_order, paragraph, raw, translated, rank and
+    headline (the translated text with <mark> around matches; None on the raw side).
+    """
+    statement = text(
+        _SEARCH_SQL.format(
+            tsv="raw_tsv" if side == "raw" else "translated_tsv",
+            tsquery=_TSQUERY[side],
+            order_by=_ORDER_BY[sort],
+            headline=_TRANSLATED_HEADLINE if side == "translated" else "NULL",
+        )
+    )
+    params = {"book_id": book_id, "query": query, "offset": offset, "limit": limit}
+    return list((await session.exec(statement, params=params)).all())
@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import array, insert
+from sqlmodel import select, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import tracing
+from app.models.translation_cache import TranslationCacheEntry
+
+
+@tracing.traced
+async def get_many(session: AsyncSession, keys: list[str]) -> dict[str, TranslationCacheEntry]:
+    if not keys:
+        return {}
+    statement = select(TranslationCacheEntry).where(col(TranslationCacheEntry.key).in_(keys))
+    return {entry.key: entry for entry in (await session.exec(statement)).all()}
+
+
+@tracing.traced
+async def put_many(session: AsyncSession, entries: list[dict]) -> int:
+    """Insert or refresh cache entries in one statement."""
+    if not entries:
+        return 0
+    now = datetime.utcnow()
+    rows = [{**entry, "created_date": now, "updated_date": now} for entry in entries]
+    statement = insert(TranslationCacheEntry).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TranslationCacheEntry.key],
+        # terms too, so invalidate_terms sees what the new translation depends on
+        set_={
+            "translated": statement.excluded.translated,
+            "terms": statement.excluded.terms,
+            "updated_date": now,
+        },
+    )
+    await session.execute(statement)
+    await session.commit()
+    return len(rows)
+
+
+@tracing.traced
+async def delete_by_terms(
+    session: AsyncSession, terms: list[str], book_id: Optional[uuid.UUID] = None
+) -> int:
+    """Delete entries that depended on any of the given glossary raw terms."""
+    if not terms:
+        return 0
+    statement = delete(TranslationCacheEntry).where(
+        TranslationCacheEntry.terms.overlap(array(terms))
+    )
+    if book_id is not None:
+        statement = statement.where(TranslationCacheEntry.book_id == book_id)
+    result = await session.execute(statement)
+    await session.commit()
+    return result.rowcount
@@ -1,9 +1,11 @@
 from sqlmodel import Session
 
+from app.core import tracing
 from app.models.book import Book
 from app.schemas.book import BookCreate
 
 
+@tracing.traced
 def create(session: Session, data: BookCreate) -> Book:
     book = Book(
         title=data.title,
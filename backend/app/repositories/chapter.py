@@ -1,131 +1,141 @@
 import uuid
-from typing import Optional, Any
+from typing import Optional
 
+from sqlalchemy import case, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlmodel import Session, select, func
 
+from app.core import tracing
 from app.models.chapter import Chapter
 
 
-def get_next_order(session: Session, book_id: uuid.UUID) -> int:
-    statement = select(func.coalesce(func.max(Chapter.order), 0)).where(
-        Chapter.book_id == book_id
+def title_text():
+    # Titles are {"raw", "translated"} objects; older rows may hold a plain string
+    return case(
+        (
+            func.jsonb_typeof(Chapter.title) == "object",
+            func.coalesce(Chapter.title.op("->>")("translated"), Chapter.title.op("->>")("raw")),
+        ),
+        else_=Chapter.title.op("#>>")(literal_column("'{}'")),
     )
-    max_order = session.exec(statement).one()
-    return max_order + 1
 
 
-def create_placeholder(session: Session, book_id: uuid.UUID) -> Chapter:
-    """Create an empty chapter placeholder for glossary linking."""
-    chapter = Chapter(book_id=book_id, status="pending")
-    session.add(chapter)
-    session.commit()
-    session.refresh(chapter)
-    return chapter
+def paragraph_texts(side: str, start: int = 0, limit: Optional[int] = None):
+    """Correlated subquery: a JSON array with one side ("translated" or "raw") of a paragraph range."""
+    elems = (
+        func.jsonb_array_elements(Chapter.paragraphs)
+        .table_valued("value", with_ordinality="idx")
+        .render_derived()
+    )
+    value = elems.c.value
+    fallback = value.op("->>")("raw") if side == "translated" else literal_column("''")
+    text = case(
+        (
+            func.jsonb_typeof(value) == "object",
+            func.coalesce(value.op("->>")(side), fallback, literal_column("''")),
+        ),
+        # Older rows may store paragraphs as plain strings
+        else_=value.op("#>>")(literal_column("'{}'")),
+    )
+    statement = select(
+        func.coalesce(
+            func.jsonb_agg(aggregate_order_by(text, elems.c.idx)),
+            literal_column("'[]'::jsonb"),
+        )
+    ).select_from(elems)
+    if start:
+        statement = statement.where(elems.c.idx > start)
+    if limit is not None:
+        statement = statement.where(elems.c.idx <= start + limit)
+    return statement.scalar_subquery()
 
 
-def update_translation(
-    session: Session,
-    chapter_id: uuid.UUID,
-    order: int,
-    paragraphs: Any,
-    title: str,
-    summary: Optional[str] = None,
-) -> Optional[Chapter]:
-    """Fill in translation data for an existing placeholder chapter."""
-    chapter = session.get(Chapter, chapter_id)
-    if chapter is None:
-        return None
-    chapter.order = order
-    chapter.paragraphs = paragraphs
-    chapter.title = title
-    chapter.summary = summary
-    chapter.status = "translated"
-    session.add(chapter)
-    session.commit()
-    session.refresh(chapter)
-    return chapter
-
-
-def create(
+@tracing.traced
+def list_by_book_id(
     session: Session,
     book_id: uuid.UUID,
-    order: int,
-    paragraphs: Any,
-    title: str,
-    summary: Optional[str] = None,
-) -> Chapter:
-    chapter = Chapter(
-        book_id=book_id,
-        order=order,
-        paragraphs=paragraphs,
-        title=title,
-        summary=summary,
-        status="translated",
-    )
-    session.add(chapter)
-    session.commit()
-    session.refresh(chapter)
-    return chapter
-
-
-def get_by_id(session: Session, id: uuid.UUID) -> Optional[Chapter]:
-    return session.get(Chapter, id)
+    after: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> list[dict]:
+    """Return only id + title + order for chapter listing (lightweight).
 
-
-def get_by_book_id(session: Session, book_id: uuid.UUID) -> list[Chapter]:
-    statement = (
-        select(Chapter).where(Chapter.book_id == book_id).order_by(Chapter.order)
-    )
-    return list(session.exec(statement).all())
-
-
-def list_by_book_id(session: Session, book_id: uuid.UUID) -> list[dict]:
-    """Return only id + title + order for chapter listing (lightweight)."""
+    Keyset-paginated on order: pass the last order seen as `after`.
+    """
     statement = (
         select(Chapter.id, Chapter.title, Chapter.order)
         .where(Chapter.book_id == book_id, Chapter.status == "translated")
         .order_by(Chapter.order)
     )
+    if after is not None:
+        statement = statement.where(Chapter.order > after)
+    if limit is not None:
+        statement = statement.limit(limit)
     results = session.exec(statement).all()
     return [{"id": r.id, "title": r.title, "order": r.order} for r in results]
 
 
-def get_by_book_and_order(
-    session: Session, book_id: uuid.UUID, order: int
-) -> Optional[Chapter]:
-    """Get a chapter by book_id and order number."""
-    statement = select(Chapter).where(
-        Chapter.book_id == book_id,
-        Chapter.order == order,
-        Chapter.status == "translated",
+@tracing.traced
+def list_toc(session: Session, book_id: uuid.UUID) -> list[tuple[uuid.UUID, int, Optional[str]]]:
+    """Return (id, order, translated title) of every translated chapter, title extracted in SQL."""
+    statement = (
+        select(Chapter.id, Chapter.order, title_text())
+        .where(Chapter.book_id == book_id, Chapter.status == "translated")
+        .order_by(Chapter.order)
     )
-    return session.exec(statement).first()
-
-
-def get_adjacent_orders(
-    session: Session, book_id: uuid.UUID, order: int
-) -> tuple[Optional[int], Optional[int]]:
-    """Return (prev_order, next_order) for navigation."""
-    prev_stmt = (
-        select(Chapter.order)
-        .where(
-            Chapter.book_id == book_id,
-            Chapter.order < order,
-            Chapter.status == "translated",
+    return [tuple(r) for r in session.exec(statement).all()]
+
+
+@tracing.traced
+def get_detail(session: Session, book_id: uuid.UUID, order: int):
+    """Get the reader view of a translated chapter in a single query.
+
+    Returns a row with id, order, summary, updated_date, title (translated
+    text), paragraphs, raw_paragraphs, prev_order and next_order, or None.
+    The paragraph sides and title text are projected in the database.
+    """
+    neighbors = (
+        select(
+            Chapter.id.label("id"),
+            func.lag(Chapter.order).over(order_by=Chapter.order).label("prev_order"),
+            func.lead(Chapter.order).over(order_by=Chapter.order).label("next_order"),
         )
-        .order_by(Chapter.order.desc())
-        .limit(1)
+        .where(Chapter.book_id == book_id, Chapter.status == "translated")
+        .subquery()
     )
-    next_stmt = (
-        select(Chapter.order)
-        .where(
-            Chapter.book_id == book_id,
-            Chapter.order > order,
-            Chapter.status == "translated",
+    statement = (
+        select(
+            Chapter.id,
+            Chapter.order,
+            Chapter.summary,
+            Chapter.updated_date,
+            title_text().label("title"),
+            paragraph_texts("translated").label("paragraphs"),
+            paragraph_texts("raw").label("raw_paragraphs"),
+            neighbors.c.prev_order,
+            neighbors.c.next_order,
         )
-        .order_by(Chapter.order)
-        .limit(1)
+        .join(neighbors, neighbors.c.id == Chapter.id)
+        .where(Chapter.order == order)
+    )
+    return session.exec(statement).first()
+
+
+@tracing.traced
+def get_paragraph_range(
+    session: Session,
+    book_id: uuid.UUID,
+    order: int,
+    start: int = 0,
+    limit: Optional[int] = None,
+    sides: tuple[str, ...] = ("translated", "raw"),
+) -> Optional[dict]:
+    """Fetch paragraphs [start, start + limit) of a translated chapter, only the requested sides."""
+    columns = [func.coalesce(func.jsonb_array_length(Chapter.paragraphs), 0).label("total")]
+    columns += [paragraph_texts(side, start, limit).label(side) for side in sides]
+    statement = select(*columns).where(
+        Chapter.book_id == book_id,
+        Chapter.order == order,
+        Chapter.status == "translated",
     )
-    prev_order = session.exec(prev_stmt).first()
-    next_order = session.exec(next_stmt).first()
-    return prev_order, next_order
+    row = session.exec(statement).first()
+    return dict(row._mapping) if row is not None else None
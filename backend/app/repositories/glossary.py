@@ -3,9 +3,11 @@ from typing import Optional
 
 from sqlmodel import Session, select, col
 
+from app.core import tracing
 from app.models.glossary import Glossary
 
 
+@tracing.traced
 def find_by_raw_values(
     session: Session, raw_values: list[str], book_id: Optional[uuid.UUID] = None
 ) -> list[Glossary]:
@@ -15,6 +17,7 @@ def find_by_raw_values(
     return list(session.exec(statement).all())
 
 
+@tracing.traced
 def create_many(
     session: Session,
     items: list[dict],
@@ -36,6 +39,7 @@ def create_many(
     return count
 
 
+@tracing.traced
 def get_by_type(
     session: Session, type: str, book_id: Optional[uuid.UUID] = None
 ) -> list[Glossary]:
@@ -45,6 +49,7 @@ def get_by_type(
     return list(session.exec(statement).all())
 
 
+@tracing.traced
 def get_all(session: Session, book_id: Optional[uuid.UUID] = None) -> list[Glossary]:
     statement = select(Glossary)
     if book_id is not None:
@@ -22,3 +22,34 @@ class BookResponse(BaseModel):
     introduce: Optional[str] = None
     created_date: datetime
     updated_date: datetime
+
+
+class IngestBookResponse(BaseModel):
+    job_id: uuid.UUID
+    chapters: int
+
+
+class ConsistencyViolation(BaseModel):
+    paragraph: int
+    raw: str
+    expected: list[str]
+
+
+class ChapterConsistency(BaseModel):
+    chapter_id: uuid.UUID
+    order: Optional[int] = None
+    violations: list[ConsistencyViolation]
+
+
+class RetranslateItem(BaseModel):
+    chapter_id: uuid.UUID
+    order: Optional[int] = None
+    paragraphs: list[int]
+
+
+class ConsistencyReport(BaseModel):
+    chapters_checked: int
+    paragraphs_checked: int
+    violations: int
+    chapters: list[ChapterConsistency]
+    queue: list[RetranslateItem]
@@ -1,13 +1,14 @@
 import uuid
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Union
 
 
 class TranslateChapterRequest(BaseModel):
     text: str
     book_id: Optional[uuid.UUID] = None
     chapter_id: Optional[uuid.UUID] = None
+    chunked: Optional[bool] = None  # None = automatic for long chapters
 
 
 class SentencePair(BaseModel):
@@ -30,7 +31,13 @@ class TranslateChapterResponse(BaseModel):
 
 class ChapterListItem(BaseModel):
     id: uuid.UUID
-    title: Optional[dict] = None
+    title: Optional[Union[dict, str]] = None  # translated string with title_only
+    order: Optional[int] = None
+
+
+class ChapterTocItem(BaseModel):
+    id: uuid.UUID
+    title: Optional[str] = None  # translated title only
     order: Optional[int] = None
 
 
@@ -43,3 +50,10 @@ class ChapterDetailResponse(BaseModel):
     raw_paragraphs: list[str] = []
     prev_order: Optional[int] = None
     next_order: Optional[int] = None
+
+
+class ChapterParagraphsResponse(BaseModel):
+    start: int
+    total: int  # paragraphs in the whole chapter
+    paragraphs: Optional[list[str]] = None
+    raw_paragraphs: Optional[list[str]] = None
@@ -20,3 +20,18 @@ class ExtractGlossaryResponse(BaseModel):
     glossaries: list[GlossaryItemSchema]
     chapter_id: Optional[uuid.UUID] = None
 
+
+class RenameGlossaryRequest(BaseModel):
+    terms: list[GlossaryItemSchema]
+
+
+class GlossaryRename(BaseModel):
+    raw: str
+    type: str
+    old: str
+    translated: str
+
+
+class RenameGlossaryResponse(BaseModel):
+    renamed: list[GlossaryRename]
+    job_id: Optional[uuid.UUID] = None
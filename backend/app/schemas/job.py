@@ -0,0 +1,19 @@
+import uuid
+
+from pydantic import BaseModel
+from typing import Any, Optional
+from datetime import datetime
+
+
+class JobResponse(BaseModel):
+    id: uuid.UUID
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    result: Optional[Any] = None
+    book_id: Optional[uuid.UUID] = None
+    chapter_id: Optional[uuid.UUID] = None
+    created_date: datetime
+    updated_date: datetime
@@ -0,0 +1,23 @@
+import uuid
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.glossary import GlossaryItemSchema
+
+
+class SearchHit(BaseModel):
+    chapter_id: uuid.UUID
+    order: int
+    paragraph: int
+    raw: str
+    translated: str
+    highlight: str  # the searched side, with <mark> around matches
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    side: str
+    hits: list[SearchHit]
+    glossary: list[GlossaryItemSchema]
+    next_offset: Optional[int] = None
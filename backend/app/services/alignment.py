@@ -0,0 +1,162 @@
+import math
+import re
+from typing import Optional
+
+# A paragraph without any CJK ideograph is a watermark/URL slot the model should leave empty
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]")
+_DIGITS_RE = re.compile(r"\d+")
+_FULLWIDTH_DIGITS = str.maketrans("０１２３４５６７８９", "0123456789")
+
+# (source marks, translation marks): a paragraph with one should pair with one with the other
+_PUNCTUATION_ANCHORS = (
+    ("？?", "?"),
+    ("！!", "!"),
+    ("“”「」『』\"", "“”\"'«»"),
+)
+
+_GAP_COST = 2.0  # a paragraph with no counterpart (dropped or extra)
+_EMPTY_COST = 3.5  # empty translation for a story paragraph
+_FLAG_COST = 3.0  # matched pairs costlier than this are re-translated
+_ANCHOR_COST = 0.75  # per missing punctuation or glossary anchor
+_NUMBER_COST = 1.5  # per number missing on either side, capped at two
+_MERGE_COST = 1.0  # extra cost of a two-to-one move, so plain matches win ties
+_BAND = 8  # slack around the diagonal explored beyond the count difference
+
+
+def is_watermark(raw: str) -> bool:
+    return _CJK_RE.search(raw) is None
+
+
+class _Paragraph:
+    __slots__ = ("length", "numbers", "marks", "terms", "watermark")
+
+    def __init__(self, text: str, marks: tuple[str, ...], terms: list[str], watermark: bool):
+        self.length = len(text.strip())
+        self.numbers = frozenset(_DIGITS_RE.findall(text.translate(_FULLWIDTH_DIGITS)))
+        self.marks = tuple(any(ch in text for ch in chars) for chars in marks)
+        self.terms = terms
+        self.watermark = watermark
+
+
+class _Side:
+    """Features of every paragraph on one side, and of every adjacent pair joined."""
+
+    def __init__(self, texts: list[str], marks: tuple[str, ...], terms: Optional[list[dict]]):
+        joined = [a + " " + b for a, b in zip(texts, texts[1:])]
+        self.single = [self._paragraph(t, marks, terms) for t in texts]
+        # pair[k] covers texts[k] and texts[k + 1]
+        self.pair = [self._paragraph(t, marks, terms) for t in joined]
+        # Lowered text, for glossary lookups on the translation side
+        self.single_text = [t.lower() for t in texts] if terms is None else []
+        self.pair_text = [t.lower() for t in joined] if terms is None else []
+
+    @staticmethod
+    def _paragraph(text: str, marks: tuple[str, ...], terms: Optional[list[dict]]) -> _Paragraph:
+        if terms is None:
+            return _Paragraph(text, marks, [], False)
+        found = [g["translated"].lower() for g in terms if g["raw"] in text]
+        return _Paragraph(text, marks, found, is_watermark(text))
+
+
+def _log_ratio(sources: list[_Paragraph], targets: list[_Paragraph]) -> float:
+    # Expected translation/source length ratio for this chapter, from the totals
+    source = sum(p.length for p in sources if not p.watermark) + 1
+    target = sum(p.length for p in targets) + 1
+    return math.log(target / source)
+
+
+def _pair_cost(source: _Paragraph, target: _Paragraph, target_text: str, log_ratio: float) -> float:
+    if source.watermark:
+        return 0.0 if target.length == 0 else 0.5
+    if target.length == 0:
+        return _EMPTY_COST
+    cost = abs(math.log((target.length + 1) / (source.length + 1)) - log_ratio)
+    missing_numbers = len(source.numbers ^ target.numbers)
+    cost += _NUMBER_COST * min(missing_numbers, 2)
+    cost += _ANCHOR_COST * sum(s != t for s, t in zip(source.marks, target.marks))
+    cost += _ANCHOR_COST * sum(term not in target_text for term in source.terms)
+    return cost
+
+
+def align(
+    raw: list[str], translated: list[str], glossary: Optional[list[dict]] = None
+) -> list[Optional[str]]:
+    """Assign translations to source paragraphs, one slot per source paragraph.
+
+    Dynamic programming over match, dropped, extra, merged (two source
+    paragraphs in one translation) and split moves. A pair costs
+    more the further its length ratio strays from the chapter's and for each
+    number, punctuation anchor (questions, exclamations, dialogue quotes) or
+    glossary term present on only one side. Watermark paragraphs are expected
+    to map to "". Slots are None where a paragraph was dropped, or where the
+    best counterpart is too poor to trust (typically around a shift).
+    """
+    n, m = len(raw), len(translated)
+    if n == 0:
+        return []
+    if m == 0:
+        return [None] * n
+    terms = [g for g in glossary or [] if g.get("raw") and g.get("translated")]
+    src = _Side(raw, tuple(source for source, _ in _PUNCTUATION_ANCHORS), terms)
+    dst = _Side(translated, tuple(target for _, target in _PUNCTUATION_ANCHORS), None)
+    log_ratio = _log_ratio(src.single, dst.single)
+    band = abs(n - m) + _BAND
+
+    def match(i: int, j: int) -> float:  # raw[i-1] <-> translated[j-1]
+        return _pair_cost(src.single[i - 1], dst.single[j - 1], dst.single_text[j - 1], log_ratio)
+
+    def merged(i: int, j: int) -> float:  # raw[i-2:i] <-> translated[j-1], the model merged two
+        return _pair_cost(src.pair[i - 2], dst.single[j - 1], dst.single_text[j - 1], log_ratio) + _MERGE_COST
+
+    def split(i: int, j: int) -> float:  # raw[i-1] <-> translated[j-2:j], the model split one
+        return _pair_cost(src.single[i - 1], dst.pair[j - 2], dst.pair_text[j - 2], log_ratio) + _MERGE_COST
+
+    inf = float("inf")
+    # cost[i][j]: best cost aligning raw[:i] with translated[:j]; move[i][j] how we got there
+    cost = [[inf] * (m + 1) for _ in range(n + 1)]
+    move = [[0] * (m + 1) for _ in range(n + 1)]
+    cost[0][0] = 0.0
+    for i in range(n + 1):
+        lo, hi = max(0, i - band), min(m, i + band)
+        row, prev = cost[i], cost[i - 1] if i else None
+        for j in range(lo, hi + 1):
+            if i == 0 and j == 0:
+                continue
+            best, how = inf, 0
+            if i and j and prev[j - 1] < inf:
+                best, how = prev[j - 1] + match(i, j), 1
+            if i and prev[j] + _GAP_COST < best:
+                best, how = prev[j] + _GAP_COST, 2  # raw[i-1] has no translation
+            if j and row[j - 1] + _GAP_COST < best:
+                best, how = row[j - 1] + _GAP_COST, 3  # translated[j-1] matches nothing
+            if i > 1 and j and cost[i - 2][j - 1] < best:
+                c = cost[i - 2][j - 1] + merged(i, j)
+                if c < best:
+                    best, how = c, 4
+            if i and j > 1 and prev[j - 2] < best:
+                c = prev[j - 2] + split(i, j)
+                if c < best:
+                    best, how = c, 5
+            row[j] = best
+            move[i][j] = how
+
+    slots: list[Optional[str]] = [None] * n
+    i, j = n, m
+    while i or j:
+        how = move[i][j]
+        if how == 1:
+            if match(i, j) <= _FLAG_COST:
+                slots[i - 1] = translated[j - 1]
+            i, j = i - 1, j - 1
+        elif how == 2:
+            i -= 1
+        elif how == 3:
+            j -= 1
+        elif how == 4:
+            # A merged translation cannot be cut back apart; both are re-translated
+            i, j = i - 2, j - 1
+        else:
+            if split(i, j) <= _FLAG_COST:
+                slots[i - 1] = translated[j - 2] + " " + translated[j - 1]
+            i, j = i - 1, j - 2
+    return slots
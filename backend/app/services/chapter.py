@@ -1,157 +1,482 @@
+import asyncio
 import json
-import re
 import logging
+import time
 import uuid
-from typing import Optional
-
-from sqlmodel import Session
-
-from app.core.llm import invoke_llm
-from app.prompts.translate_chapter import build_translate_chapter_prompt
-from app.repositories import glossary as glossary_repo
-from app.repositories import chapter as chapter_repo
+from typing import AsyncIterator, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core import context_cache, json_extract, metrics, segmenter, tracing
+from app.core.llm import billed_to, invoke_llm, stream_llm, estimate_tokens
+from app.models.chapter import Chapter, ChapterStatus, is_translation_error, translation_error
+from app.prompts.chapter_metadata import CHAPTER_METADATA_PROMPT
+from app.prompts.translate_chapter import (
+    build_translate_chapter_prompt,
+    build_translate_window_prompt,
+)
+from app.repositories.aio import chapter as chapter_repo
 from app.schemas.chapter import SentencePair, ChapterTitle
+from app.services import alignment, glossary_index, reader, translation_cache
 
 logger = logging.getLogger(__name__)
 
-
-def _extract_text_content(content) -> str:
-    """Extract text from LangChain response content (can be str or list of blocks)."""
-    if isinstance(content, str):
-        return content
-    if isinstance(content, list):
-        return "\n".join(
-            block["text"] for block in content
-            if isinstance(block, dict) and block.get("type") == "text"
-        )
-    return str(content)
+stream_first_paragraph_seconds = metrics.histogram(
+    "translate_stream_first_paragraph_seconds",
+    "Time from request to the first streamed paragraph",
+)
+stream_total_seconds = metrics.histogram(
+    "translate_stream_total_seconds",
+    "Time from request to the end of a streamed translation",
+)
+alignment_checks = metrics.counter(
+    "translation_alignment_total",
+    "Translation responses checked for paragraph alignment, by mode (chapter, window) "
+    "and outcome (aligned, repaired, failed)",
+)
+paragraphs_repaired = metrics.counter(
+    "translation_paragraphs_repaired_total",
+    "Paragraphs re-translated because the response dropped or misaligned them",
+)
 
 
 def _split_into_paragraphs(text: str) -> list[str]:
-    cleaned = text.strip()
-    paragraphs = [p.strip() for p in cleaned.split("\n") if p.strip()]
-
-    result: list[str] = []
-    for para in paragraphs:
-        if len(para) <= 200:
-            result.append(para)
-        else:
-            # Split by Chinese punctuation
-            sentences = re.split(r"([。！？；]+)", para)
-            sentences = [s for s in sentences if s.strip()]
-            current_chunk = ""
-
-            for part in sentences:
-                current_chunk += part
-                if re.search(r"[。！？；]", part) and len(current_chunk) > 150:
-                    result.append(current_chunk.strip())
-                    current_chunk = ""
-
-            if current_chunk.strip():
-                result.append(current_chunk.strip())
-
-    return result
+    return list(segmenter.iter_paragraphs(text))
 
 
 def _parse_translation_response(response: str) -> dict:
     """Parse LLM response into a dict with translations, summary, title_raw, title_translated, order."""
+    parsed = json_extract.extract_json(response)
+    if isinstance(parsed, dict):
+        return parsed
+    if isinstance(parsed, list):
+        # Window responses are a plain array of paragraphs
+        return {"translations": parsed}
+    logger.error(f"Failed to parse translation response JSON, preview: {response[:500]}")
+    return {}
+
+
+def _build_windows(
+    paragraphs: list[str], max_tokens: int
+) -> list[tuple[int, int]]:
+    """Group paragraphs into [start, end) windows of at most max_tokens estimated tokens."""
+    windows: list[tuple[int, int]] = []
+    start = 0
+    budget = 0
+    for i, para in enumerate(paragraphs):
+        tokens = estimate_tokens(para)
+        if i > start and budget + tokens > max_tokens:
+            windows.append((start, i))
+            start = i
+            budget = 0
+        budget += tokens
+    if start < len(paragraphs):
+        windows.append((start, len(paragraphs)))
+    return windows
+
+
+async def _translate_window(
+    paragraphs: list[str],
+    indices: list[int],
+    glossary: Optional[list[dict]],
+    semaphore: asyncio.Semaphore,
+    cache_tag: Optional[str] = None,
+    repair: bool = True,
+) -> list[str]:
+    """Translate the paragraphs at indices, retrying only this window on failure.
+
+    With a cache_tag the glossary is sent whole, so every window shares one
+    cached prompt; otherwise it is narrowed to the window's terms. A response
+    with the wrong paragraph count is aligned, and only the paragraphs it
+    dropped or misplaced are translated again.
+    """
+    window = [paragraphs[i] for i in indices]
+    window_glossary = glossary
+    if glossary and cache_tag is None:
+        window_text = "\n".join(window)
+        window_glossary = [g for g in glossary if g["raw"] in window_text]
+    first = indices[0]
+    payload = {
+        "context": paragraphs[max(0, first - settings.TRANSLATE_WINDOW_OVERLAP) : first],
+        "paragraphs": window,
+    }
+    with tracing.stage("translate", "prompt"):
+        messages = [
+            ("system", build_translate_window_prompt(window_glossary)),
+            ("human", json.dumps(payload, ensure_ascii=False)),
+        ]
+
+    label = f"[{first}, {indices[-1] + 1})"
+    attempts = settings.TRANSLATE_WINDOW_RETRIES + 1
+    for attempt in range(1, attempts + 1):
+        try:
+            async with semaphore:
+                with tracing.stage("translate", "llm"):
+                    result = await invoke_llm(messages, cache_tag=cache_tag)
+            with tracing.stage("translate", "parse"):
+                text_content = json_extract.text_content(result.content)
+                translations = _parse_translation_response(text_content).get("translations", [])
+                translations = [t if isinstance(t, str) else str(t) for t in translations]
+            if len(translations) == len(window):
+                return translations
+            if repair and translations and settings.TRANSLATE_REPAIR_ENABLED:
+                with tracing.stage("translate", "align"):
+                    slots = alignment.align(window, translations, window_glossary)
+                if any(t is not None for t in slots):
+                    return await _repair_slots(
+                        paragraphs, indices, slots, glossary, semaphore, cache_tag, "window"
+                    )
+            logger.warning(
+                f"Window {label} returned {len(translations)}/{len(window)} "
+                f"paragraphs (attempt {attempt}/{attempts})"
+            )
+        except Exception as e:
+            logger.warning(f"Window {label} failed (attempt {attempt}/{attempts}): {e}")
+
+    logger.error(f"Window {label} failed after {attempts} attempts")
+    return [translation_error(i) for i in indices]
+
+
+async def _repair_slots(
+    paragraphs: list[str],
+    indices: list[int],
+    slots: list[Optional[str]],
+    glossary: Optional[list[dict]],
+    semaphore: asyncio.Semaphore,
+    cache_tag: Optional[str],
+    mode: str,
+) -> list[str]:
+    """Fill the empty slots (paragraphs[indices[k]] for slots[k] None) with a follow-up call."""
+    missing = [k for k, t in enumerate(slots) if t is None]
+    if not missing:
+        alignment_checks.inc(mode=mode, outcome="aligned")
+        return slots
+    logger.info(f"Alignment: re-translating {len(missing)}/{len(slots)} paragraphs ({mode})")
+    targets = [indices[k] for k in missing]
+    windows = _build_windows([paragraphs[i] for i in targets], settings.TRANSLATE_WINDOW_TOKENS)
+    chunks = await asyncio.gather(
+        *(
+            _translate_window(paragraphs, targets[start:end], glossary, semaphore, cache_tag, repair=False)
+            for start, end in windows
+        )
+    )
+    filled = list(slots)
+    for (start, end), chunk in zip(windows, chunks):
+        for k, translated in zip(missing[start:end], chunk):
+            filled[k] = translated
+    failed = sum(is_translation_error(filled[k]) for k in missing)
+    paragraphs_repaired.inc(len(missing) - failed)
+    alignment_checks.inc(mode=mode, outcome="failed" if failed else "repaired")
+    return filled
+
+
+async def _realign_chapter(
+    parsed: dict,
+    raw_paragraphs: list[str],
+    glossary: Optional[list[dict]],
+    prompt_glossary: Optional[list[dict]],
+    cache_tag: Optional[str],
+) -> dict:
+    """Check a single-call response against its paragraphs and repair only the gaps.
+
+    glossary (the chapter's terms) anchors the alignment; prompt_glossary and
+    cache_tag are reused for the follow-up call.
+    """
+    content = _content_paragraphs(raw_paragraphs, parsed.get("title_raw"))
+    translations = [t if isinstance(t, str) else str(t) for t in parsed.get("translations") or []]
+    if not content:
+        return parsed
+    if len(translations) == len(content) and all(t.strip() for t in translations):
+        # Anchors can disagree on a correct pair (第三章 vs "Chương 3"); a full response is trusted
+        alignment_checks.inc(mode="chapter", outcome="aligned")
+        return {**parsed, "translations": translations}
+    with tracing.stage("translate", "align"):
+        slots = alignment.align(content, translations, glossary)
+    if len(translations) != len(content) or any(t is None for t in slots):
+        logger.warning(f"Response has {len(translations)} translations for {len(content)} paragraphs")
+    semaphore = asyncio.Semaphore(settings.TRANSLATE_CONCURRENCY)
+    filled = await _repair_slots(
+        content, list(range(len(content))), slots, prompt_glossary, semaphore, cache_tag, "chapter"
+    )
+    return {**parsed, "translations": filled}
+
+
+def _content_paragraphs(raw_paragraphs: list[str], title_raw: Optional[str]) -> list[str]:
+    # The title line is extracted separately and excluded from translations
+    if not title_raw:
+        return raw_paragraphs
+    return [p for p in raw_paragraphs if p.strip() != title_raw.strip()]
+
+
+async def _extract_chapter_metadata(raw_paragraphs: list[str]) -> dict:
+    """Extract title, order and summary in a separate call (no paragraph translation)."""
+    messages = [
+        ("system", CHAPTER_METADATA_PROMPT),
+        ("human", json.dumps(raw_paragraphs, ensure_ascii=False)),
+    ]
     try:
-        # Try to find JSON object: {"translations": [...], "summary": "...", ...}
-        obj_start = response.find("{")
-        if obj_start != -1:
-            depth = 0
-            obj_end = -1
-            for i in range(obj_start, len(response)):
-                if response[i] == "{":
-                    depth += 1
-                elif response[i] == "}":
-                    depth -= 1
-                    if depth == 0:
-                        obj_end = i
-                        break
-
-            if obj_end != -1:
-                json_str = response[obj_start : obj_end + 1]
-                json_str = re.sub(r",\s*]", "]", json_str)
-                json_str = re.sub(r",\s*}", "}", json_str)
-                parsed = json.loads(json_str)
-                if isinstance(parsed, dict):
-                    return parsed
-
-        # Fallback: try to find a plain JSON array
-        arr_start = response.find("[")
-        if arr_start == -1:
-            return {}
-
-        depth = 0
-        arr_end = -1
-        for i in range(arr_start, len(response)):
-            if response[i] == "[":
-                depth += 1
-            elif response[i] == "]":
-                depth -= 1
-                if depth == 0:
-                    arr_end = i
-                    break
-
-        if arr_end == -1:
-            return {}
-
-        json_str = response[arr_start : arr_end + 1]
-        json_str = re.sub(r",\s*]", "]", json_str)
-        parsed = json.loads(json_str)
-        return {"translations": parsed if isinstance(parsed, list) else []}
+        with tracing.stage("translate", "llm"):
+            result = await invoke_llm(messages, cache_tag=context_cache.STATIC_TAG)
     except Exception as e:
-        logger.error(f"Failed to parse translation response JSON: {e}")
-        logger.error(f"Response preview: {response[:500]}")
+        logger.error(f"Chapter metadata extraction failed: {e}")
         return {}
+    with tracing.stage("translate", "parse"):
+        return _parse_translation_response(json_extract.text_content(result.content))
+
+
+async def _translate_single(
+    raw_paragraphs: list[str], glossary: Optional[list[dict]], cache_tag: Optional[str] = None
+) -> dict:
+    with tracing.stage("translate", "prompt"):
+        system_prompt = build_translate_chapter_prompt(glossary)
+
+        messages = [
+            ("system", system_prompt),
+            ("human", json.dumps(raw_paragraphs, ensure_ascii=False)),
+        ]
+
+    with tracing.stage("translate", "llm"):
+        result = await invoke_llm(messages, cache_tag=cache_tag)
+    with tracing.stage("translate", "parse"):
+        text_content = json_extract.text_content(result.content)
+        return _parse_translation_response(text_content)
+
+
+async def _translate_chunked(
+    raw_paragraphs: list[str],
+    glossary: Optional[list[dict]],
+    cached: Optional[list[Optional[str]]] = None,
+    cache_tag: Optional[str] = None,
+) -> dict:
+    """Translate windows concurrently while title/order/summary run as their own call.
+
+    Paragraphs with a cached translation are not sent to the model, and
+    neither is the opening paragraph, which the metadata call translates as
+    the title; only if the title turns out to be elsewhere is it translated
+    afterwards. Returns the same shape as the single-call response, so
+    translations exclude the title paragraph.
+    """
+    translations = list(cached) if cached else [None] * len(raw_paragraphs)
+    missing = [i for i, t in enumerate(translations) if t is None and i > 0]
+    windows = _build_windows([raw_paragraphs[i] for i in missing], settings.TRANSLATE_WINDOW_TOKENS)
+    semaphore = asyncio.Semaphore(settings.TRANSLATE_CONCURRENCY)
+    logger.info(
+        f"Chunked translation: {len(missing)}/{len(raw_paragraphs)} paragraphs in {len(windows)} windows "
+        f"(concurrency={settings.TRANSLATE_CONCURRENCY})"
+    )
+
+    metadata, *window_results = await asyncio.gather(
+        _extract_chapter_metadata(raw_paragraphs),
+        *(
+            _translate_window(raw_paragraphs, missing[start:end], glossary, semaphore, cache_tag)
+            for start, end in windows
+        ),
+    )
+
+    for (start, end), chunk in zip(windows, window_results):
+        for i, translated in zip(missing[start:end], chunk):
+            translations[i] = translated
+    title_raw = (metadata.get("title_raw") or "").strip()
+    if translations and translations[0] is None and raw_paragraphs[0].strip() != title_raw:
+        # The chapter does not open with its title
+        translations[:1] = await _translate_window(raw_paragraphs, [0], glossary, semaphore, cache_tag)
+    if title_raw:
+        translations = [
+            t for raw, t in zip(raw_paragraphs, translations) if raw.strip() != title_raw
+        ]
+
+    return {**metadata, "translations": translations}
 
 
 DEFAULT_BOOK_ID = uuid.UUID("7d274da0-2b6e-4571-b575-ffb4227c8181")
 
 
+async def set_status(
+    session: AsyncSession, chapter_id: uuid.UUID, status: ChapterStatus
+) -> Optional[Chapter]:
+    """Move a chapter to a new status; None if it does not exist.
+
+    Readers only see translated chapters, so any change drops the book's
+    cached reader data.
+    """
+    chapter = await chapter_repo.get_by_id(session, chapter_id)
+    if chapter is None:
+        return None
+    previous = chapter.status
+    chapter = await chapter_repo.set_status(session, chapter_id, status)
+    if chapter is not None and chapter.status != previous:
+        reader.chapter_written(chapter.book_id)
+    return chapter
+
+
 async def translate_chapter(
-    session: Session,
+    session: AsyncSession,
     text: str,
     book_id: Optional[uuid.UUID] = None,
     chapter_id: Optional[uuid.UUID] = None,
+    chunked: Optional[bool] = None,
+    order: Optional[int] = None,
 ) -> dict:
+    """Translate a chapter and persist it.
+
+    chunked=None picks chunked mode automatically for long chapters. An
+    explicit order (bulk ingestion) takes precedence over the LLM's.
+    """
     if book_id is None:
         book_id = DEFAULT_BOOK_ID
-    raw_paragraphs = _split_into_paragraphs(text)
-
-    logger.info(f"Split into {len(raw_paragraphs)} paragraphs")
-
-    # Load glossary from DB if book_id provided
-    glossary = None
-    if book_id is not None:
-        glossary_items = glossary_repo.get_all(session, book_id)
-        if glossary_items:
-            glossary = [
-                {"raw": g.raw, "translated": g.translated, "type": g.type}
-                for g in glossary_items
-            ]
-            logger.info(f"Loaded {len(glossary)} glossary items for book {book_id}")
-
-    system_prompt = build_translate_chapter_prompt(glossary)
-
-    messages = [
-        ("system", system_prompt),
-        ("human", json.dumps(raw_paragraphs, ensure_ascii=False)),
-    ]
-
-    result = await invoke_llm(messages)
-    text_content = _extract_text_content(result.content)
-    parsed = _parse_translation_response(text_content)
+    with billed_to(book_id), tracing.span("translate.chapter", book_id=book_id, chapter_id=chapter_id):
+        with tracing.stage("translate", "segment"):
+            raw_paragraphs = _split_into_paragraphs(text)
+
+        logger.info(f"Split into {len(raw_paragraphs)} paragraphs")
+
+        # Load only the glossary terms that actually occur in this chapter
+        with tracing.stage("translate", "glossary"):
+            glossary = None
+            if book_id is not None:
+                glossary = await glossary_index.get_relevant_terms(session, book_id, text) or None
+            prompt_glossary, cache_tag = await glossary_index.get_prompt_glossary(session, book_id, glossary)
+
+        cached = None
+        if settings.TRANSLATION_CACHE_ENABLED:
+            with tracing.stage("translate", "cache_lookup"):
+                cached = await translation_cache.lookup(session, raw_paragraphs, glossary)
+            if not any(t is not None for t in cached):
+                cached = None
+
+        if chunked is None:
+            chunked = len(text) > settings.TRANSLATE_CHUNK_THRESHOLD_CHARS
+        aligned = True
+        if chunked or cached:
+            # Cache hits need per-paragraph translation, which only the chunked path does
+            parsed = await _translate_chunked(raw_paragraphs, prompt_glossary, cached, cache_tag)
+        else:
+            parsed = await _translate_single(raw_paragraphs, prompt_glossary, cache_tag)
+            if settings.TRANSLATE_REPAIR_ENABLED:
+                parsed = await _realign_chapter(parsed, raw_paragraphs, glossary, prompt_glossary, cache_tag)
+            else:
+                aligned = _counts_match(parsed, raw_paragraphs)
+
+        with tracing.stage("translate", "db_write"):
+            result = await _save_translation(session, parsed, raw_paragraphs, book_id, chapter_id, order)
+
+            if settings.TRANSLATION_CACHE_ENABLED:
+                hits = {raw for raw, t in zip(raw_paragraphs, cached or []) if t is not None}
+                await _cache_translations(session, book_id, result, glossary, hits, aligned)
+        return result
+
+
+async def retranslate_paragraphs(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    chapter_id: uuid.UUID,
+    indices: list[int],
+) -> dict[int, str]:
+    """Translate the given paragraphs of a stored chapter again and save them in place.
+
+    Windows get the neighbouring raw paragraphs as context, like a chunked
+    translation. Paragraphs whose retry fails keep their old translation.
+    Returns the new translations by index.
+    """
+    chapter = await chapter_repo.get_by_id(session, chapter_id)
+    if chapter is None or not chapter.paragraphs:
+        return {}
+    raw_paragraphs = [p.get("raw") or "" for p in chapter.paragraphs]
+    indices = sorted({i for i in indices if 0 <= i < len(raw_paragraphs)})
+    if not indices:
+        return {}
+    with billed_to(book_id), tracing.span(
+        "translate.paragraphs", book_id=book_id, chapter_id=chapter_id, paragraphs=len(indices)
+    ):
+        with tracing.stage("translate", "glossary"):
+            text = "\n".join(raw_paragraphs[i] for i in indices)
+            glossary = await glossary_index.get_relevant_terms(session, book_id, text) or None
+            prompt_glossary, cache_tag = await glossary_index.get_prompt_glossary(session, book_id, glossary)
+
+        windows = _build_windows([raw_paragraphs[i] for i in indices], settings.TRANSLATE_WINDOW_TOKENS)
+        semaphore = asyncio.Semaphore(settings.TRANSLATE_CONCURRENCY)
+        chunks = await asyncio.gather(
+            *(
+                _translate_window(raw_paragraphs, indices[start:end], prompt_glossary, semaphore, cache_tag)
+                for start, end in windows
+            )
+        )
+        translations = {
+            i: translated
+            for (start, end), chunk in zip(windows, chunks)
+            for i, translated in zip(indices[start:end], chunk)
+            if not is_translation_error(translated)
+        }
+        if not translations:
+            return {}
 
+        with tracing.stage("translate", "db_write"):
+            await chapter_repo.set_paragraph_translations(session, chapter_id, translations)
+            reader.chapter_written(book_id)
+            if settings.TRANSLATION_CACHE_ENABLED:
+                pairs = [(raw_paragraphs[i], t) for i, t in translations.items()]
+                try:
+                    # Overwrites the cached translation the drifted paragraph came from
+                    await translation_cache.store(session, book_id, pairs, glossary)
+                except Exception as e:
+                    await session.rollback()
+                    logger.warning(f"Failed to store translation cache entries: {e}")
+        logger.info(f"Re-translated {len(translations)}/{len(indices)} paragraphs of chapter {chapter_id}")
+        return translations
+
+
+def _counts_match(parsed: dict, raw_paragraphs: list[str]) -> bool:
+    """Whether an unrepaired single-call response has one translation per paragraph."""
+    content = _content_paragraphs(raw_paragraphs, parsed.get("title_raw"))
+    return len(parsed.get("translations") or []) == len(content)
+
+
+async def _cache_translations(
+    session: AsyncSession,
+    book_id: Optional[uuid.UUID],
+    result: dict,
+    glossary: Optional[list[dict]],
+    hits: set[str] = frozenset(),
+    aligned: bool = True,
+) -> None:
+    """Cache a saved chapter's paragraphs; unless aligned, only its title.
+
+    Paragraphs are paired by position, so after a dropped or merged paragraph
+    every later pair is shifted and must not outlive this chapter.
+    """
+    pairs = []
+    if aligned:
+        pairs = [(s.raw, s.translated) for s in result["sentences"] if s.raw not in hits]
+    else:
+        logger.info(f"Not caching the paragraphs of chapter {result['chapter_id']}: response was not aligned")
+    title = result["title"]
+    if title and title.raw and title.translated and title.raw not in hits:
+        pairs.append((title.raw, title.translated))
+    try:
+        await translation_cache.store(session, book_id, pairs, glossary)
+    except Exception as e:
+        # The chapter is already saved; a cache write failure must not fail the request
+        await session.rollback()
+        logger.warning(f"Failed to store translation cache entries: {e}")
+
+
+async def _save_translation(
+    session: AsyncSession,
+    parsed: dict,
+    raw_paragraphs: list[str],
+    book_id: Optional[uuid.UUID],
+    chapter_id: Optional[uuid.UUID],
+    order: Optional[int],
+) -> dict:
+    """Pair parsed translations with their raw paragraphs and persist the chapter."""
     translated_paragraphs = parsed.get("translations", [])
     summary = parsed.get("summary")
     title_raw = parsed.get("title_raw")
     title_translated = parsed.get("title_translated")
     order_from_llm = parsed.get("order")
 
-    # Remove the title line from raw_paragraphs (LLM excluded it from translations)
-    content_paragraphs = [p for p in raw_paragraphs if p.strip() != (title_raw or "").strip()] if title_raw else raw_paragraphs
+    content_paragraphs = _content_paragraphs(raw_paragraphs, title_raw)
 
     sentences = [
         SentencePair(
@@ -159,7 +484,7 @@ async def translate_chapter(
             translated=(
                 translated_paragraphs[i]
                 if i < len(translated_paragraphs)
-                else f"[Translation error: paragraph {i + 1}]"
+                else translation_error(i)
             ),
         )
         for i, raw in enumerate(content_paragraphs)
@@ -176,14 +501,17 @@ async def translate_chapter(
     # Persist to DB
     result_chapter_id = chapter_id
     if book_id is not None:
-        order = order_from_llm if isinstance(order_from_llm, int) and order_from_llm > 0 else chapter_repo.get_next_order(session, book_id)
-        order = order - 6 # Only for TCKV
+        if order is None:
+            # Held until the chapter is committed, so concurrent writers get distinct orders
+            await chapter_repo.lock_orders(session, book_id)
+            order = order_from_llm if isinstance(order_from_llm, int) and order_from_llm > 0 else await chapter_repo.get_next_order(session, book_id)
+            order = order - 6 # Only for TCKV
         paragraphs = [s.model_dump() for s in sentences]
         title_data = title.model_dump() if title else {"raw": "", "translated": ""}
 
         if chapter_id is not None:
             # Update existing placeholder chapter
-            chapter = chapter_repo.update_translation(
+            chapter = await chapter_repo.update_translation(
                 session=session,
                 chapter_id=chapter_id,
                 order=order,
@@ -196,7 +524,7 @@ async def translate_chapter(
                 logger.info(f"Updated placeholder chapter {chapter_id} (order={order}) for book {book_id}")
             else:
                 logger.warning(f"Chapter {chapter_id} not found, creating new one")
-                chapter = chapter_repo.create(
+                chapter = await chapter_repo.create(
                     session=session,
                     book_id=book_id,
                     order=order,
@@ -207,7 +535,7 @@ async def translate_chapter(
                 result_chapter_id = chapter.id
         else:
             # Create new chapter (no placeholder)
-            chapter = chapter_repo.create(
+            chapter = await chapter_repo.create(
                 session=session,
                 book_id=book_id,
                 order=order,
@@ -217,6 +545,7 @@ async def translate_chapter(
             )
             result_chapter_id = chapter.id
             logger.info(f"Saved chapter {result_chapter_id} (order={order}) for book {book_id}")
+        reader.chapter_written(book_id)
 
     return {
         "sentences": sentences,
@@ -226,3 +555,62 @@ async def translate_chapter(
         "summary": summary,
     }
 
+
+async def translate_chapter_stream(
+    session: AsyncSession,
+    text: str,
+    book_id: Optional[uuid.UUID] = None,
+    chapter_id: Optional[uuid.UUID] = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """Translate a chapter, yielding ("paragraph", ...) events as the model writes them.
+
+    A paragraph the stream cannot decode yields ("error", {"index": ...})
+    instead; the final parse still decides what gets stored. Yields a final ("done", result) event after the chapter is persisted
+    exactly as translate_chapter would persist it.
+    """
+    start = time.perf_counter()
+    if book_id is None:
+        book_id = DEFAULT_BOOK_ID
+    # No chapter span here: an active span cannot stay open across the yields
+    with billed_to(book_id):
+        with tracing.stage("translate", "segment"):
+            raw_paragraphs = _split_into_paragraphs(text)
+        with tracing.stage("translate", "glossary"):
+            glossary = await glossary_index.get_relevant_terms(session, book_id, text) or None
+            prompt_glossary, cache_tag = await glossary_index.get_prompt_glossary(session, book_id, glossary)
+
+        with tracing.stage("translate", "prompt"):
+            messages = [
+                ("system", build_translate_chapter_prompt(prompt_glossary)),
+                ("human", json.dumps(raw_paragraphs, ensure_ascii=False)),
+            ]
+
+        stream = json_extract.JsonArrayStream("translations")
+        # Includes the time the client takes to consume each paragraph
+        with tracing.stage("translate", "llm", current=False):
+            async for chunk in stream_llm(messages, cache_tag=cache_tag):
+                for index, translated in stream.feed(chunk):
+                    if index == 0:
+                        stream_first_paragraph_seconds.observe(time.perf_counter() - start)
+                    if translated is json_extract.MALFORMED:
+                        yield "error", {"index": index, "detail": "Malformed paragraph in the model output"}
+                        continue
+                    yield "paragraph", {
+                        "index": index,
+                        "translated": translated if isinstance(translated, str) else str(translated),
+                    }
+
+        with tracing.stage("translate", "parse"):
+            parsed = _parse_translation_response(stream.text)
+        aligned = True
+        if settings.TRANSLATE_REPAIR_ENABLED:
+            parsed = await _realign_chapter(parsed, raw_paragraphs, glossary, prompt_glossary, cache_tag)
+        else:
+            aligned = _counts_match(parsed, raw_paragraphs)
+        with tracing.stage("translate", "db_write"):
+            result = await _save_translation(session, parsed, raw_paragraphs, book_id, chapter_id, None)
+            if settings.TRANSLATION_CACHE_ENABLED:
+                await _cache_translations(session, book_id, result, glossary, aligned=aligned)
+    stream_total_seconds.observe(time.perf_counter() - start)
+    logger.info(f"Streamed {stream.count} paragraphs for chapter {result['chapter_id']}")
+    yield "done", result
@@ -0,0 +1,186 @@
+import bisect
+import logging
+import time
+import unicodedata
+import uuid
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics, tracing
+from app.core.config import settings
+from app.core.matcher import AhoCorasick, leftmost_longest
+from app.models.chapter import is_translation_error
+from app.models.job import Job
+from app.repositories.aio import chapter as chapter_repo
+from app.repositories.aio import job as job_repo
+from app.services import chapter as chapter_service
+from app.services import glossary_index
+from app.services import job as job_service
+
+logger = logging.getLogger(__name__)
+
+REPAIR_GLOSSARY_CONSISTENCY = "repair_glossary_consistency"
+
+consistency_violations = metrics.counter(
+    "glossary_consistency_violations_total",
+    "Glossary terms found untranslated by the consistency check, by where (check, after_repair)",
+)
+consistency_check_seconds = metrics.histogram(
+    "glossary_consistency_check_seconds", "Time to check every translated chapter of a book"
+)
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", text).casefold()
+
+
+def check_paragraphs(
+    matcher: AhoCorasick, forms: dict[str, list[str]], paragraphs: list[dict]
+) -> dict[int, dict[str, list[str]]]:
+    """Glossary terms whose translated form is missing, as {paragraph index: {raw: expected forms}}.
+
+    The raw side of the whole chapter goes through the matcher in one pass;
+    a term is satisfied when any of its translations (a raw can have one per
+    type) occurs in the paragraph's translation, ignoring case. Untranslated
+    and error placeholder paragraphs are skipped.
+    """
+    raws = [p.get("raw") or "" for p in paragraphs]
+    starts = []
+    offset = 0
+    for raw in raws:
+        starts.append(offset)
+        offset += len(raw) + 1
+    # Terms never contain a newline, so no match spans two paragraphs
+    matches = leftmost_longest(matcher.iter_matches("\n".join(raws)))
+
+    missing: dict[int, dict[str, list[str]]] = {}
+    translated_text: dict[int, Optional[str]] = {}
+    for start, _, (raw, _) in matches:
+        index = bisect.bisect_right(starts, start) - 1
+        if index not in translated_text:
+            translated = paragraphs[index].get("translated") or ""
+            ok = translated.strip() and not is_translation_error(translated)
+            translated_text[index] = _normalize(translated) if ok else None
+        text = translated_text[index]
+        if text is None or raw in missing.get(index, ()):
+            continue
+        expected = [form for form in forms.get(raw, ()) if form.strip()]
+        if expected and not any(_normalize(form) in text for form in expected):
+            missing.setdefault(index, {})[raw] = expected
+    return missing
+
+
+async def check_book(session: AsyncSession, book_id: uuid.UUID) -> dict:
+    """Check every translated chapter of a book against its glossary.
+
+    Chapters are read a page at a time in reading order. Returns counts, the
+    violations per chapter and a queue of the paragraphs to re-translate.
+    """
+    started = time.perf_counter()
+    report: dict = {
+        "chapters_checked": 0,
+        "paragraphs_checked": 0,
+        "violations": 0,
+        "chapters": [],
+        "queue": [],
+    }
+    with tracing.span("consistency.check", book_id=book_id) as current:
+        matcher, forms = await glossary_index.get_matcher(session, book_id)
+        if not forms:
+            return report
+        after = None
+        while True:
+            page = await chapter_repo.list_paragraphs_page(
+                session, book_id, after, settings.CONSISTENCY_PAGE_SIZE
+            )
+            if not page:
+                break
+            for chapter_id, order, paragraphs in page:
+                paragraphs = paragraphs or []
+                report["chapters_checked"] += 1
+                report["paragraphs_checked"] += len(paragraphs)
+                missing = check_paragraphs(matcher, forms, paragraphs)
+                if not missing:
+                    continue
+                violations = [
+                    {"paragraph": index, "raw": raw, "expected": expected}
+                    for index in sorted(missing)
+                    for raw, expected in missing[index].items()
+                ]
+                report["violations"] += len(violations)
+                report["chapters"].append({"chapter_id": chapter_id, "order": order, "violations": violations})
+                report["queue"].append({"chapter_id": chapter_id, "order": order, "paragraphs": sorted(missing)})
+            after = (page[-1][1], page[-1][0])
+
+        tracing.set_attributes(
+            current, chapters=report["chapters_checked"], violations=report["violations"]
+        )
+    elapsed = time.perf_counter() - started
+    consistency_violations.inc(report["violations"], where="check")
+    consistency_check_seconds.observe(elapsed)
+    logger.info(
+        f"Consistency check of book {book_id}: {report['violations']} violations in "
+        f"{len(report['chapters'])}/{report['chapters_checked']} chapters ({elapsed:.2f}s)"
+    )
+    return report
+
+
+async def submit_repair_job(
+    session: AsyncSession, book_id: uuid.UUID, queue: list[dict]
+) -> Optional[Job]:
+    """Queue re-translation of the paragraphs in a check report's queue (None if empty)."""
+    if not queue:
+        return None
+    job = await job_repo.create(
+        session,
+        kind=REPAIR_GLOSSARY_CONSISTENCY,
+        payload={
+            "chapters": [
+                {"chapter_id": str(item["chapter_id"]), "paragraphs": list(item["paragraphs"])}
+                for item in queue
+            ]
+        },
+        book_id=book_id,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    logger.info(f"Queued {job.kind} job {job.id} for {len(queue)} chapters of book {book_id}")
+    job_service.notify_new_job()
+    return job
+
+
+@job_service.register_handler(REPAIR_GLOSSARY_CONSISTENCY)
+async def _run_repair(session: AsyncSession, job: Job) -> dict:
+    """Re-translate queued paragraphs chapter by chapter.
+
+    Each chapter is checked again first and only paragraphs that still miss
+    a term are sent, so a retried job skips the chapters it already fixed.
+    """
+    book_id = job.book_id
+    progress = {"chapters": len(job.payload["chapters"]), "paragraphs": 0, "fixed": 0, "still_missing": 0}
+    for item in job.payload["chapters"]:
+        chapter_id = uuid.UUID(item["chapter_id"])
+        matcher, forms = await glossary_index.get_matcher(session, book_id)
+        chapter = await chapter_repo.get_by_id(session, chapter_id)
+        if chapter is None or not chapter.paragraphs:
+            continue
+        missing = check_paragraphs(matcher, forms, chapter.paragraphs)
+        indices = [i for i in item["paragraphs"] if i in missing]
+        if not indices:
+            continue
+        translations = await chapter_service.retranslate_paragraphs(session, book_id, chapter_id, indices)
+        progress["paragraphs"] += len(indices)
+        paragraphs = [
+            {**p, "translated": translations.get(i, p.get("translated"))}
+            for i, p in enumerate(chapter.paragraphs)
+        ]
+        still = check_paragraphs(matcher, forms, paragraphs)
+        unfixed = sum(i in still for i in indices)
+        progress["fixed"] += len(indices) - unfixed
+        progress["still_missing"] += unfixed
+        await job_repo.save_progress(session, job.id, dict(progress))
+    consistency_violations.inc(progress["still_missing"], where="after_repair")
+    logger.info(
+        f"Consistency repair job {job.id}: {progress['fixed']}/{progress['paragraphs']} paragraphs fixed"
+    )
+    return progress
@@ -0,0 +1,203 @@
+import hashlib
+import io
+import logging
+import os
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from html import escape
+from pathlib import Path
+from typing import AsyncIterator, Literal, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.book import Book
+from app.repositories.aio import chapter as chapter_repo
+
+logger = logging.getLogger(__name__)
+
+ExportFormat = Literal["epub", "txt"]
+
+MEDIA_TYPES = {"epub": "application/epub+zip", "txt": "text/plain; charset=utf-8"}
+
+export_requests = metrics.counter(
+    "book_export_requests_total", "Book exports by format and result (cached, built)"
+)
+
+
+class _ZipStream(io.RawIOBase):
+    """Seekable write target for ZipFile that hands out everything before the open entry.
+
+    ZipFile seeks back only to patch the header of the entry it is writing,
+    so bytes from earlier entries can be drained. Entries then get real local
+    headers (no data descriptors), which EPUB's uncompressed mimetype needs.
+    """
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._drained = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        return self._buffer.write(data)
+
+    def tell(self) -> int:
+        return self._drained + self._buffer.tell()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            offset -= self._drained
+        return self._drained + self._buffer.seek(offset, whence)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._drained += len(data)
+        self._buffer = io.BytesIO()
+        return data
+
+
+_CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+
+def _chapter_xhtml(title: str, paragraphs: list[str]) -> str:
+    body = "\n".join(f"<p>{escape(p)}</p>" for p in paragraphs if p.strip())
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="vi">\n'
+        f"<head><title>{escape(title)}</title></head>\n"
+        f"<body>\n<h2>{escape(title)}</h2>\n{body}\n</body>\n</html>\n"
+    )
+
+
+def _nav_xhtml(book: Book, chapters: list[tuple[str, str]]) -> str:
+    items = "\n".join(f'<li><a href="{name}">{escape(title)}</a></li>' for name, title in chapters)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="vi">\n'
+        f"<head><title>{escape(book.title)}</title></head>\n"
+        f'<body>\n<nav epub:type="toc"><h1>{escape(book.title)}</h1>\n<ol>\n{items}\n</ol></nav>\n'
+        "</body>\n</html>\n"
+    )
+
+
+def _content_opf(book: Book, chapters: list[tuple[str, str]]) -> str:
+    manifest = "\n".join(
+        f'<item id="c{i}" href="{name}" media-type="application/xhtml+xml"/>'
+        for i, (name, _) in enumerate(chapters)
+    )
+    spine = "\n".join(f'<itemref idref="c{i}"/>' for i in range(len(chapters)))
+    modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">\n'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+        f'<dc:identifier id="book-id">urn:uuid:{book.id}</dc:identifier>\n'
+        f"<dc:title>{escape(book.title)}</dc:title>\n"
+        f"<dc:creator>{escape(book.author)}</dc:creator>\n"
+        "<dc:language>vi</dc:language>\n"
+        f'<meta property="dcterms:modified">{modified}</meta>\n'
+        "</metadata>\n"
+        '<manifest>\n<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>\n'
+        f"{manifest}\n</manifest>\n"
+        f"<spine>\n{spine}\n</spine>\n"
+        "</package>\n"
+    )
+
+
+def _chapter_title(order: int, title: Optional[str]) -> str:
+    return title.strip() if title and title.strip() else f"Chương {order}"
+
+
+async def _epub(
+    session: AsyncSession, book: Book
+) -> AsyncIterator[bytes]:
+    stream = _ZipStream()
+    chapters: list[tuple[str, str]] = []  # (file name, title) for the nav and spine
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        archive.writestr("META-INF/container.xml", _CONTAINER_XML)
+        async for order, title, paragraphs in chapter_repo.stream_for_export(
+            session, book.id, settings.EXPORT_YIELD_PER
+        ):
+            name = f"chapter-{order:05d}.xhtml"
+            title = _chapter_title(order, title)
+            archive.writestr(f"OEBPS/{name}", _chapter_xhtml(title, paragraphs))
+            chapters.append((name, title))
+            yield stream.drain()
+        archive.writestr("OEBPS/nav.xhtml", _nav_xhtml(book, chapters))
+        archive.writestr("OEBPS/content.opf", _content_opf(book, chapters))
+    yield stream.drain()
+
+
+async def _txt(session: AsyncSession, book: Book) -> AsyncIterator[bytes]:
+    yield f"{book.title}\n{book.author}\n\n\n".encode()
+    async for order, title, paragraphs in chapter_repo.stream_for_export(
+        session, book.id, settings.EXPORT_YIELD_PER
+    ):
+        text = "\n\n".join(p for p in paragraphs if p.strip())
+        yield f"{_chapter_title(order, title)}\n\n{text}\n\n\n".encode()
+
+
+async def export_version(session: AsyncSession, book: Book) -> str:
+    """Tag of the book's current export: changes with the book row and any translated chapter."""
+    count, updated = await chapter_repo.get_export_version(session, book.id)
+    tag = f"{book.updated_date.isoformat()}:{count}:{updated.isoformat() if updated else ''}"
+    return hashlib.sha1(tag.encode()).hexdigest()[:16]
+
+
+def cached_path(book_id: uuid.UUID, format: ExportFormat, version: str) -> Optional[Path]:
+    """The cached artifact for this version of the book, if one was built."""
+    if not settings.EXPORT_CACHE_DIR:
+        return None
+    path = Path(settings.EXPORT_CACHE_DIR) / f"{book_id}-{version}.{format}"
+    return path if path.is_file() else None
+
+
+async def stream_export(
+    session: AsyncSession, book: Book, format: ExportFormat, version: str
+) -> AsyncIterator[bytes]:
+    """Build the export chapter by chapter, writing it to the cache as it is sent.
+
+    The artifact only becomes visible (atomic rename) once the whole book was
+    written; an interrupted download leaves nothing behind. Older versions of
+    the same export are removed.
+    """
+    chunks = _epub(session, book) if format == "epub" else _txt(session, book)
+    export_requests.inc(format=format, result="built")
+    if not settings.EXPORT_CACHE_DIR:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    directory = Path(settings.EXPORT_CACHE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    final = directory / f"{book.id}-{version}.{format}"
+    partial = directory / f".{final.name}.{uuid.uuid4().hex}.part"
+    try:
+        with open(partial, "wb") as out:
+            async for chunk in chunks:
+                out.write(chunk)
+                yield chunk
+        os.replace(partial, final)
+    finally:
+        partial.unlink(missing_ok=True)
+    for old in directory.glob(f"{book.id}-*.{format}"):
+        if old != final:
+            old.unlink(missing_ok=True)
+    logger.info(f"Exported book {book.id} as {format} ({final.stat().st_size} bytes), cached as {final.name}")
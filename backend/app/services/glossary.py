@@ -1,107 +1,152 @@
-import json
 import logging
 import uuid
 from typing import Optional
 
-from sqlmodel import Session
-
-from app.core.llm import invoke_llm
-from app.prompts.extract_glossary import EXTRACT_GLOSSARY_PROMPT
-from app.repositories import glossary as glossary_repo
-from app.repositories import chapter as chapter_repo
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import context_cache, json_extract, tracing
+from app.core.llm import billed_to, estimate_tokens, invoke_llm
+from app.prompts.extract_glossary import (
+    EXTRACT_GLOSSARY_BATCH_PROMPT,
+    EXTRACT_GLOSSARY_PROMPT,
+    build_extract_glossary_batch_input,
+)
+from app.repositories.aio import glossary as glossary_repo
+from app.repositories.aio import chapter as chapter_repo
 from app.schemas.glossary import GlossaryItemSchema
+from app.services import glossary_index
 
 logger = logging.getLogger(__name__)
 
 
-def _extract_text_content(content) -> str:
-    """Extract text from LangChain response content (can be str or list of blocks)."""
-    if isinstance(content, str):
-        return content
-    if isinstance(content, list):
-        return "\n".join(
-            block["text"] for block in content
-            if isinstance(block, dict) and block.get("type") == "text"
-        )
-    return str(content)
-
-
 def _parse_glossary_from_response(response: str) -> list[dict]:
-    try:
-        start = response.find("[")
-        if start == -1:
-            return []
-
-        depth = 0
-        end = -1
-        for i in range(start, len(response)):
-            if response[i] == "[":
-                depth += 1
-            elif response[i] == "]":
-                depth -= 1
-                if depth == 0:
-                    end = i
-                    break
-
-        if end == -1:
-            return []
-
-        json_str = response[start : end + 1]
-        # Remove trailing comma before closing bracket
-        import re
-        json_str = re.sub(r",\s*\]", "]", json_str)
-
-        parsed = json.loads(json_str)
-        return parsed if isinstance(parsed, list) else []
-    except Exception as e:
-        logger.error(f"Failed to parse glossary JSON: {e}")
-        logger.error(f"Response preview: {response[:500]}")
+    """Terms in the model's answer; items without string raw, translated and type are dropped."""
+    parsed = json_extract.extract_json(response, "[")
+    if parsed is None:
+        logger.error(f"Failed to parse glossary JSON, preview: {response[:500]}")
         return []
+    items = [
+        item
+        for item in parsed
+        if isinstance(item, dict) and all(isinstance(item.get(k), str) for k in ("raw", "translated", "type"))
+    ]
+    if len(items) < len(parsed):
+        logger.warning(f"Dropped {len(parsed) - len(items)} malformed glossary items")
+    return items
 
 
 async def extract_glossary(
-    session: Session,
+    session: AsyncSession,
     text: str,
     book_id: Optional[uuid.UUID] = None,
     first_chapter_id: Optional[uuid.UUID] = None,
 ) -> dict:
-    # Create a placeholder chapter if book_id is provided and no chapter_id yet
-    chapter_id = first_chapter_id
-    if book_id is not None and chapter_id is None:
-        placeholder = chapter_repo.create_placeholder(session, book_id)
-        chapter_id = placeholder.id
-        logger.info(f"Created placeholder chapter {chapter_id} for book {book_id}")
-
-    messages = [
-        ("system", EXTRACT_GLOSSARY_PROMPT),
-        ("human", f"Chapter raw:\n---\n{text}\n---"),
-    ]
-
-    result = await invoke_llm(messages)
-    text_content = _extract_text_content(result.content)
-    extracted_items = _parse_glossary_from_response(text_content)
-
-    if not extracted_items:
-        return {"glossaries": [], "chapter_id": chapter_id}
-
-    # Dedup against existing DB records
-    raw_values = [item["raw"] for item in extracted_items]
-    existing_items = glossary_repo.find_by_raw_values(session, raw_values, book_id)
-    existing_raw_set = {item.raw for item in existing_items}
-
-    new_items = [item for item in extracted_items if item["raw"] not in existing_raw_set]
-
-    if new_items:
-        saved_count = glossary_repo.create_many(session, new_items, book_id, chapter_id)
-        logger.info(f"Saved {saved_count} new glossary items (skipped {len(existing_raw_set)} existing)")
-
-    # Combine all glossaries
-    glossaries = [
-        GlossaryItemSchema(raw=item.raw, translated=item.translated, type=item.type)
-        for item in existing_items
-    ] + [
-        GlossaryItemSchema(**item) for item in new_items
-    ]
-
-    return {"glossaries": glossaries, "chapter_id": chapter_id}
-
+    with billed_to(book_id), tracing.span("extract.chapter", book_id=book_id):
+        # Create a placeholder chapter if book_id is provided and no chapter_id yet
+        chapter_id = first_chapter_id
+        if book_id is not None and chapter_id is None:
+            with tracing.stage("extract", "db_write"):
+                placeholder = await chapter_repo.create_placeholder(session, book_id)
+            chapter_id = placeholder.id
+            logger.info(f"Created placeholder chapter {chapter_id} for book {book_id}")
+
+        with tracing.stage("extract", "prompt"):
+            messages = [
+                ("system", EXTRACT_GLOSSARY_PROMPT),
+                ("human", f"Chapter raw:\n---\n{text}\n---"),
+            ]
+
+        with tracing.stage("extract", "llm"):
+            result = await invoke_llm(messages, cache_tag=context_cache.STATIC_TAG)
+        with tracing.stage("extract", "parse"):
+            text_content = json_extract.text_content(result.content)
+            extracted_items = _parse_glossary_from_response(text_content)
+
+        if not extracted_items:
+            return {"glossaries": [], "chapter_id": chapter_id}
+
+        # Dedup against existing DB records and insert the new terms in one statement
+        with tracing.stage("extract", "db_write"):
+            new_items, existing_items = await glossary_repo.create_missing(
+                session, extracted_items, book_id, chapter_id
+            )
+        if new_items:
+            glossary_index.add_terms(book_id, new_items)
+            logger.info(f"Saved {len(new_items)} new glossary items (skipped {len(existing_items)} existing)")
+
+        # Combine all glossaries
+        glossaries = [GlossaryItemSchema(**item) for item in existing_items + new_items]
+
+        return {"glossaries": glossaries, "chapter_id": chapter_id}
+
+
+def pack_chapters(
+    chapters: list[tuple[uuid.UUID, str]], max_tokens: int
+) -> list[list[tuple[uuid.UUID, str]]]:
+    """Group consecutive chapters into batches of at most max_tokens (estimated).
+
+    A chapter larger than the budget gets a batch of its own.
+    """
+    batches: list[list[tuple[uuid.UUID, str]]] = []
+    current: list[tuple[uuid.UUID, str]] = []
+    current_tokens = 0
+    for chapter_id, text in chapters:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > max_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((chapter_id, text))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def extract_glossary_batch(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    chapters: list[tuple[uuid.UUID, str]],
+) -> dict:
+    """Extract terms from several consecutive chapters with one LLM call.
+
+    Terms the book already has are listed in the request so the model skips
+    them. Each new term is attributed to the earliest chapter of the batch
+    that contains it.
+    """
+    with billed_to(book_id), tracing.span("extract.batch", book_id=book_id, chapters=len(chapters)):
+        texts = [text for _, text in chapters]
+        with tracing.stage("extract", "glossary"):
+            known = await glossary_index.find_known(session, book_id, "\n".join(texts))
+        with tracing.stage("extract", "prompt"):
+            messages = [
+                ("system", EXTRACT_GLOSSARY_BATCH_PROMPT),
+                ("human", build_extract_glossary_batch_input(texts, known)),
+            ]
+
+        with tracing.stage("extract", "llm"):
+            result = await invoke_llm(messages, cache_tag=context_cache.STATIC_TAG)
+        with tracing.stage("extract", "parse"):
+            extracted_items = _parse_glossary_from_response(json_extract.text_content(result.content))
+
+        known_set = set(known)
+        items = []
+        for item in extracted_items:
+            if item["raw"] in known_set:
+                continue
+            # Terms the model normalised so they match no chapter go to the first one
+            position = next((i for i, text in enumerate(texts) if item["raw"] in text), 0)
+            items.append((position, {**item, "first_chapter_id": chapters[position][0]}))
+        # Earliest chapter wins when the same raw was extracted more than once
+        items.sort(key=lambda pair: pair[0])
+
+        with tracing.stage("extract", "db_write"):
+            new_items, existing_items = await glossary_repo.create_missing(
+                session, [item for _, item in items], book_id
+            )
+        if new_items:
+            glossary_index.add_terms(book_id, new_items)
+        logger.info(
+            f"Batch extraction over {len(chapters)} chapters: {len(new_items)} new terms, "
+            f"{len(existing_items)} existing, {len(known)} known terms listed"
+        )
+        return {"glossaries": new_items, "chapters": len(chapters), "known": len(known)}
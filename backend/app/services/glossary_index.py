@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import context_cache, metrics
+from app.core.config import settings
+from app.core.database import connect_listener
+from app.core.llm import estimate_tokens
+from app.core.matcher import AhoCorasick
+from app.repositories.aio import glossary as glossary_repo
+
+logger = logging.getLogger(__name__)
+
+prompt_tokens_saved = metrics.histogram(
+    "glossary_prompt_tokens_saved",
+    "Glossary prompt tokens skipped per translate call by relevance filtering",
+    buckets=(0, 100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000),
+)
+glossary_terms_selected = metrics.histogram(
+    "glossary_terms_selected",
+    "Glossary terms included in a translate prompt",
+    buckets=(0, 10, 25, 50, 100, 250, 500, 1000),
+)
+glossary_refreshes = metrics.counter(
+    "glossary_index_refreshes_total", "Glossary index loads by kind (full, incremental)"
+)
+
+# Rows are re-read this far behind the high-water mark, so a transaction that
+# committed late with an older updated_date is still picked up
+_HIGH_WATER_OVERLAP = timedelta(seconds=30)
+
+
+def _term_line(raw: str, translated: str, type: str) -> str:
+    # Must match the line format used by build_translate_chapter_prompt
+    return f"{raw} → {translated} ({type})"
+
+
+def _line_tokens(raw: str, translated: str, type: str) -> int:
+    return estimate_tokens(_term_line(raw, translated, type)) + 1
+
+
+class _BookGlossary:
+    """Glossary terms of one book: (raw, type) -> translated, a type index and a matcher."""
+
+    def __init__(self, book_id: Optional[uuid.UUID] = None):
+        self.book_id = book_id
+        self.terms: dict[tuple[str, str], str] = {}
+        self.by_type: dict[str, list[str]] = {}
+        self.matcher = AhoCorasick()
+        self.prompt_tokens = 0
+        self.high_water: Optional[datetime] = None
+        self.stale = False
+        # Whole-glossary snapshot sent as a cached prompt prefix (see get_prompt_glossary)
+        self.prompt_snapshot: Optional[list[dict]] = None
+        self.prompt_snapshot_terms: dict[tuple[str, str], str] = {}
+
+    def add(self, raw: str, translated: str, type: str) -> None:
+        key = (raw, type)
+        current = self.terms.get(key)
+        if current == translated:
+            return
+        if current is None:
+            self.by_type.setdefault(type, []).append(raw)
+            self.matcher.add(raw, key)
+        else:
+            # Renamed translation: same matcher key, new prompt line
+            self.prompt_tokens -= _line_tokens(raw, current, type)
+            if key in self.prompt_snapshot_terms:
+                self.drop_prompt_snapshot()
+        self.terms[key] = translated
+        self.prompt_tokens += _line_tokens(raw, translated, type)
+
+    def drop_prompt_snapshot(self) -> None:
+        if self.prompt_snapshot is not None:
+            self.prompt_snapshot = None
+            self.prompt_snapshot_terms = {}
+            context_cache.evict(context_cache.book_tag(self.book_id))
+
+    def load(self, rows: list[tuple[str, str, str, datetime]]) -> None:
+        for raw, translated, type, updated_date in rows:
+            self.add(raw, translated, type)
+            if self.high_water is None or updated_date > self.high_water:
+                self.high_water = updated_date
+
+    def relevant(self, text: str) -> list[dict]:
+        keys = self.matcher.find_all(text)
+        # Keep glossary insertion order so prompts are stable across calls
+        return [
+            {"raw": raw, "translated": translated, "type": type}
+            for (raw, type), translated in self.terms.items()
+            if (raw, type) in keys
+        ]
+
+    def of_type(self, type: str) -> list[dict]:
+        return [
+            {"raw": raw, "translated": self.terms[(raw, type)], "type": type}
+            for raw in self.by_type.get(type, [])
+        ]
+
+
+_indexes: dict[Optional[uuid.UUID], _BookGlossary] = {}
+_lock = threading.Lock()
+
+
+async def _get_index(
+    session: AsyncSession, book_id: Optional[uuid.UUID]
+) -> _BookGlossary:
+    with _lock:
+        index = _indexes.get(book_id)
+    if index is not None:
+        if index.stale:
+            await _refresh(session, book_id, index)
+        return index
+
+    index = _BookGlossary(book_id)
+    index.load(await glossary_repo.get_updated_since(session, book_id))
+    glossary_refreshes.inc(kind="full")
+    logger.info(f"Built glossary index with {len(index.terms)} terms for book {book_id}")
+
+    with _lock:
+        # Another request may have built it concurrently; keep the first one
+        return _indexes.setdefault(book_id, index)
+
+
+async def _refresh(
+    session: AsyncSession, book_id: Optional[uuid.UUID], index: _BookGlossary
+) -> None:
+    """Apply terms created or changed since the index's high-water mark."""
+    index.stale = False
+    since = index.high_water - _HIGH_WATER_OVERLAP if index.high_water else None
+    rows = await glossary_repo.get_updated_since(session, book_id, since)
+    with _lock:
+        index.load(rows)
+    glossary_refreshes.inc(kind="incremental")
+    logger.info(f"Refreshed glossary index for book {book_id}: {len(rows)} rows since {since}")
+
+
+def add_terms(book_id: Optional[uuid.UUID], items: list[dict]) -> None:
+    """Incrementally add newly created terms to a cached index (if any)."""
+    with _lock:
+        index = _indexes.get(book_id)
+        if index is None:
+            return
+        for item in items:
+            index.add(item["raw"], item["translated"], item["type"])
+
+
+def invalidate(book_id: Optional[uuid.UUID]) -> None:
+    with _lock:
+        index = _indexes.pop(book_id, None)
+    if index is not None:
+        index.drop_prompt_snapshot()
+
+
+def mark_stale(book_id: Optional[uuid.UUID] = None, all_books: bool = False) -> None:
+    """Make the next lookup pick up changed rows (one book, or every cached book)."""
+    with _lock:
+        indexes = list(_indexes.values()) if all_books else [_indexes.get(book_id)]
+    for index in indexes:
+        if index is not None:
+            index.stale = True
+
+
+async def get_relevant_terms(
+    session: AsyncSession, book_id: Optional[uuid.UUID], text: str
+) -> list[dict]:
+    """Return only the glossary terms whose raw form occurs in text."""
+    index = await _get_index(session, book_id)
+    if not index.terms:
+        return []
+
+    return index.relevant(text)
+
+
+def _observe_prompt(index: _BookGlossary, terms: list[dict], book_id: Optional[uuid.UUID]) -> None:
+    # Counted for the terms a prompt actually carries, filtered or the whole snapshot
+    selected_tokens = sum(_line_tokens(t["raw"], t["translated"], t["type"]) for t in terms)
+    saved = max(index.prompt_tokens - selected_tokens, 0)
+    prompt_tokens_saved.observe(saved)
+    glossary_terms_selected.observe(len(terms))
+    logger.info(
+        f"Prompt glossary: {len(terms)}/{len(index.terms)} terms for book {book_id} "
+        f"(~{saved} prompt tokens saved)"
+    )
+
+
+async def get_prompt_glossary(
+    session: AsyncSession, book_id: Optional[uuid.UUID], relevant: Optional[list[dict]]
+) -> tuple[Optional[list[dict]], Optional[str]]:
+    """Terms to put in a translate prompt, and the context cache tag to send it under.
+
+    By default only the relevant terms are sent, inline. With
+    CONTEXT_CACHE_BOOK_GLOSSARY and context caching on, the prompt carries a
+    snapshot of the whole book glossary so it is identical across chapters
+    and cached once per book. The snapshot is reused while it covers the
+    chapter's relevant terms, so new terms alone do not churn the cache; a
+    renamed term drops it. Very large glossaries are always filtered.
+    """
+    index = await _get_index(session, book_id)
+    if not index.terms:
+        return relevant, context_cache.STATIC_TAG if context_cache.enabled() else None
+    if (
+        not settings.CONTEXT_CACHE_BOOK_GLOSSARY
+        or not context_cache.enabled()
+        or index.prompt_tokens > settings.CONTEXT_CACHE_MAX_GLOSSARY_TOKENS
+    ):
+        _observe_prompt(index, relevant or [], book_id)
+        return relevant, None
+
+    with _lock:
+        covered = index.prompt_snapshot is not None and all(
+            index.prompt_snapshot_terms.get((t["raw"], t["type"])) == t["translated"]
+            for t in relevant or []
+        )
+        if not covered:
+            index.drop_prompt_snapshot()
+            index.prompt_snapshot_terms = dict(index.terms)
+            index.prompt_snapshot = [
+                {"raw": raw, "translated": translated, "type": type}
+                for (raw, type), translated in index.prompt_snapshot_terms.items()
+            ]
+            logger.info(f"New prompt glossary snapshot with {len(index.terms)} terms for book {book_id}")
+        snapshot = index.prompt_snapshot
+    _observe_prompt(index, snapshot, book_id)
+    return snapshot, context_cache.book_tag(book_id)
+
+
+async def find_known(
+    session: AsyncSession, book_id: Optional[uuid.UUID], text: str
+) -> list[str]:
+    """Raw forms of the book's existing terms that occur in text."""
+    index = await _get_index(session, book_id)
+    if not index.terms:
+        return []
+    return sorted({raw for raw, _ in index.matcher.find_all(text)})
+
+
+async def get_matcher(
+    session: AsyncSession, book_id: Optional[uuid.UUID]
+) -> tuple[AhoCorasick, dict[str, list[str]]]:
+    """The book's compiled matcher (values are (raw, type)) and raw -> translated forms."""
+    index = await _get_index(session, book_id)
+    with _lock:
+        forms: dict[str, list[str]] = {}
+        for (raw, _), translated in index.terms.items():
+            forms.setdefault(raw, []).append(translated)
+    return index.matcher, forms
+
+
+async def search_terms(
+    session: AsyncSession, book_id: Optional[uuid.UUID], query: str, limit: int
+) -> list[dict]:
+    """Terms whose raw or translated form contains query (ignoring case), exact matches first."""
+    index = await _get_index(session, book_id)
+    needle = query.strip().casefold()
+    if not needle:
+        return []
+    with _lock:
+        found = [
+            {"raw": raw, "translated": translated, "type": type}
+            for (raw, type), translated in index.terms.items()
+            if needle in raw or needle in translated.casefold()
+        ]
+    found.sort(key=lambda t: (needle not in (t["raw"], t["translated"].casefold()), len(t["raw"])))
+    return found[:limit]
+
+
+async def get_terms_by_type(
+    session: AsyncSession, book_id: Optional[uuid.UUID], type: Optional[str] = None
+) -> list[dict]:
+    """All terms of a book, optionally of one type, served from the index."""
+    index = await _get_index(session, book_id)
+    if type is not None:
+        return index.of_type(type)
+    return [
+        {"raw": raw, "translated": translated, "type": t}
+        for (raw, t), translated in index.terms.items()
+    ]
+
+
+def _on_notify(connection, pid, channel, payload: str) -> None:
+    book_id = uuid.UUID(payload) if payload else None
+    mark_stale(book_id)
+
+
+async def _listen_loop() -> None:
+    while True:
+        connection = None
+        try:
+            connection = await connect_listener()
+            await connection.add_listener(glossary_repo.GLOSSARY_CHANNEL, _on_notify)
+            # Notifications may have been missed while disconnected
+            mark_stale(all_books=True)
+            logger.info(f"Listening for {glossary_repo.GLOSSARY_CHANNEL} notifications")
+            while not connection.is_closed():
+                await asyncio.sleep(settings.GLOSSARY_LISTEN_CHECK_INTERVAL)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Glossary listener error")
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+        await asyncio.sleep(settings.GLOSSARY_LISTEN_CHECK_INTERVAL)
+
+
+_listener: Optional[asyncio.Task] = None
+
+
+def start_listener() -> None:
+    global _listener
+    if not settings.GLOSSARY_NOTIFY_ENABLED or _listener is not None:
+        return
+    _listener = asyncio.create_task(_listen_loop())
+
+
+async def stop_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _listener.cancel()
+    await asyncio.gather(_listener, return_exceptions=True)
+    _listener = None
@@ -0,0 +1,192 @@
+import logging
+import uuid
+from typing import Any, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics, tracing
+from app.core.config import settings
+from app.core.matcher import AhoCorasick, leftmost_longest
+from app.models.job import Job
+from app.repositories.aio import chapter as chapter_repo
+from app.repositories.aio import glossary as glossary_repo
+from app.repositories.aio import job as job_repo
+from app.services import glossary_index, reader, translation_cache
+from app.services import job as job_service
+
+logger = logging.getLogger(__name__)
+
+RENAME_GLOSSARY_TERMS = "rename_glossary_terms"
+
+# Matcher value of a current glossary translation (as opposed to a rename)
+_CURRENT = "current"
+
+rename_rewrites = metrics.counter(
+    "glossary_rename_rewrites_total",
+    "Stored translations rewritten after a glossary rename, by what (chapters, paragraphs, titles)",
+)
+
+
+def _bounded(text: str, start: int, end: int) -> bool:
+    # Forms are names and phrases; never rewrite part of a longer word
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+class Rewriter:
+    """Replaces the old translation of renamed terms in stored translations.
+
+    A paragraph is only rewritten for terms whose raw form occurs on its raw
+    side. Both sides are matched leftmost-longest against the whole glossary,
+    so 林动 does not fire inside 林动天 and an old form inside another term's
+    translation (or inside the new form, on a resumed run) is left alone.
+    """
+
+    def __init__(
+        self, matcher: AhoCorasick, forms: dict[str, list[str]], renames: list[dict]
+    ):
+        self._raws = matcher
+        self._renamed = {r["raw"] for r in renames}
+        self._forms = AhoCorasick()
+        # Renames go first so they win a tie with an identical current form
+        for rename in renames:
+            if rename["old"].strip():
+                self._forms.add(rename["old"], rename)
+        for translations in forms.values():
+            for translated in translations:
+                self._forms.add(translated, _CURRENT)
+
+    def rewrite(self, raw: str, translated: str) -> Optional[str]:
+        """The rewritten translation, or None if nothing changes."""
+        if not raw or not translated:
+            return None
+        present = {key[0] for _, _, key in leftmost_longest(self._raws.iter_matches(raw))}
+        present &= self._renamed
+        if not present:
+            return None
+        candidates = (
+            (start, end, rename)
+            for start, end, rename in self._forms.iter_matches(translated)
+            if _bounded(translated, start, end) and (rename is _CURRENT or rename["raw"] in present)
+        )
+        parts = []
+        last = 0
+        for start, end, rename in leftmost_longest(candidates):
+            if rename is _CURRENT:
+                continue
+            parts.append(translated[last:start])
+            parts.append(rename["translated"])
+            last = end
+        if not parts:
+            return None
+        parts.append(translated[last:])
+        return "".join(parts)
+
+    def rewrite_chapter(self, title: Any, paragraphs: Any) -> tuple[Any, Any, int, bool]:
+        """(title, paragraphs, paragraphs changed, title changed) for one stored chapter."""
+        changed = 0
+        new_paragraphs = []
+        for paragraph in paragraphs or []:
+            translated = self.rewrite(paragraph.get("raw") or "", paragraph.get("translated") or "")
+            if translated is not None:
+                paragraph = {**paragraph, "translated": translated}
+                changed += 1
+            new_paragraphs.append(paragraph)
+        title_changed = False
+        if isinstance(title, dict):
+            translated = self.rewrite(title.get("raw") or "", title.get("translated") or "")
+            if translated is not None:
+                title = {**title, "translated": translated}
+                title_changed = True
+        return title, new_paragraphs if paragraphs is not None else None, changed, title_changed
+
+
+async def rename_terms(
+    session: AsyncSession, book_id: uuid.UUID, items: list[dict]
+) -> tuple[list[dict], Optional[Job]]:
+    """Change term translations and queue a job that rewrites the stored chapters.
+
+    The glossary rows and the job are committed together, so chapters
+    translated from now on already use the new forms and a failure leaves
+    neither behind. Returns the terms that changed, as
+    {raw, type, old, translated}, and the job (None if nothing changed).
+    """
+    renamed = await glossary_repo.update_translations(session, items, book_id)
+    if not renamed:
+        await session.rollback()
+        return [], None
+    job = await job_repo.create(
+        session,
+        kind=RENAME_GLOSSARY_TERMS,
+        payload={"renames": renamed},
+        book_id=book_id,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    glossary_index.add_terms(book_id, renamed)
+    # Entries keyed on the old forms can never hit again
+    await translation_cache.invalidate_terms(session, book_id, [r["raw"] for r in renamed])
+    logger.info(f"Queued {job.kind} job {job.id} for {len(renamed)} renamed terms of book {book_id}")
+    job_service.notify_new_job()
+    return renamed, job
+
+
+@job_service.register_handler(RENAME_GLOSSARY_TERMS)
+async def _run_rename(session: AsyncSession, job: Job) -> dict:
+    """Rewrite the book's stored translations a page of chapters at a time.
+
+    Each page is one UPDATE, committed together with the job's cursor, so a
+    retried job resumes after the last page it wrote.
+    """
+    book_id = job.book_id
+    renames = job.payload["renames"]
+    progress = dict(job.result or {"chapters": 0, "paragraphs": 0, "titles": 0, "skipped": 0, "after": None})
+    # This process may not have seen the glossary notification yet
+    glossary_index.add_terms(book_id, renames)
+    matcher, forms = await glossary_index.get_matcher(session, book_id)
+    rewriter = Rewriter(matcher, forms, renames)
+    old_forms = sorted({r["old"] for r in renames if r["old"].strip()})
+    after = (progress["after"][0], uuid.UUID(progress["after"][1])) if progress["after"] else None
+
+    with tracing.span("glossary.rename", book_id=book_id, terms=len(renames)) as current:
+        while True:
+            page = await chapter_repo.list_containing_page(
+                session, book_id, old_forms, after, settings.GLOSSARY_RENAME_PAGE_SIZE
+            )
+            if not page:
+                break
+            rows, counts = [], {}
+            for chapter_id, order, title, paragraphs, updated_date in page:
+                title, paragraphs, changed, title_changed = rewriter.rewrite_chapter(title, paragraphs)
+                if changed or title_changed:
+                    rows.append(
+                        {
+                            "id": chapter_id,
+                            "order": order,
+                            "title": title,
+                            "paragraphs": paragraphs,
+                            "updated_date": updated_date,
+                        }
+                    )
+                    counts[chapter_id] = (changed, title_changed)
+            written = await chapter_repo.replace_translations(session, book_id, rows)
+            paragraphs_written = sum(counts[id][0] for id in written)
+            titles_written = sum(counts[id][1] for id in written)
+            progress["chapters"] += len(written)
+            progress["paragraphs"] += paragraphs_written
+            progress["titles"] += titles_written
+            # Chapters rewritten since they were read were translated with the new forms
+            progress["skipped"] += len(rows) - len(written)
+            after = (page[-1][1], page[-1][0])
+            progress["after"] = [after[0], str(after[1])]
+            await job_repo.save_progress(session, job.id, dict(progress))
+            if written:
+                reader.chapter_written(book_id)
+                rename_rewrites.inc(len(written), what="chapters")
+                rename_rewrites.inc(paragraphs_written, what="paragraphs")
+                rename_rewrites.inc(titles_written, what="titles")
+
+        tracing.set_attributes(current, chapters=progress["chapters"], paragraphs=progress["paragraphs"])
+    logger.info(
+        f"Rename job {job.id}: rewrote {progress['paragraphs']} paragraphs and {progress['titles']} titles "
+        f"in {progress['chapters']} chapters of book {book_id}"
+    )
+    return progress
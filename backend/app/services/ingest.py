@@ -0,0 +1,275 @@
+import asyncio
+import codecs
+import logging
+import re
+import uuid
+from typing import AsyncIterator, Iterator, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import new_async_session
+from app.models.chapter import ChapterStatus
+from app.models.job import Job
+from app.repositories.aio import chapter as chapter_repo
+from app.repositories.aio import job as job_repo
+from app.services import chapter as chapter_service
+from app.services import glossary as glossary_service
+from app.services import job as job_service
+
+logger = logging.getLogger(__name__)
+
+INGEST_BOOK = "ingest_book"
+
+CHAPTER_HEADING_RE = re.compile(
+    r"^\s*第\s*[0-9０-９零〇一二两三四五六七八九十百千万]+\s*[章回]"
+)
+
+# Placeholders are inserted in batches while the upload is still streaming
+_PLACEHOLDER_BATCH = 200
+
+
+class _ChapterSplitter:
+    """Incrementally split decoded text into chapters on 第X章 headings."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._current: Optional[list[str]] = None
+        self.skipped_preamble = 0
+
+    def _line(self, line: str) -> Iterator[str]:
+        if CHAPTER_HEADING_RE.match(line):
+            if self._current is not None:
+                yield "\n".join(self._current).strip()
+            self._current = [line.strip()]
+        elif self._current is not None:
+            self._current.append(line.rstrip())
+        elif line.strip():
+            # Text before the first heading (book intro, site banners)
+            self.skipped_preamble += 1
+
+    def feed(self, text: str) -> Iterator[str]:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            yield from self._line(line)
+
+    def close(self) -> Iterator[str]:
+        if self._buffer:
+            yield from self._line(self._buffer)
+            self._buffer = ""
+        if self._current is not None:
+            yield "\n".join(self._current).strip()
+            self._current = None
+
+
+async def split_chapters(
+    chunks: AsyncIterator[bytes], encoding: str = "utf-8"
+) -> AsyncIterator[str]:
+    """Yield chapter texts from a byte stream without holding the whole file."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    splitter = _ChapterSplitter()
+    async for chunk in chunks:
+        for chapter in splitter.feed(decoder.decode(chunk)):
+            yield chapter
+    for chapter in splitter.feed(decoder.decode(b"", final=True)):
+        yield chapter
+    for chapter in splitter.close():
+        yield chapter
+    if splitter.skipped_preamble:
+        logger.info(f"Skipped {splitter.skipped_preamble} lines before the first chapter heading")
+
+
+async def ingest_book(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8",
+    parallelism: Optional[int] = None,
+) -> tuple[Job, int]:
+    """Split an uploaded novel into placeholder chapters and queue the pipeline job.
+
+    Chapters get consecutive orders after the book's current last chapter.
+    The placeholders and the job are committed together, so a failed upload
+    leaves nothing behind. Returns (job, number of chapters created). Raises
+    ValueError if the text has no chapter headings.
+    """
+    # Held until the commit, so concurrent uploads and translations get distinct orders
+    await chapter_repo.lock_orders(session, book_id)
+    next_order = await chapter_repo.get_next_order(session, book_id)
+    total = 0
+    batch: list[tuple[int, str]] = []
+    async for text in split_chapters(chunks, encoding):
+        batch.append((next_order + total, text))
+        total += 1
+        if len(batch) >= _PLACEHOLDER_BATCH:
+            await chapter_repo.create_placeholders(session, book_id, batch)
+            batch = []
+    if batch:
+        await chapter_repo.create_placeholders(session, book_id, batch)
+    if not total:
+        await session.rollback()
+        raise ValueError("No chapters found; chapters must start with a 第X章 heading")
+    logger.info(f"Ingested {total} chapters for book {book_id} (orders {next_order}..{next_order + total - 1})")
+
+    job = await submit_ingest_job(session, book_id, parallelism)
+    return job, total
+
+
+async def submit_ingest_job(
+    session: AsyncSession, book_id: uuid.UUID, parallelism: Optional[int] = None
+) -> Job:
+    """Queue (or re-queue) the extract+translate pipeline for a book's ingested chapters."""
+    job = await job_repo.create(
+        session,
+        kind=INGEST_BOOK,
+        payload={"parallelism": parallelism or settings.INGEST_PARALLELISM},
+        book_id=book_id,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    job_service.notify_new_job()
+    return job
+
+
+async def _load_raw_text(chapter_id: uuid.UUID) -> Optional[str]:
+    """The chapter's raw text, or None if it was deleted since the job started."""
+    async with new_async_session() as session:
+        chapter = await chapter_repo.get_by_id(session, chapter_id)
+        return None if chapter is None else chapter.raw_text or ""
+
+
+async def _extract(book_id: uuid.UUID, batch: list[tuple[uuid.UUID, str]]) -> None:
+    async with new_async_session() as session:
+        if settings.GLOSSARY_BATCH_TOKENS > 0:
+            await glossary_service.extract_glossary_batch(session, book_id, batch)
+        else:
+            chapter_id, text = batch[0]
+            await glossary_service.extract_glossary(
+                session=session,
+                text=text,
+                book_id=book_id,
+                first_chapter_id=chapter_id,
+            )
+        for chapter_id, _ in batch:
+            await chapter_service.set_status(session, chapter_id, ChapterStatus.QUEUED)
+
+
+async def _translate(book_id: uuid.UUID, chapter_id: uuid.UUID, order: int) -> bool:
+    """Translate one ingested chapter; False if it was deleted since the job started."""
+    async with new_async_session() as session:
+        chapter = await chapter_service.set_status(session, chapter_id, ChapterStatus.RUNNING)
+        if chapter is None:
+            return False
+        try:
+            await chapter_service.translate_chapter(
+                session=session,
+                text=chapter.raw_text,
+                book_id=book_id,
+                chapter_id=chapter_id,
+                order=order,
+            )
+        except Exception:
+            await session.rollback()
+            await chapter_service.set_status(session, chapter_id, ChapterStatus.FAILED)
+            raise
+    return True
+
+
+@job_service.register_handler(INGEST_BOOK)
+async def _run_ingest_book(session: AsyncSession, job: Job) -> dict:
+    """Pipeline glossary extraction and translation across a book's chapters.
+
+    Extraction runs in chapter order, several chapters per call within
+    GLOSSARY_BATCH_TOKENS, so terms are attributed to the chapter they first
+    appear in. Each chapter is translated as soon as its batch is extracted,
+    with up to `parallelism` translations in flight.
+    Progress lives in the chapter statuses, so a restarted job resumes at
+    the first chapter that is not translated yet.
+    """
+    book_id = job.book_id
+    parallelism = max(int(job.payload.get("parallelism") or 1), 1)
+    # The handler's session would sit idle in a transaction for the whole run
+    async with new_async_session() as read_session:
+        remaining = await chapter_repo.list_unfinished_ingested(read_session, book_id)
+        counts = await chapter_repo.count_ingested(read_session, book_id)
+    progress = {
+        "total": sum(counts.values()),
+        "translated": counts.get(ChapterStatus.TRANSLATED.value, 0),
+        "failed": 0,
+        "skipped": 0,
+        "last_order": None,
+    }
+    logger.info(f"Ingest job {job.id}: {len(remaining)} chapters left for book {book_id}")
+
+    ready: asyncio.Queue = asyncio.Queue(maxsize=parallelism * 2)
+    progress_lock = asyncio.Lock()
+
+    async def save_progress():
+        async with new_async_session() as progress_session:
+            await job_repo.save_progress(progress_session, job.id, dict(progress))
+
+    async def extract_batch(batch: list[tuple[uuid.UUID, int, str]]):
+        try:
+            await _extract(book_id, [(chapter_id, text) for chapter_id, _, text in batch])
+        except Exception:
+            orders = [order for _, order, _ in batch]
+            logger.exception(f"Glossary extraction failed for chapters {orders}")
+        for chapter_id, order, _ in batch:
+            await ready.put((chapter_id, order))
+
+    async def extractor():
+        # Consecutive pending chapters are packed into token-budgeted extraction calls
+        budget = settings.GLOSSARY_BATCH_TOKENS
+        orders: dict[uuid.UUID, int] = {}
+        pending: list[tuple[uuid.UUID, str]] = []
+
+        async def flush(everything: bool):
+            if budget > 0:
+                batches = glossary_service.pack_chapters(pending, budget)
+            else:
+                batches = [[chapter] for chapter in pending]
+            # Until the run of pending chapters ends, the last batch may still have room
+            keep = batches.pop() if batches and not everything else []
+            for batch in batches:
+                await extract_batch([(chapter_id, orders[chapter_id], text) for chapter_id, text in batch])
+            pending[:] = keep
+
+        try:
+            for chapter_id, order, status in remaining:
+                if status != ChapterStatus.PENDING.value:
+                    await flush(everything=True)
+                    await ready.put((chapter_id, order))
+                    continue
+                text = await _load_raw_text(chapter_id)
+                if text is None:
+                    logger.info(f"Chapter {order} was deleted, skipping it")
+                    async with progress_lock:
+                        progress["skipped"] += 1
+                    continue
+                orders[chapter_id] = order
+                pending.append((chapter_id, text))
+                await flush(everything=False)
+            await flush(everything=True)
+        finally:
+            for _ in range(parallelism):
+                await ready.put(None)
+
+    async def translator():
+        while (item := await ready.get()) is not None:
+            chapter_id, order = item
+            try:
+                outcome = "translated" if await _translate(book_id, chapter_id, order) else "skipped"
+            except Exception:
+                logger.exception(f"Translation failed for chapter {order}")
+                outcome = "failed"
+            if outcome == "skipped":
+                logger.info(f"Chapter {order} was deleted, skipping it")
+            async with progress_lock:
+                progress[outcome] += 1
+                if outcome == "translated":
+                    progress["last_order"] = max(progress["last_order"] or order, order)
+                await save_progress()
+
+    await asyncio.gather(extractor(), *(translator() for _ in range(parallelism)))
+    logger.info(f"Ingest job {job.id} finished: {progress}")
+    return progress
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import new_async_session
+from app.models.chapter import ChapterStatus
+from app.models.job import Job, JobStatus
+from app.repositories.aio import chapter as chapter_repo
+from app.repositories.aio import job as job_repo
+from app.services import chapter as chapter_service
+
+logger = logging.getLogger(__name__)
+
+TRANSLATE_CHAPTER = "translate_chapter"
+
+JobHandler = Callable[[AsyncSession, Job], Awaitable[Any]]
+
+# Job kind -> coroutine run by the workers; its return value becomes Job.result
+_handlers: dict[str, JobHandler] = {}
+
+_tasks: list[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+
+
+def register_handler(kind: str):
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+
+    return decorator
+
+
+def notify_new_job() -> None:
+    # Wakes idle workers in this process; other processes pick the job up on their next poll
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def submit_translate_chapter(
+    session: AsyncSession,
+    text: str,
+    book_id: Optional[uuid.UUID] = None,
+    chapter_id: Optional[uuid.UUID] = None,
+    chunked: Optional[bool] = None,
+) -> Optional[Job]:
+    """Queue a chapter translation. Returns None if chapter_id does not exist.
+
+    Without a book_id, an existing chapter stays in its own book. A chapter
+    that is already translated keeps its status (and stays readable) while
+    it is re-translated; the job's payload marks it as a re-translation.
+    Raises ValueError if the chapter belongs to another book than book_id or
+    cannot be queued from its current status.
+    """
+    retranslate = False
+    if chapter_id is None:
+        if book_id is None:
+            book_id = chapter_service.DEFAULT_BOOK_ID
+        chapter = await chapter_repo.create_placeholder(session, book_id, ChapterStatus.QUEUED)
+    else:
+        chapter = await chapter_repo.get_by_id(session, chapter_id)
+        if chapter is None:
+            return None
+        if book_id is None:
+            book_id = chapter.book_id
+        elif chapter.book_id != book_id:
+            raise ValueError(f"Chapter {chapter_id} does not belong to book {book_id}")
+        retranslate = chapter.status == ChapterStatus.TRANSLATED.value
+        if not retranslate:
+            chapter = await chapter_service.set_status(session, chapter_id, ChapterStatus.QUEUED)
+            if chapter is None:
+                return None
+
+    job = await job_repo.create(
+        session,
+        kind=TRANSLATE_CHAPTER,
+        payload={"text": text, "chunked": chunked, "retranslate": retranslate},
+        book_id=book_id,
+        chapter_id=chapter.id,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    logger.info(f"Queued {job.kind} job {job.id} for chapter {chapter.id}")
+    notify_new_job()
+    return job
+
+
+@register_handler(TRANSLATE_CHAPTER)
+async def _run_translate_chapter(session: AsyncSession, job: Job) -> dict:
+    if not job.payload.get("retranslate"):
+        await chapter_service.set_status(session, job.chapter_id, ChapterStatus.RUNNING)
+    result = await chapter_service.translate_chapter(
+        session=session,
+        text=job.payload["text"],
+        book_id=job.book_id,
+        chapter_id=job.chapter_id,
+        chunked=job.payload.get("chunked"),
+    )
+    title = result["title"]
+    return {
+        "chapter_id": str(result["chapter_id"]) if result["chapter_id"] else None,
+        "order": result["order"],
+        "title": title.model_dump() if title else None,
+        "summary": result["summary"],
+        "paragraphs": len(result["sentences"]),
+    }
+
+
+async def _sync_chapter_status(session: AsyncSession, job: Job, status: JobStatus) -> None:
+    # A re-translated chapter keeps its stored translation until the job succeeds
+    if job.chapter_id is None or (job.payload or {}).get("retranslate"):
+        return
+    chapter_status = ChapterStatus.QUEUED if status == JobStatus.QUEUED else ChapterStatus.FAILED
+    try:
+        await chapter_service.set_status(session, job.chapter_id, chapter_status)
+    except ValueError as e:
+        logger.warning(f"Chapter {job.chapter_id} of job {job.id}: {e}")
+
+
+async def _heartbeat(job_id: uuid.UUID) -> None:
+    while True:
+        await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+        try:
+            async with new_async_session() as session:
+                await job_repo.heartbeat(session, job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # A missed beat is fine; stopping would get the running job reclaimed as stale
+            logger.exception(f"Heartbeat for job {job_id} failed")
+
+
+async def _release(job: Job) -> None:
+    async with new_async_session() as session:
+        await job_repo.release(session, job.id)
+
+
+async def _run_job(job: Job) -> None:
+    handler = _handlers[job.kind]
+    heartbeat = asyncio.create_task(_heartbeat(job.id))
+    logger.info(f"Running {job.kind} job {job.id} (attempt {job.attempts}/{job.max_attempts})")
+    try:
+        async with new_async_session() as session:
+            result = await handler(session, job)
+        async with new_async_session() as session:
+            await job_repo.mark_succeeded(session, job.id, result)
+        logger.info(f"Job {job.id} succeeded")
+    except asyncio.CancelledError:
+        # Shutting down: hand the job back instead of waiting for it to go stale
+        await asyncio.shield(_release(job))
+        raise
+    except Exception as e:
+        logger.exception(f"Job {job.id} failed")
+        async with new_async_session() as session:
+            requeued = await job_repo.mark_failed(
+                session, job, str(e) or e.__class__.__name__, settings.JOB_RETRY_DELAY
+            )
+            await _sync_chapter_status(
+                session, job, JobStatus.QUEUED if requeued else JobStatus.FAILED
+            )
+    finally:
+        heartbeat.cancel()
+
+
+async def _wait_for_work() -> None:
+    try:
+        await asyncio.wait_for(_wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL)
+    except asyncio.TimeoutError:
+        pass
+    _wakeup.clear()
+
+
+async def _worker_loop(worker_id: int) -> None:
+    kinds = list(_handlers)
+    while True:
+        try:
+            async with new_async_session() as session:
+                job = await job_repo.claim_next(session, kinds)
+            if job is None:
+                await _wait_for_work()
+                continue
+            await _run_job(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Job worker {worker_id} error")
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+
+
+async def _reaper_loop() -> None:
+    while True:
+        try:
+            async with new_async_session() as session:
+                for job in await job_repo.requeue_stale(session, settings.JOB_STALE_AFTER):
+                    logger.warning(f"Job {job.id} went stale, now {job.status}")
+                    await _sync_chapter_status(session, job, JobStatus(job.status))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Job reaper error")
+        await asyncio.sleep(settings.JOB_STALE_AFTER / 2)
+
+
+def start_workers() -> None:
+    global _wakeup
+    if settings.JOB_WORKERS <= 0 or _tasks:
+        return
+    _wakeup = asyncio.Event()
+    _tasks.append(asyncio.create_task(_reaper_loop()))
+    for i in range(settings.JOB_WORKERS):
+        _tasks.append(asyncio.create_task(_worker_loop(i)))
+    logger.info(f"Started {settings.JOB_WORKERS} job workers")
+
+
+async def stop_workers() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,102 @@
+import bisect
+import hashlib
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Session
+
+from app.core import metrics
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.repositories import chapter as chapter_repo
+from app.schemas.chapter import ChapterDetailResponse, ChapterTocItem
+
+logger = logging.getLogger(__name__)
+
+reader_cache_requests = metrics.counter(
+    "reader_cache_requests_total", "Reader cache lookups by result (hit, miss, toc_hit, toc_miss)"
+)
+
+# (book_id, order) -> (detail, etag, last_modified)
+_details = LRUCache(settings.READER_CACHE_SIZE, ttl=settings.READER_CACHE_TTL)
+
+CachedChapter = tuple[ChapterDetailResponse, str, datetime]
+
+# book_id -> (orders, [ChapterTocItem]); orders is kept separately for bisect
+_tocs = LRUCache(settings.TOC_CACHE_SIZE, ttl=settings.READER_CACHE_TTL)
+
+
+def _etag(id: uuid.UUID, updated_date: datetime, prev_order: Optional[int], next_order: Optional[int]) -> str:
+    # Navigation is part of the response, so a new neighbour changes the tag too
+    tag = f"{id}:{updated_date.isoformat()}:{prev_order}:{next_order}"
+    return '"' + hashlib.sha1(tag.encode()).hexdigest()[:20] + '"'
+
+
+def get_chapter(
+    session: Session, book_id: uuid.UUID, order: int
+) -> Optional[CachedChapter]:
+    """Return (detail, etag, last_modified) for a translated chapter, or None.
+
+    Cache hits do not touch the database.
+    """
+    cached = _details.get((book_id, order))
+    if cached is not None:
+        reader_cache_requests.inc(result="hit")
+        return cached
+
+    reader_cache_requests.inc(result="miss")
+    row = chapter_repo.get_detail(session, book_id, order)
+    if row is None:
+        return None
+    detail = ChapterDetailResponse(
+        id=row.id,
+        title=row.title,
+        order=row.order,
+        summary=row.summary,
+        paragraphs=row.paragraphs,
+        raw_paragraphs=row.raw_paragraphs,
+        prev_order=row.prev_order,
+        next_order=row.next_order,
+    )
+    cached = (detail, _etag(row.id, row.updated_date, row.prev_order, row.next_order), row.updated_date)
+    _details.set((book_id, order), cached)
+    return cached
+
+
+def _get_toc(session: Session, book_id: uuid.UUID) -> tuple[list[int], list[ChapterTocItem]]:
+    toc = _tocs.get(book_id)
+    if toc is not None:
+        reader_cache_requests.inc(result="toc_hit")
+        return toc
+    reader_cache_requests.inc(result="toc_miss")
+    rows = chapter_repo.list_toc(session, book_id)
+    toc = (
+        [order for _, order, _ in rows],
+        [ChapterTocItem(id=id, order=order, title=title) for id, order, title in rows],
+    )
+    _tocs.set(book_id, toc)
+    return toc
+
+
+def get_toc_page(
+    session: Session, book_id: uuid.UUID, after: Optional[int] = None, limit: Optional[int] = None
+) -> tuple[list[ChapterTocItem], Optional[int]]:
+    """Return a page of the table of contents and the cursor for the next page (None at the end)."""
+    orders, items = _get_toc(session, book_id)
+    start = 0 if after is None else bisect.bisect_right(orders, after)
+    end = len(items) if limit is None else min(start + limit, len(items))
+    next_cursor = orders[end - 1] if end < len(items) and end > start else None
+    return items[start:end], next_cursor
+
+
+def chapter_written(book_id: uuid.UUID) -> None:
+    """Drop cached reader data of a book after one of its chapters changed.
+
+    The whole book goes, since neighbours' prev/next links may change too.
+    """
+    _tocs.pop(book_id)
+    dropped = _details.pop_where(lambda key, _: key[0] == book_id)
+    if dropped:
+        logger.info(f"Dropped {dropped} cached chapters of book {book_id}")
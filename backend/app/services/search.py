@@ -0,0 +1,122 @@
+import logging
+import re
+import time
+import uuid
+from typing import Literal
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics, tracing
+from app.core.config import settings
+from app.core.search_text import has_cjk, query_runs, raw_tsquery
+from app.models.job import Job
+from app.repositories.aio import chapter as chapter_repo
+from app.repositories.aio import job as job_repo
+from app.repositories.aio import search as search_repo
+from app.services import glossary_index
+from app.services import job as job_service
+
+logger = logging.getLogger(__name__)
+
+REINDEX_SEARCH = "reindex_search"
+
+search_seconds = metrics.histogram(
+    "search_seconds", "Full-text search latency by side (raw, translated)"
+)
+
+
+def highlight_raw(raw: str, query: str) -> str:
+    """Wrap the parts of a raw query found in a paragraph in <mark>, longest first."""
+    runs = sorted(set(query_runs(query)), key=len, reverse=True)
+    if not runs:
+        return raw
+    pattern = re.compile("|".join(re.escape(run) for run in runs), re.IGNORECASE)
+    return pattern.sub(lambda m: f"<mark>{m.group()}</mark>", raw)
+
+
+async def search(
+    session: AsyncSession,
+    book_id: uuid.UUID,
+    query: str,
+    side: Literal["auto", "raw", "translated"] = "auto",
+    sort: Literal["rank", "order"] = "rank",
+    offset: int = 0,
+    limit: int = 20,
+) -> dict:
+    """Ranked, highlighted paragraphs of a book that match query, plus matching glossary terms.
+
+    With side=auto a query containing Chinese searches the raw text, anything
+    else the translation. sort=order lists hits in reading order, so the first
+    hit is where a name first appears. Glossary terms come with the first page only.
+    """
+    if side == "auto":
+        side = "raw" if has_cjk(query) else "translated"
+    tsquery = raw_tsquery(query) if side == "raw" else query.strip()
+    rows = []
+    started = time.perf_counter()
+    if tsquery:
+        with tracing.span("search", book_id=book_id, side=side, sort=sort):
+            rows = await search_repo.search(session, book_id, tsquery, side, sort, offset, limit + 1)
+    search_seconds.observe(time.perf_counter() - started, side=side)
+
+    hits = [
+        {
+            "chapter_id": row.chapter_id,
+            "order": row.chapter_order,
+            "paragraph": row.paragraph,
+            "raw": row.raw,
+            "translated": row.translated,
+            "highlight": row.headline if side == "translated" else highlight_raw(row.raw, query),
+            "rank": row.rank,
+        }
+        for row in rows[:limit]
+    ]
+    glossary = []
+    if offset == 0:
+        glossary = await glossary_index.search_terms(session, book_id, query, settings.SEARCH_GLOSSARY_LIMIT)
+    return {
+        "side": side,
+        "hits": hits,
+        "glossary": glossary,
+        "next_offset": offset + limit if len(rows) > limit else None,
+    }
+
+
+async def submit_reindex_job(session: AsyncSession, book_id: uuid.UUID) -> Job:
+    """Queue rebuilding the search rows of every translated chapter of a book."""
+    job = await job_repo.create(
+        session,
+        kind=REINDEX_SEARCH,
+        payload={},
+        book_id=book_id,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    logger.info(f"Queued {job.kind} job {job.id} for book {book_id}")
+    job_service.notify_new_job()
+    return job
+
+
+@job_service.register_handler(REINDEX_SEARCH)
+async def _run_reindex(session: AsyncSession, job: Job) -> dict:
+    """Index chapters a page at a time; each page commits with the job's cursor."""
+    book_id = job.book_id
+    progress = dict(job.result or {"chapters": 0, "paragraphs": 0, "after": None})
+    after = (progress["after"][0], uuid.UUID(progress["after"][1])) if progress["after"] else None
+    while True:
+        page = await chapter_repo.list_paragraphs_page(
+            session, book_id, after, settings.SEARCH_REINDEX_PAGE_SIZE
+        )
+        if not page:
+            break
+        progress["paragraphs"] += await search_repo.index_chapters(
+            session, [(chapter_id, book_id, order, paragraphs) for chapter_id, order, paragraphs in page]
+        )
+        progress["chapters"] += len(page)
+        after = (page[-1][1], page[-1][0])
+        progress["after"] = [after[0], str(after[1])]
+        await job_repo.save_progress(session, job.id, dict(progress))
+    logger.info(
+        f"Search reindex job {job.id}: {progress['paragraphs']} paragraphs "
+        f"from {progress['chapters']} chapters of book {book_id}"
+    )
+    return progress
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import uuid
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.llm import DEFAULT_MODEL
+from app.models.chapter import is_translation_error
+from app.prompts.translate_chapter import PROMPT_VERSION
+from app.repositories.aio import translation_cache as cache_repo
+
+logger = logging.getLogger(__name__)
+
+cache_requests = metrics.counter(
+    "translation_cache_requests_total",
+    "Paragraph translation cache lookups by result (hit_memory, hit_db, miss)",
+)
+cache_invalidations = metrics.counter(
+    "translation_cache_invalidations_total",
+    "Paragraph translation cache entries removed after glossary changes",
+)
+
+# key -> (translated, terms)
+_lru = LRUCache(settings.TRANSLATION_CACHE_LRU_SIZE)
+
+
+def applicable_terms(raw: str, glossary: Optional[list[dict]]) -> list[dict]:
+    if not glossary:
+        return []
+    return sorted(
+        (g for g in glossary if g["raw"] in raw),
+        key=lambda g: (g["raw"], g["type"]),
+    )
+
+
+def cache_key(raw: str, terms: list[dict], model: str = DEFAULT_MODEL) -> str:
+    """Hash of the paragraph, the glossary entries that apply to it, prompt version and model.
+
+    The translated form of each term is part of the key, so editing a term
+    or adding one that occurs in the paragraph naturally produces a miss.
+    """
+    h = hashlib.sha256()
+    for part in (model, PROMPT_VERSION, raw):
+        h.update(part.encode())
+        h.update(b"\0")
+    for term in terms:
+        h.update(f"{term['raw']}\x1f{term['translated']}\x1f{term['type']}".encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+async def lookup(
+    session: AsyncSession,
+    paragraphs: list[str],
+    glossary: Optional[list[dict]],
+    model: str = DEFAULT_MODEL,
+) -> list[Optional[str]]:
+    """Return the cached translation for each paragraph (None on a miss)."""
+    keys = [cache_key(p, applicable_terms(p, glossary), model) for p in paragraphs]
+    results: list[Optional[str]] = [None] * len(paragraphs)
+
+    db_keys = []
+    for i, key in enumerate(keys):
+        cached = _lru.get(key)
+        if cached is not None:
+            results[i] = cached[0]
+            cache_requests.inc(result="hit_memory")
+        else:
+            db_keys.append(key)
+
+    if db_keys:
+        entries = await cache_repo.get_many(session, db_keys)
+        for i, key in enumerate(keys):
+            if results[i] is not None:
+                continue
+            entry = entries.get(key)
+            if entry is None:
+                cache_requests.inc(result="miss")
+                continue
+            results[i] = entry.translated
+            _lru.set(key, (entry.translated, tuple(entry.terms)))
+            cache_requests.inc(result="hit_db")
+
+    hits = sum(r is not None for r in results)
+    logger.info(f"Translation cache: {hits}/{len(paragraphs)} paragraphs hit")
+    return results
+
+
+async def store(
+    session: AsyncSession,
+    book_id: Optional[uuid.UUID],
+    pairs: list[tuple[str, str]],
+    glossary: Optional[list[dict]],
+    model: str = DEFAULT_MODEL,
+) -> int:
+    """Cache (raw, translated) pairs; error placeholders are never cached."""
+    entries = {}
+    for raw, translated in pairs:
+        if not raw.strip() or is_translation_error(translated):
+            continue
+        terms = applicable_terms(raw, glossary)
+        key = cache_key(raw, terms, model)
+        term_raws = sorted({t["raw"] for t in terms})
+        entries[key] = {
+            "key": key,
+            "book_id": book_id,
+            "raw": raw,
+            "translated": translated,
+            "model": model,
+            "prompt_version": PROMPT_VERSION,
+            "terms": term_raws,
+        }
+        _lru.set(key, (translated, tuple(term_raws)))
+    return await cache_repo.put_many(session, list(entries.values()))
+
+
+async def invalidate_terms(
+    session: AsyncSession, book_id: Optional[uuid.UUID], raws: list[str]
+) -> int:
+    """Drop cached paragraphs that depended on any of the given glossary terms."""
+    raw_set = set(raws)
+    dropped = _lru.pop_where(lambda _, value: not raw_set.isdisjoint(value[1]))
+    deleted = await cache_repo.delete_by_terms(session, list(raw_set), book_id)
+    cache_invalidations.inc(deleted)
+    logger.info(f"Invalidated {deleted} cached paragraphs ({dropped} in memory) for {len(raw_set)} terms")
+    return deleted
@@ -0,0 +1,123 @@
+"""Alignment checker accuracy and repair cost on chapters with dropped, merged or split paragraphs.
+
+Translations come from a deterministic fake translator (syllables per
+ideograph with per-paragraph length noise, numbers, punctuation and glossary
+terms carried over), so no API key or database is needed:
+
+    python -m benchmarks.alignment --trials 300
+"""
+import argparse
+import random
+import time
+
+from app.core.llm import estimate_tokens
+from app.services import alignment
+
+NAMES = {"萧炎": "Tiêu Viêm", "药老": "Dược Lão", "纳兰嫣然": "Nạp Lan Yên Nhiên", "云岚宗": "Vân Lam Tông", "乌坦城": "Ô Thản Thành"}
+CLAUSES = [
+    "缓缓抬起头，目光望向远方的山峦",
+    "心中暗暗思索着接下来的修炼之路",
+    "体内斗气翻涌，经脉隐隐作痛",
+    "冷笑一声，转身便走",
+    "沉默了片刻",
+    "脸色微变，身形暴退",
+]
+SYLLABLES = ["hắn", "chậm", "rãi", "ngẩng", "đầu", "ánh", "mắt", "nhìn", "về", "phía", "núi", "trong", "lòng", "tu", "luyện"]
+WATERMARK = "Www?TTKΛN?co"
+
+
+def _paragraph(rng: random.Random) -> str:
+    name = rng.choice(list(NAMES))
+    kind = rng.random()
+    body = "，".join(rng.sample(CLAUSES, rng.randint(1, 4)))
+    if kind < 0.25:
+        return f"“{name}，{body}？”"
+    if kind < 0.4:
+        return f"{name}{body}，足足{rng.randint(2, 999)}息。"
+    if kind < 0.5:
+        return f"“{body}！”"
+    return f"{name}{body}。"
+
+
+def _translate(raw: str, rng: random.Random) -> str:
+    if alignment.is_watermark(raw):
+        return ""
+    text = raw
+    for name, translated in NAMES.items():
+        text = text.replace(name, f" {translated} ")
+    words = []
+    noise = rng.lognormvariate(0, 0.25)
+    for ch in text:
+        if "\u4e00" <= ch <= "\u9fff":
+            if rng.random() < noise / 1.3:
+                words.append(rng.choice(SYLLABLES))
+        else:
+            words.append({"，": ",", "。": ".", "？": "?", "！": "!", "“": '"', "”": '"'}.get(ch, ch))
+    return " ".join("".join(words).split())
+
+
+def _chapter(rng: random.Random, n: int) -> list[str]:
+    paragraphs = [_paragraph(rng) for _ in range(n)]
+    paragraphs.insert(rng.randrange(n), WATERMARK)
+    return paragraphs
+
+
+def _damage(translations: list[str], rng: random.Random, kind: str) -> tuple[list[str], set[int]]:
+    """Return damaged translations and the source indices whose translation was damaged."""
+    out = list(translations)
+    i = rng.randrange(1, len(out) - 2)
+    if kind == "drop1":
+        del out[i]
+        return out, {i}
+    if kind == "drop2":
+        j = rng.randrange(i + 1, len(out) - 1)
+        del out[j]
+        del out[i]
+        return out, {i, j}
+    if kind == "merge":
+        out[i : i + 2] = [out[i] + " " + out[i + 1]]
+        return out, {i, i + 1}
+    if kind == "split":
+        words = out[i].split()
+        half = max(1, len(words) // 2)
+        out[i : i + 1] = [" ".join(words[:half]), " ".join(words[half:])]
+        return out, {i}
+    return out, set()
+
+
+def main(trials: int, paragraphs: int) -> None:
+    rng = random.Random(7)
+    glossary = [{"raw": raw, "translated": vi, "type": "character"} for raw, vi in NAMES.items()]
+    print(f"{trials} trials per kind, ~{paragraphs} paragraphs per chapter")
+    for kind in ("none", "drop1", "drop2", "merge", "split"):
+        recovered = wrong = flagged = 0
+        repair_tokens = chapter_tokens = 0
+        elapsed = 0.0
+        for _ in range(trials):
+            raw = _chapter(rng, paragraphs)
+            good = [_translate(p, rng) for p in raw]
+            damaged, lost = _damage(good, rng, kind)
+            started = time.perf_counter()
+            slots = alignment.align(raw, damaged, glossary)
+            elapsed += time.perf_counter() - started
+            missing = {i for i, s in enumerate(slots) if s is None}
+            # Damaged paragraphs must be flagged for repair, or rebuilt exactly (a split rejoined)
+            recovered += all(slots[i] is None or slots[i] == good[i] for i in lost)
+            # A wrong slot would be saved silently; that is the failure that matters
+            wrong += sum(1 for i, s in enumerate(slots) if s is not None and s != good[i])
+            flagged += len(missing - lost)
+            repair_tokens += sum(estimate_tokens(raw[i]) for i in missing)
+            chapter_tokens += sum(estimate_tokens(p) for p in raw)
+        print(
+            f"{kind:<6} recovered {recovered / trials:6.1%}   wrong slots/chapter {wrong / trials:5.2f}   "
+            f"extra flagged/chapter {flagged / trials:5.2f}   repair input {repair_tokens / chapter_tokens:6.1%} "
+            f"of chapter   {elapsed / trials * 1000:5.2f} ms/chapter"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=300)
+    parser.add_argument("--paragraphs", type=int, default=60)
+    args = parser.parse_args()
+    main(args.trials, args.paragraphs)
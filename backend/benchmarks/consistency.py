@@ -0,0 +1,78 @@
+"""Glossary consistency check throughput on a synthetic translated book.
+
+Builds chapters whose translations use the glossary forms, drops the form
+from a known share of paragraphs, and checks that exactly those are reported:
+
+    python -m benchmarks.consistency --chapters 5000 --terms 20000
+"""
+import argparse
+import random
+import time
+
+from app.core.matcher import AhoCorasick
+from app.services.consistency import check_paragraphs
+
+_CJK = [chr(c) for c in range(0x4E00, 0x4E00 + 300)]
+
+
+def _glossary(n: int, rng: random.Random) -> dict[str, str]:
+    terms: dict[str, str] = {}
+    while len(terms) < n:
+        raw = "".join(rng.choices(_CJK, k=3))
+        terms[raw] = f"Name{len(terms)}"
+    return terms
+
+
+def _chapters(
+    n: int, paragraphs: int, terms: dict[str, str], drift: float, rng: random.Random
+) -> tuple[list[list[dict]], int]:
+    raws = list(terms)
+    chapters, drifted = [], 0
+    for _ in range(n):
+        chapter = []
+        for _ in range(paragraphs):
+            # Filler uses fullwidth punctuation only, so it never forms a term
+            used = rng.sample(raws, 2)
+            raw = f"{used[0]}，“{used[1]}。”" + "，" * 40
+            translated = f"{terms[used[0]]} said to {terms[used[1]]} " + "word " * 30
+            if rng.random() < drift:
+                translated = translated.replace(terms[used[1]], "someone")
+                drifted += 1
+            chapter.append({"raw": raw, "translated": translated})
+        chapters.append(chapter)
+    return chapters, drifted
+
+
+def main(chapters: int, paragraphs: int, terms: int, drift: float, seed: int) -> None:
+    rng = random.Random(seed)
+    glossary = _glossary(terms, rng)
+    book, drifted = _chapters(chapters, paragraphs, glossary, drift, rng)
+
+    started = time.perf_counter()
+    matcher = AhoCorasick((raw, (raw, "character")) for raw in glossary)
+    forms = {raw: [translated] for raw, translated in glossary.items()}
+    matcher.find_all("")  # builds the automaton, as the cached index already has
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    found = sum(len(check_paragraphs(matcher, forms, chapter)) for chapter in book)
+    elapsed = time.perf_counter() - started
+    chars = sum(len(p["raw"]) for chapter in book for p in chapter)
+    print(
+        f"{chapters} chapters x {paragraphs} paragraphs, {terms} terms: matcher build {build:.2f}s, "
+        f"check {elapsed:.2f}s ({chapters / elapsed:.0f} chapters/s, {chars / elapsed / 1e6:.1f} M raw chars/s)"
+    )
+    print(f"paragraphs flagged: {found} (drift injected into {drifted})")
+    if found != drifted:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=5000)
+    parser.add_argument("--paragraphs", type=int, default=60)
+    parser.add_argument("--terms", type=int, default=20000)
+    parser.add_argument("--drift", type=float, default=0.02, help="share of paragraphs missing a form")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.chapters, args.paragraphs, args.terms, args.drift, args.seed)
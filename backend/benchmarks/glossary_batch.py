@@ -0,0 +1,117 @@
+"""LLM calls and tokens per 100 chapters: one chapter per extraction call vs batched.
+
+Uses a fake model that "extracts" every known name occurring in its input
+(minus the ones listed as already known), so no API key is needed. Runs
+against DATABASE_URL with a throwaway book that is deleted afterwards:
+
+    python -m benchmarks.glossary_batch --chapters 100 --budget 12000
+"""
+import argparse
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+from sqlalchemy import delete
+
+from app.core.database import async_engine, new_async_session
+from app.core.llm import estimate_tokens
+from app.models.book import Book
+from app.models.chapter import Chapter
+from app.models.glossary import Glossary
+from app.repositories.aio import chapter as chapter_repo
+from app.services import glossary as glossary_service
+from app.services import glossary_index
+
+SURNAMES = "萧林叶秦韩陆苏楚沈顾"
+GIVEN = "炎动凡羽立尘默寒风云"
+PLACES = ["乌坦城", "魔兽山脉", "天焚炼气塔", "青云宗", "迦南学院", "黑角域", "丹塔", "天墓"]
+FILLER = "他缓缓抬起头，目光望向远方的山峦，心中暗暗思索着接下来的修炼之路。"
+
+
+def _names() -> list[str]:
+    return [s + g for s in SURNAMES for g in GIVEN] + PLACES
+
+
+def _chapters(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    names = _names()
+    # Like a real novel, a core cast recurs and new names trickle in
+    core = names[:12]
+    chapters = []
+    for i in range(n):
+        cast = rng.sample(core, 5) + rng.sample(names[: 12 + i], 3)
+        lines = [f"第{i + 1}章"] + [f"{name}{FILLER * rng.randint(2, 4)}" for name in cast for _ in range(3)]
+        chapters.append("\n".join(lines))
+    return chapters
+
+
+class _FakeModel:
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    async def __call__(self, messages, *args, **kwargs):
+        system, human = messages[0][1], messages[-1][1]
+        known = set()
+        if human.startswith("Đã có trong glossary:"):
+            known = set(human.split("\n", 2)[1].split("、"))
+        found = [n for n in _names() if n in human and n not in known]
+        content = json.dumps(
+            [{"raw": n, "translated": f"VI {n}", "type": "character"} for n in found],
+            ensure_ascii=False,
+        )
+        self.calls += 1
+        self.input_tokens += estimate_tokens(system) + estimate_tokens(human)
+        self.output_tokens += estimate_tokens(content)
+        return SimpleNamespace(content=content)
+
+
+async def _run(mode: str, texts: list[str], budget: int) -> _FakeModel:
+    model = _FakeModel()
+    glossary_service.invoke_llm = model
+    async with new_async_session() as session:
+        book = Book(title=f"benchmark {mode}", author="benchmark")
+        session.add(book)
+        await session.commit()
+        try:
+            await chapter_repo.create_placeholders(session, book.id, list(enumerate(texts, start=1)))
+            await session.commit()
+            rows = await chapter_repo.list_unfinished_ingested(session, book.id)
+            chapters = [(chapter_id, texts[order - 1]) for chapter_id, order, _ in rows]
+            if mode == "single":
+                for chapter_id, text in chapters:
+                    await glossary_service.extract_glossary(session, text, book.id, chapter_id)
+            else:
+                for batch in glossary_service.pack_chapters(chapters, budget):
+                    await glossary_service.extract_glossary_batch(session, book.id, batch)
+        finally:
+            await session.rollback()
+            await session.exec(delete(Glossary).where(Glossary.book_id == book.id))
+            await session.exec(delete(Chapter).where(Chapter.book_id == book.id))
+            await session.exec(delete(Book).where(Book.id == book.id))
+            await session.commit()
+            glossary_index.invalidate(book.id)
+    return model
+
+
+async def main(n: int, budget: int) -> None:
+    texts = _chapters(n, seed=1)
+    print(f"{n} chapters, ~{sum(map(estimate_tokens, texts)) // n} tokens each, batch budget {budget}")
+    for mode in ("single", "batch"):
+        model = await _run(mode, texts, budget)
+        scale = 100 / n
+        print(
+            f"{mode:<7} per 100 chapters: {model.calls * scale:6.1f} calls   "
+            f"{model.input_tokens * scale:9.0f} input tokens   {model.output_tokens * scale:7.0f} output tokens"
+        )
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=100)
+    parser.add_argument("--budget", type=int, default=12000, help="GLOSSARY_BATCH_TOKENS to simulate")
+    args = parser.parse_args()
+    asyncio.run(main(args.chapters, args.budget))
@@ -0,0 +1,74 @@
+"""Glossary write throughput: lookup + per-row ORM inserts vs one INSERT ... ON CONFLICT.
+
+Runs against DATABASE_URL with throwaway books that are deleted afterwards:
+
+    python -m benchmarks.glossary_insert --sizes 100 1000 10000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete
+
+from app.core.database import async_engine, new_async_session
+from app.models.book import Book
+from app.models.glossary import Glossary
+from app.repositories.aio import glossary as glossary_repo
+
+
+def _items(n: int, prefix: str) -> list[dict]:
+    return [{"raw": f"{prefix}术语{i}", "translated": f"Thuật ngữ {i}", "type": "character"} for i in range(n)]
+
+
+async def _orm(session, items: list[dict], book_id) -> None:
+    # The previous path: dedup lookup, then one ORM object per term
+    existing = await glossary_repo.find_by_raw_values(session, [i["raw"] for i in items], book_id)
+    existing_raws = {g.raw for g in existing}
+    session.add_all(
+        Glossary(raw=i["raw"], translated=i["translated"], type=i["type"], book_id=book_id)
+        for i in items
+        if i["raw"] not in existing_raws
+    )
+    await session.commit()
+
+
+async def _bulk(session, items: list[dict], book_id) -> None:
+    await glossary_repo.create_missing(session, items, book_id)
+
+
+async def _measure(name: str, write, n: int) -> None:
+    async with new_async_session() as session:
+        book = Book(title=f"benchmark {name} {n}", author="benchmark")
+        session.add(book)
+        await session.commit()
+        try:
+            # Half of the second batch already exists, like re-extracting overlapping chapters
+            first, second = _items(n, "a"), _items(n // 2, "a") + _items(n - n // 2, "b")
+            started = time.perf_counter()
+            await write(session, first, book.id)
+            fresh = time.perf_counter() - started
+            started = time.perf_counter()
+            await write(session, second, book.id)
+            overlap = time.perf_counter() - started
+            print(
+                f"{name:<5} n={n:<6} new: {fresh * 1000:8.1f} ms ({n / fresh:9.0f} terms/s)   "
+                f"50% existing: {overlap * 1000:8.1f} ms ({n / overlap:9.0f} terms/s)"
+            )
+        finally:
+            await session.rollback()
+            await session.exec(delete(Glossary).where(Glossary.book_id == book.id))
+            await session.exec(delete(Book).where(Book.id == book.id))
+            await session.commit()
+
+
+async def main(sizes: list[int]) -> None:
+    for n in sizes:
+        await _measure("orm", _orm, n)
+        await _measure("bulk", _bulk, n)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    asyncio.run(main(parser.parse_args().sizes))
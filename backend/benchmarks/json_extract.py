@@ -0,0 +1,178 @@
+"""JSON extraction from model output: previous per-character scan vs app.core.json_extract.
+
+Checks both against the captured malformed outputs in data/malformed_outputs.jsonl,
+then times full and streaming parses of translate-shaped responses. No database
+or API key is needed:
+
+    python -m benchmarks.json_extract --sizes 50 100
+"""
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from app.core import json_extract
+
+CORPUS = Path(__file__).parent / "data" / "malformed_outputs.jsonl"
+
+SENTENCES = [
+    "Tiêu Viêm chậm rãi ngẩng đầu, ánh mắt nhìn về dãy núi phía xa.",
+    'Dược Lão khẽ cười: "Tiểu gia hỏa, đấu khí của ngươi còn kém xa."',
+    "[Hệ thống] Nhiệm vụ hoàn thành, phần thưởng: linh thạch x10.",
+    "Trong Nạp Giới có một viên đan dược {tam phẩm} tỏa ra hương thơm.",
+    "Hắn hít sâu một hơi, đấu khí trong đan điền cuồn cuộn như sóng.",
+]
+
+
+def _old_parse(response: str):
+    # The previous helper: brace counting that ignores strings, regex trailing-comma pass, json.loads
+    try:
+        for opener, closer in (("{", "}"), ("[", "]")):
+            start = response.find(opener)
+            if start == -1:
+                continue
+            depth = 0
+            for i in range(start, len(response)):
+                if response[i] == opener:
+                    depth += 1
+                elif response[i] == closer:
+                    depth -= 1
+                    if depth == 0:
+                        json_str = re.sub(r",\s*]", "]", response[start : i + 1])
+                        json_str = re.sub(r",\s*}", "}", json_str)
+                        return json.loads(json_str)
+        return None
+    except Exception:
+        return None
+
+
+class _OldArrayStream:
+    # The previous streaming scanner: one Python step per character, growing buffer
+    def __init__(self, key: str):
+        self._key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer, self._pos, self._started, self._item_start = "", 0, False, -1
+        self._depth, self._in_string, self._escape, self.done = 0, False, False, False
+
+    def feed(self, chunk: str) -> list:
+        self._buffer += chunk
+        if self.done:
+            return []
+        if not self._started:
+            match = self._key_re.search(self._buffer)
+            if match is None:
+                return []
+            self._started, self._pos = True, match.end()
+            self._item_start = self._pos
+        items, buf, i = [], self._buffer, self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}" and self._depth > 0:
+                self._depth -= 1
+            elif self._depth == 0 and ch in ",]":
+                raw = buf[self._item_start : i].strip()
+                if raw:
+                    try:
+                        items.append(json.loads(raw))
+                    except ValueError:
+                        pass
+                self._item_start = i + 1
+                if ch == "]":
+                    self.done = True
+                    i += 1
+                    break
+            i += 1
+        self._pos = i
+        return items
+
+
+def _response(kb: int, seed: int) -> str:
+    rng = random.Random(seed)
+    translations = []
+    size = 0
+    while size < kb * 1024:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 5)))
+        translations.append(paragraph)
+        size += len(paragraph.encode()) + 4
+    body = json.dumps(
+        {
+            "title_raw": "第三章 金丹之秘",
+            "title_translated": "Chương 3: Bí mật Kim Đan",
+            "order": 3,
+            "translations": translations,
+            "summary": "Tiêu Viêm tìm thấy một viên Kim Đan.",
+        },
+        ensure_ascii=False,
+        indent=1,
+    )
+    return f"```json\n{body}\n```"
+
+
+def _check_corpus() -> None:
+    cases = [json.loads(line) for line in CORPUS.read_text().splitlines() if line.strip()]
+    new_ok = old_ok = 0
+    for case in cases:
+        new = json_extract.extract_json(case["output"], case["kinds"])
+        old = _old_parse(case["output"])
+        new_ok += new == case["expect"]
+        old_ok += old == case["expect"]
+        if new != case["expect"]:
+            print(f"  MISMATCH {case['name']}: {str(new)[:120]}")
+    print(f"corpus: {len(cases)} cases, new {new_ok}/{len(cases)} correct, previous {old_ok}/{len(cases)}")
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def _stream(stream_cls, text: str, chunk: int) -> int:
+    stream = stream_cls("translations")
+    count = 0
+    for i in range(0, len(text), chunk):
+        count += len(stream.feed(text[i : i + chunk]))
+    return count
+
+
+def main(sizes: list[int], repeat: int, chunk: int) -> None:
+    _check_corpus()
+    orjson = json_extract.orjson
+    print(f"orjson: {'installed' if orjson is not None else 'not installed'}")
+    for kb in sizes:
+        text = _response(kb, seed=kb)
+        expected = len(json.loads(text[8:-4])["translations"])
+        assert _stream(json_extract.JsonArrayStream, text, chunk) == expected
+        timings = [("previous", _time(lambda: _old_parse(text), repeat))]
+        json_extract.orjson = None
+        timings.append(("new/json", _time(lambda: json_extract.extract_json(text), repeat)))
+        json_extract.orjson = orjson
+        if orjson is not None:
+            timings.append(("new/orjson", _time(lambda: json_extract.extract_json(text), repeat)))
+        timings.append(("stream prev", _time(lambda: _stream(_OldArrayStream, text, chunk), repeat)))
+        timings.append(("stream new", _time(lambda: _stream(json_extract.JsonArrayStream, text, chunk), repeat)))
+        print(f"{len(text.encode()) / 1024:6.0f} KB  " + "   ".join(f"{name}: {ms:7.2f} ms" for name, ms in timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100], help="response sizes in KB")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chunk", type=int, default=64, help="characters per streamed chunk")
+    args = parser.parse_args()
+    main(args.sizes, args.repeat, args.chunk)
@@ -0,0 +1,422 @@
+"""Endpoint load test with a fake LLM: latency percentiles, throughput and DB queries per request.
+
+Seeds a synthetic book (chapters with translated paragraphs, glossary terms)
+into DATABASE_URL and deletes it afterwards. app.core.llm.get_llm is replaced
+by a deterministic fake model with configurable latency, output token
+throughput and failure rate, and the ASGI app is driven in process, so no
+API key or running server is needed. Postgres only: the app relies on JSONB,
+ON CONFLICT and LISTEN/NOTIFY, which SQLite does not have.
+
+    python -m benchmarks.load --chapters 500 --terms 5000 --requests 200 --concurrency 8
+    python -m benchmarks.load --chapters 5000 --terms 20000 --save baseline.json
+    python -m benchmarks.load --chapters 5000 --terms 20000 --compare baseline.json
+
+--compare exits with status 1 when an endpoint's p95, throughput or DB
+queries per request regressed by more than --tolerance.
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from langchain_core.messages import AIMessage, AIMessageChunk
+from sqlalchemy import delete, insert
+
+from app.api.middleware import request_db_queries
+from app.core import llm
+from app.core.config import settings
+from app.core.database import async_engine, engine
+from app.main import app
+from app.models.book import Book
+from app.models.chapter import Chapter, ChapterStatus
+from app.models.glossary import Glossary
+from app.models.translation_cache import TranslationCacheEntry
+from app.services import glossary_index
+
+SURNAMES = "萧林叶秦韩陆苏楚沈顾王李张赵钱孙周吴郑冯陈褚卫蒋杨朱许何吕施"
+GIVEN = "炎动凡羽立尘默寒风云天星月山河海龙虎玄青白紫金灵霄逸轩辰宇浩然"
+CLAUSES = [
+    "缓缓抬起头，目光望向远方的山峦",
+    "心中暗暗思索着接下来的修炼之路",
+    "体内斗气翻涌，经脉隐隐作痛",
+    "冷笑一声，转身便走",
+    "沉默了片刻，终于开口",
+    "脸色微变，身形暴退数丈",
+]
+# Names the fake model "discovers" during glossary extraction; never seeded
+NEW_NAMES = ["玄冥子", "赤霄剑", "紫云阁", "青木诀", "天罡阵", "幽冥谷", "雷音寺", "碧落宫"]
+ROUTE_PREFIX = settings.API_V1_STR
+BATCH = 500  # rows per INSERT while seeding
+
+ENDPOINTS = {
+    # name: (method, route template as labelled by the request middleware)
+    "reader.chapter": ("GET", "/chapter/{book_id}/{order}"),
+    "reader.paragraphs": ("GET", "/chapter/{book_id}/{order}/paragraphs"),
+    "reader.toc": ("GET", "/chapter/list/{book_id}"),
+    "glossary.list": ("GET", "/glossary/{book_id}"),
+    "translate": ("POST", "/chapter/translate"),
+    "translate.stream": ("POST", "/chapter/translate/stream"),
+    "extract": ("POST", "/glossary/extract"),
+}
+
+
+class _FakeError(Exception):
+    code = 503  # retried by app.core.llm like a real server error
+
+
+class FakeChatModel:
+    """Stands in for ChatGoogleGenerativeAI: answers in the shape each prompt asks for.
+
+    A call sleeps latency (with +-25% jitter) plus output tokens / tps, and
+    fails with a retryable 503 at failure_rate. Both are seeded by the
+    request content, so a run is reproducible whatever the scheduling.
+    """
+
+    def __init__(self, latency: float, tps: float, failure_rate: float, seed: int):
+        self.latency = latency
+        self.tps = tps
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.calls = 0
+        self._attempts: dict[str, int] = {}
+
+    def _rng(self, messages: list) -> random.Random:
+        digest = hashlib.sha256(_text(messages[-1]).encode()).hexdigest()
+        attempt = self._attempts.get(digest, 0)
+        self._attempts[digest] = attempt + 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def _answer(self, messages: list) -> str:
+        human = _text(messages[-1])
+        if human.startswith("Chapter raw:") or not human.startswith(("[", "{")):
+            # Glossary extraction (single or batched): report the unseeded names present
+            return json.dumps(
+                [{"raw": n, "translated": f"Tân danh {i}", "type": "character"} for i, n in enumerate(NEW_NAMES) if n in human],
+                ensure_ascii=False,
+            )
+        data = json.loads(human)
+        if isinstance(data, dict):
+            # A chunked-mode window: a plain array of its paragraphs
+            return json.dumps([f"VI {p}" for p in data["paragraphs"]], ensure_ascii=False)
+        title = data[0] if data else ""
+        order = int("".join(ch for ch in title.split("章")[0] if ch.isdigit()) or 0)
+        return json.dumps(
+            {
+                "title_raw": title,
+                "title_translated": f"Chương {order}",
+                "order": order,
+                "summary": "Tóm tắt.",
+                "translations": [f"VI {p}" for p in data[1:]],
+            },
+            ensure_ascii=False,
+        )
+
+    async def _reply(self, messages: list) -> tuple[str, dict, float]:
+        self.calls += 1
+        rng = self._rng(messages)
+        content = self._answer(messages)
+        usage = {
+            "input_tokens": sum(llm.estimate_tokens(_text(m)) for m in messages),
+            "output_tokens": llm.estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        await asyncio.sleep(self.latency * rng.uniform(0.75, 1.25))
+        if rng.random() < self.failure_rate:
+            raise _FakeError("fake model: 503 UNAVAILABLE")
+        return content, usage, usage["output_tokens"] / self.tps
+
+    async def ainvoke(self, messages: list, **kwargs) -> AIMessage:
+        content, usage, generation = await self._reply(messages)
+        await asyncio.sleep(generation)
+        return AIMessage(content=content, usage_metadata=usage)
+
+    async def astream(self, messages: list, **kwargs):
+        content, usage, generation = await self._reply(messages)
+        pieces = [content[i : i + 40] for i in range(0, len(content), 40)] or [""]
+        for i, piece in enumerate(pieces):
+            await asyncio.sleep(generation / len(pieces))
+            # Usage arrives with the last chunk, as increments like the real client
+            yield AIMessageChunk(content=piece, usage_metadata=usage if i == len(pieces) - 1 else None)
+
+
+def _text(message) -> str:
+    content = message[1] if isinstance(message, tuple) else getattr(message, "content", message)
+    return content if isinstance(content, str) else str(content)
+
+
+def _terms(n: int) -> list[dict]:
+    names = ("".join(chars) for chars in itertools.product(SURNAMES, GIVEN, GIVEN))
+    types = ("character", "location", "skill", "item")
+    return [
+        {"raw": raw, "translated": f"Danh xưng {i}", "type": types[i % len(types)]}
+        for i, raw in zip(range(n), names)
+    ]
+
+
+def _paragraph(rng: random.Random, terms: list[dict]) -> str:
+    name = rng.choice(terms)["raw"] if terms else "他"
+    return f"{name}{'，'.join(rng.sample(CLAUSES, rng.randint(1, 3)))}。"
+
+
+def _chapter_text(rng: random.Random, number: int, terms: list[dict], paragraphs: int, new_names: bool = False) -> str:
+    lines = [f"第{number}章 风起云涌"] + [_paragraph(rng, terms) for _ in range(paragraphs)]
+    if new_names:
+        lines += [f"{name}{rng.choice(CLAUSES)}。" for name in rng.sample(NEW_NAMES, 3)]
+    return "\n".join(lines)
+
+
+def _seed(chapters: int, terms: list[dict], paragraphs: int, seed: int) -> tuple[uuid.UUID, list[uuid.UUID]]:
+    """Insert a translated book with set-based inserts; returns its id and chapter ids in order."""
+    rng = random.Random(seed)
+    book_id = uuid.uuid4()
+    chapter_ids = [uuid.uuid4() for _ in range(chapters)]
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Book.__table__).values(
+                id=book_id, title="load benchmark", author="benchmark", created_date=now, updated_date=now
+            )
+        )
+        rows = []
+        for order, chapter_id in enumerate(chapter_ids, start=1):
+            raws = [_paragraph(rng, terms) for _ in range(paragraphs)]
+            rows.append(
+                {
+                    "id": chapter_id,
+                    "book_id": book_id,
+                    "order": order,
+                    "title": {"raw": f"第{order}章 风起云涌", "translated": f"Chương {order}"},
+                    "summary": "Tóm tắt.",
+                    "paragraphs": [{"raw": p, "translated": f"VI {p}"} for p in raws],
+                    "status": ChapterStatus.TRANSLATED.value,
+                    "created_date": now,
+                    "updated_date": now,
+                }
+            )
+            if len(rows) == BATCH:
+                conn.execute(insert(Chapter.__table__), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(Chapter.__table__), rows)
+        for start in range(0, len(terms), BATCH):
+            conn.execute(
+                insert(Glossary.__table__),
+                [
+                    {**term, "id": uuid.uuid4(), "book_id": book_id, "first_chapter_id": chapter_ids[0],
+                     "created_date": now, "updated_date": now}
+                    for term in terms[start : start + BATCH]
+                ],
+            )
+    return book_id, chapter_ids
+
+
+def _cleanup(book_id: uuid.UUID) -> None:
+    with engine.begin() as conn:
+        conn.execute(delete(TranslationCacheEntry.__table__).where(TranslationCacheEntry.book_id == book_id))
+        conn.execute(delete(Glossary.__table__).where(Glossary.book_id == book_id))
+        conn.execute(delete(Chapter.__table__).where(Chapter.book_id == book_id))
+        conn.execute(delete(Book.__table__).where(Book.id == book_id))
+    glossary_index.invalidate(book_id)
+
+
+class _Workload:
+    """Builds the i-th request of each endpoint for one seeded book."""
+
+    def __init__(self, book_id: uuid.UUID, chapter_ids: list[uuid.UUID], terms: list[dict], paragraphs: int, seed: int):
+        self.book_id = book_id
+        self.chapter_ids = chapter_ids
+        self.terms = terms
+        self.paragraphs = paragraphs
+        self.seed = seed
+        # Translated chapters get orders after the seeded ones (the service subtracts 6 from the model's)
+        self._next_number = itertools.count(len(chapter_ids) + 7)
+
+    def request(self, endpoint: str, i: int) -> tuple[str, str, Optional[dict]]:
+        rng = random.Random(f"{self.seed}:{endpoint}:{i}")
+        order = rng.randint(1, len(self.chapter_ids))
+        book = self.book_id
+        if endpoint == "reader.chapter":
+            return "GET", f"/chapter/{book}/{order}", None
+        if endpoint == "reader.paragraphs":
+            return "GET", f"/chapter/{book}/{order}/paragraphs?start={rng.randint(0, 20)}&limit=20", None
+        if endpoint == "reader.toc":
+            return "GET", f"/chapter/list/{book}?title_only=true&limit=100&after={order - 1}", None
+        if endpoint == "glossary.list":
+            return "GET", f"/glossary/{book}", None
+        if endpoint in ("translate", "translate.stream"):
+            text = _chapter_text(rng, next(self._next_number), self.terms, self.paragraphs)
+            return "POST", "/chapter/translate" + (endpoint == "translate.stream") * "/stream", {
+                "text": text,
+                "book_id": str(book),
+            }
+        if endpoint == "extract":
+            text = _chapter_text(rng, order, self.terms, self.paragraphs, new_names=True)
+            # An existing chapter id: without one the endpoint creates a placeholder per call
+            return "POST", "/glossary/extract", {
+                "text": text,
+                "book_id": str(book),
+                "first_chapter_id": str(self.chapter_ids[order - 1]),
+            }
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    # Nearest rank on sorted values
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q * len(values))) - 1))]
+
+
+async def _run_endpoint(
+    client: httpx.AsyncClient, workload: _Workload, endpoint: str, requests: int, concurrency: int, warmup: int
+) -> dict:
+    method, route = ENDPOINTS[endpoint]
+    route = ROUTE_PREFIX + route
+    for i in range(warmup):
+        verb, url, body = workload.request(endpoint, -1 - i)
+        await client.request(verb, ROUTE_PREFIX + url, json=body)
+
+    queries_before = request_db_queries.get(method=method, route=route)
+    count_before = request_db_queries.count(method=method, route=route)
+    latencies: list[float] = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            verb, url, body = workload.request(endpoint, i)
+            started = time.perf_counter()
+            response = await client.request(verb, ROUTE_PREFIX + url, json=body)
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    counted = request_db_queries.count(method=method, route=route) - count_before
+    queries = request_db_queries.get(method=method, route=route) - queries_before
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "rps": requests / elapsed if elapsed else 0.0,
+        "queries_per_request": queries / counted if counted else 0.0,
+    }
+
+
+def _regressions(name: str, result: dict, base: dict, tolerance: float) -> list[str]:
+    found = []
+    if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+        found.append(f"{name}: p95 {base['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+    if result["rps"] < base["rps"] * (1 - tolerance):
+        found.append(f"{name}: throughput {base['rps']:.1f} -> {result['rps']:.1f} req/s")
+    # Query counts are deterministic, so any increase is a regression
+    if result["queries_per_request"] > base["queries_per_request"] + 0.01:
+        found.append(f"{name}: queries/request {base['queries_per_request']:.2f} -> {result['queries_per_request']:.2f}")
+    if result["errors"] > base["errors"]:
+        found.append(f"{name}: errors {base['errors']} -> {result['errors']}")
+    return found
+
+
+def _print(results: dict, baseline: Optional[dict]) -> None:
+    print(
+        f"{'endpoint':<18} {'requests':>8} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'req/s':>8} {'queries/req':>11}"
+    )
+    for name, r in results.items():
+        line = (
+            f"{name:<18} {r['requests']:>8} {r['errors']:>6} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+            f"{r['p99_ms']:>9.1f} {r['rps']:>8.1f} {r['queries_per_request']:>11.2f}"
+        )
+        base = (baseline or {}).get(name)
+        if base:
+            p95 = (r["p95_ms"] / base["p95_ms"] - 1) if base["p95_ms"] else 0.0
+            rps = (r["rps"] / base["rps"] - 1) if base["rps"] else 0.0
+            line += f"   vs baseline: p95 {p95:+.0%}  req/s {rps:+.0%}"
+        print(line)
+
+
+async def main(args: argparse.Namespace) -> int:
+    # Keep prompt caching in process and out of the way of the fake model
+    settings.CONTEXT_CACHE_BACKEND = "local"
+    model = FakeChatModel(args.latency, args.tps, args.failure_rate, args.seed)
+    llm.get_llm = lambda *_, **__: model
+
+    terms = _terms(args.terms)
+    if len(terms) < args.terms:
+        print(f"only {len(terms)} distinct synthetic terms are available")
+    config = {k: getattr(args, k) for k in ("chapters", "terms", "paragraphs", "requests", "concurrency", "latency", "tps", "failure_rate")}
+    started = time.perf_counter()
+    book_id, chapter_ids = _seed(args.chapters, terms, args.paragraphs, args.seed)
+    print(
+        f"seeded {args.chapters} chapters x {args.paragraphs} paragraphs, {len(terms)} terms "
+        f"in {time.perf_counter() - started:.1f}s; fake model {args.latency * 1000:.0f} ms + "
+        f"{args.tps:.0f} tokens/s, failure rate {args.failure_rate:.0%}"
+    )
+    workload = _Workload(book_id, chapter_ids, terms, args.paragraphs, args.seed)
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for endpoint in args.endpoints:
+                results[endpoint] = await _run_endpoint(
+                    client, workload, endpoint, args.requests, args.concurrency, args.warmup
+                )
+    finally:
+        _cleanup(book_id)
+        await async_engine.dispose()
+    print(f"fake model calls: {model.calls}")
+
+    baseline = None
+    if args.compare:
+        saved = json.loads(Path(args.compare).read_text())
+        if saved["config"] != config:
+            print(f"warning: baseline was recorded with {saved['config']}")
+        baseline = saved["results"]
+    _print(results, baseline)
+    if args.save:
+        Path(args.save).write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+        print(f"saved baseline to {args.save}")
+    if baseline:
+        regressions = [
+            message
+            for name, result in results.items()
+            if name in baseline
+            for message in _regressions(name, result, baseline[name], args.tolerance)
+        ]
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=200, help="seeded chapters (10 to 5000)")
+    parser.add_argument("--terms", type=int, default=2000, help="seeded glossary terms (100 to 20000)")
+    parser.add_argument("--paragraphs", type=int, default=40, help="paragraphs per chapter")
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=3, help="unmeasured requests per endpoint")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model seconds before output")
+    parser.add_argument("--tps", type=float, default=200.0, help="fake model output tokens per second")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of fake calls failing with 503")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 / throughput change")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,114 @@
+"""Compare chapter read latency and payload size: JSON blob + Python vs JSONB projection.
+
+Runs against DATABASE_URL using temporary tables, so no application data is touched:
+
+    python -m benchmarks.reader_payload --chapters 200 --paragraphs 150
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+PARAGRAPH = "张三走进房间，看到桌上放着一个古朴的木盒。" * 3
+TRANSLATED = "Trương Tam bước vào phòng, thấy trên bàn đặt một chiếc hộp gỗ cổ kính. " * 3
+
+# Before: load the whole row and split the paragraph objects in Python
+FULL_ROW = 'SELECT id, title, "order", summary, paragraphs FROM {table} WHERE "order" = :order'
+
+# After: the database projects the translated side and the title text
+PROJECTED = """
+SELECT id, title->>'translated' AS title, "order", summary,
+       (SELECT jsonb_agg(p->>'translated' ORDER BY i)
+          FROM jsonb_array_elements(paragraphs) WITH ORDINALITY AS t(p, i)) AS paragraphs
+  FROM {table} WHERE "order" = :order
+"""
+
+# After, lazy loading: one screen of paragraphs
+RANGE = """
+SELECT (SELECT jsonb_agg(p->>'translated' ORDER BY i)
+          FROM jsonb_array_elements(paragraphs) WITH ORDINALITY AS t(p, i)
+         WHERE i > :start AND i <= :start + :limit) AS paragraphs
+  FROM {table} WHERE "order" = :order
+"""
+
+
+def _setup(conn, chapters: int, paragraphs: int) -> None:
+    body = json.dumps(
+        [{"raw": f"{PARAGRAPH}{i}", "translated": f"{TRANSLATED}{i}"} for i in range(paragraphs)],
+        ensure_ascii=False,
+    )
+    title = json.dumps({"raw": "第一章 开始", "translated": "Chương 1: Bắt đầu"}, ensure_ascii=False)
+    for table, kind in (("bench_chapters_json", "json"), ("bench_chapters_jsonb", "jsonb")):
+        conn.execute(text(
+            f'CREATE TEMP TABLE {table} (id serial PRIMARY KEY, "order" int UNIQUE, '
+            f"title {kind}, summary text, paragraphs {kind})"
+        ))
+        conn.execute(
+            text(
+                f'INSERT INTO {table} ("order", title, summary, paragraphs) '
+                f"SELECT g, CAST(:title AS {kind}), 'summary', CAST(:body AS {kind}) "
+                "FROM generate_series(1, :n) g"
+            ),
+            {"title": title, "body": body, "n": chapters},
+        )
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def _split(row) -> dict:
+    # What the reader endpoint used to do with the JSON blob
+    translated, raw = [], []
+    for p in row.paragraphs or []:
+        translated.append(p.get("translated", p.get("raw", "")))
+        raw.append(p.get("raw", ""))
+    return {"title": row.title.get("translated"), "paragraphs": translated}
+
+
+def _run(conn, name: str, sql: str, chapters: int, rounds: int, params: dict, post=None) -> None:
+    timings, sizes = [], []
+    for _ in range(rounds):
+        for order in range(1, chapters + 1):
+            started = time.perf_counter()
+            row = conn.execute(text(sql), {"order": order, **params}).one()
+            post(row) if post else dict(row._mapping)
+            timings.append(time.perf_counter() - started)
+            sizes.append(len(json.dumps(list(row), ensure_ascii=False, default=str).encode()))
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<28} p50 {statistics.median(timings) * 1000:7.2f} ms   "
+        f"p95 {p95 * 1000:7.2f} ms   row payload {statistics.mean(sizes) / 1024:8.1f} KiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=150)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--page", type=int, default=20, help="paragraphs per lazy-loaded range")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        _setup(conn, args.chapters, args.paragraphs)
+        n, r = args.chapters, args.rounds
+        print(f"{n} chapters x {args.paragraphs} paragraphs, {r} rounds")
+        _run(conn, "json: full row + python", FULL_ROW.format(table="bench_chapters_json"), n, r, {}, _split)
+        _run(conn, "jsonb: full row + python", FULL_ROW.format(table="bench_chapters_jsonb"), n, r, {}, _split)
+        _run(conn, "jsonb: projected", PROJECTED.format(table="bench_chapters_jsonb"), n, r, {})
+        _run(
+            conn,
+            f"jsonb: range of {args.page}",
+            RANGE.format(table="bench_chapters_jsonb"),
+            n,
+            r,
+            {"start": 0, "limit": args.page},
+        )
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Full-text search latency on a synthetic book, raw (Chinese bigrams) and translated side.
+
+Runs against DATABASE_URL (migrated, for btree_gin and search_paragraphs) using
+a temporary copy of the search table, so no application data is touched:
+
+    python -m benchmarks.search --chapters 5000 --paragraphs 60
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.core.search_text import raw_tokens, raw_tsquery
+from app.repositories.aio.search import _ORDER_BY, _SEARCH_SQL, _TRANSLATED_HEADLINE, _TSQUERY
+
+_CJK = [chr(c) for c in range(0x4E00, 0x4E00 + 2000)]
+_WORDS = ["bước", "vào", "phòng", "thấy", "trên", "bàn", "hộp", "gỗ", "cổ", "kính", "nói", "rằng", "hắn", "nàng"]
+_NAMES = ["林动", "小貂", "应欢欢", "林琅天"]
+_NAME_FORMS = ["Lâm Động", "Tiểu Điêu", "Ứng Hoan Hoan", "Lâm Lang Thiên"]
+
+_INSERT = """
+INSERT INTO bench_search_paragraphs
+    (chapter_id, paragraph, book_id, chapter_order, raw, translated, raw_tsv, translated_tsv)
+SELECT chapter_id, paragraph, :book_id, chapter_order, raw, translated,
+       to_tsvector('simple', tokens), to_tsvector('simple', translated)
+FROM unnest(
+    CAST(:chapter_ids AS uuid[]), CAST(:paragraphs AS int[]), CAST(:orders AS int[]),
+    CAST(:raws AS text[]), CAST(:translateds AS text[]), CAST(:tokens AS text[])
+) AS t(chapter_id, paragraph, chapter_order, raw, translated, tokens)
+"""
+
+
+def _paragraph(rng: random.Random, order: int) -> tuple[str, str]:
+    raw = "".join(rng.choices(_CJK, k=60)) + "。"
+    translated = " ".join(rng.choices(_WORDS, k=30)) + "."
+    # Names get rarer later in the book, so "first appearance" is a real query
+    if rng.random() < 0.05:
+        i = rng.randrange(len(_NAMES)) if order > 10 else 0
+        raw = raw[:20] + _NAMES[i] + raw[20:]
+        translated = f"{_NAME_FORMS[i]} {translated}"
+    return raw, translated
+
+
+def _setup(conn, book_id: uuid.UUID, chapters: int, paragraphs: int, rng: random.Random) -> None:
+    conn.execute(text("CREATE TEMP TABLE bench_search_paragraphs (LIKE search_paragraphs INCLUDING ALL)"))
+    for start in range(1, chapters + 1, 100):
+        columns = {k: [] for k in ("chapter_ids", "paragraphs", "orders", "raws", "translateds", "tokens")}
+        for order in range(start, min(start + 100, chapters + 1)):
+            chapter_id = uuid.uuid4()
+            for index in range(paragraphs):
+                raw, translated = _paragraph(rng, order)
+                columns["chapter_ids"].append(chapter_id)
+                columns["paragraphs"].append(index)
+                columns["orders"].append(order)
+                columns["raws"].append(raw)
+                columns["translateds"].append(translated)
+                columns["tokens"].append(raw_tokens(raw))
+        conn.execute(text(_INSERT), {"book_id": book_id, **columns})
+    conn.execute(text("ANALYZE bench_search_paragraphs"))
+
+
+def _run(conn, book_id: uuid.UUID, name: str, side: str, query: str, sort: str, rounds: int) -> None:
+    sql = _SEARCH_SQL.format(
+        tsv="raw_tsv" if side == "raw" else "translated_tsv",
+        tsquery=_TSQUERY[side],
+        order_by=_ORDER_BY[sort],
+        headline=_TRANSLATED_HEADLINE if side == "translated" else "NULL",
+    ).replace("search_paragraphs", "bench_search_paragraphs")
+    params = {"book_id": book_id, "query": query, "offset": 0, "limit": 21}
+    timings, hits = [], 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hits = len(conn.execute(text(sql), params).all())
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+    print(
+        f"{name:<34} p50 {statistics.median(timings) * 1000:7.2f} ms   "
+        f"p95 {p95 * 1000:7.2f} ms   {hits} rows"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=5000)
+    parser.add_argument("--paragraphs", type=int, default=60)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    book_id = uuid.uuid4()
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        _setup(conn, book_id, args.chapters, args.paragraphs, random.Random(args.seed))
+        print(
+            f"{args.chapters} chapters x {args.paragraphs} paragraphs indexed in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+        r = args.rounds
+        _run(conn, book_id, "raw name, ranked", "raw", raw_tsquery("林动"), "rank", r)
+        _run(conn, book_id, "raw name, first appearance", "raw", raw_tsquery("应欢欢"), "order", r)
+        _run(conn, book_id, "raw single character", "raw", raw_tsquery(_CJK[7]), "rank", r)
+        _run(conn, book_id, "translated name, ranked", "translated", '"Lâm Lang Thiên"', "rank", r)
+        _run(conn, book_id, "translated common word, ranked", "translated", "phòng", "rank", r)
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Paragraph segmentation throughput on whole novels, plus golden boundary checks.
+
+Checks app.core.segmenter against data/segmentation_golden.jsonl, then times the
+previous re.split-based splitter and the single-pass segmenter. Pass real
+novels as UTF-8 .txt files, or a synthetic one of --mb megabytes is generated:
+
+    python -m benchmarks.segmenter --mb 8
+    python -m benchmarks.segmenter --files novel1.txt novel2.txt
+"""
+import argparse
+import io
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from app.core import segmenter
+
+GOLDEN = Path(__file__).parent / "data" / "segmentation_golden.jsonl"
+
+CLAUSES = [
+    "萧炎缓缓抬起头，目光望向远方的山峦",
+    "心中暗暗思索着接下来的修炼之路",
+    "体内斗气翻涌，经脉隐隐作痛",
+    "药老的声音在脑海中响起",
+    "四周的魔兽发出低沉的嘶吼",
+    "那道身影在半空中停了下来",
+]
+
+
+def _old_split(text: str) -> list[str]:
+    # The previous _split_into_paragraphs, kept for comparison
+    cleaned = text.strip()
+    paragraphs = [p.strip() for p in cleaned.split("\n") if p.strip()]
+    result: list[str] = []
+    for para in paragraphs:
+        if len(para) <= 200:
+            result.append(para)
+        else:
+            sentences = re.split(r"([。！？；]+)", para)
+            sentences = [s for s in sentences if s.strip()]
+            current_chunk = ""
+            for part in sentences:
+                current_chunk += part
+                if re.search(r"[。！？；]", part) and len(current_chunk) > 150:
+                    result.append(current_chunk.strip())
+                    current_chunk = ""
+            if current_chunk.strip():
+                result.append(current_chunk.strip())
+    return result
+
+
+def _novel(mb: float, seed: int) -> str:
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    chapter = 0
+    while size < mb * 1024 * 1024:
+        if not lines or rng.random() < 0.01:
+            chapter += 1
+            lines.append(f"第{chapter}章 风起云涌")
+        sentences = []
+        for _ in range(rng.choice((1, 1, 2, 3, 6, 12))):
+            sentence = "，".join(rng.sample(CLAUSES, rng.randint(1, 3)))
+            if rng.random() < 0.3:
+                sentence = f"“{sentence}。{rng.choice(CLAUSES)}？”"
+            else:
+                sentence += rng.choice("。。。！？；")
+            sentences.append(sentence)
+        line = "".join(sentences)
+        lines.append(line)
+        lines.append("")
+        size += len(line.encode()) + 2
+    return "\n".join(lines)
+
+
+def _check_golden() -> None:
+    cases = [json.loads(line) for line in GOLDEN.read_text().splitlines() if line.strip()]
+    ok = 0
+    for case in cases:
+        got = list(segmenter.iter_paragraphs(case["text"], case["target"], case["max_size"], case["unit"]))
+        if got == case["expect"]:
+            ok += 1
+        else:
+            print(f"  MISMATCH {case['name']}: {got}")
+    print(f"golden: {ok}/{len(cases)} cases match")
+
+
+def _time(fn, repeat: int = 3) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, count
+
+
+def main(files: list[str], mb: float) -> None:
+    _check_golden()
+    corpus = [(name, Path(name).read_text(encoding="utf-8")) for name in files] or [
+        (f"synthetic {mb:g} MB", _novel(mb, seed=1))
+    ]
+    for name, text in corpus:
+        size_mb = len(text.encode()) / 1024 / 1024
+        old = _old_split(text)
+        new = list(segmenter.iter_paragraphs(text, 150, 200, "chars"))
+        quote_starts = sum(p[0] in "”’」』" for p in old)
+        print(
+            f"{name}: {size_mb:.1f} MB, {len(old)} paragraphs before / {len(new)} now, "
+            f"{quote_starts} previous paragraphs started with a stray closing quote"
+        )
+        runs = [
+            ("previous", lambda: len(_old_split(text))),
+            ("chars", lambda: sum(1 for _ in segmenter.iter_paragraphs(text, 150, 200, "chars"))),
+            ("tokens", lambda: sum(1 for _ in segmenter.iter_paragraphs(text, 150, 200, "tokens"))),
+            (
+                "streamed",
+                lambda: sum(1 for _ in segmenter.iter_paragraphs(iter(lambda f=io.StringIO(text): f.read(65536), ""))),
+            ),
+        ]
+        for label, fn in runs:
+            elapsed, count = _time(fn)
+            print(f"  {label:<9} {elapsed * 1000:8.1f} ms  {size_mb / elapsed:6.1f} MB/s  {count} paragraphs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", nargs="*", default=[], help="UTF-8 novels to segment")
+    parser.add_argument("--mb", type=float, default=8, help="size of the synthetic novel")
+    args = parser.parse_args()
+    main(args.files, args.mb)
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.services import chapter as chapter_service
+
+
+@pytest.fixture
+def windows(monkeypatch):
+    sent: list[int] = []
+
+    async def translate_window(paragraphs, indices, glossary, semaphore, cache_tag, repair=True):
+        sent.extend(indices)
+        return [f"t{i}" for i in indices]
+
+    monkeypatch.setattr(chapter_service, "_translate_window", translate_window)
+    return sent
+
+
+def _metadata(monkeypatch, title_raw: str) -> None:
+    async def extract(raw_paragraphs):
+        return {"title_raw": title_raw, "title_translated": "Chương 3", "order": 3}
+
+    monkeypatch.setattr(chapter_service, "_extract_chapter_metadata", extract)
+
+
+def test_chunked_leaves_the_title_to_the_metadata_call(monkeypatch, windows):
+    _metadata(monkeypatch, "第三章")
+    parsed = asyncio.run(chapter_service._translate_chunked(["第三章", "甲。", "乙。"], None))
+
+    assert 0 not in windows
+    assert parsed["translations"] == ["t1", "t2"]
+    assert parsed["title_translated"] == "Chương 3"
+
+
+def test_chunked_translates_the_opening_paragraph_when_it_is_not_the_title(monkeypatch, windows):
+    _metadata(monkeypatch, "")
+    parsed = asyncio.run(chapter_service._translate_chunked(["甲。", "乙。"], None))
+
+    assert sorted(windows) == [0, 1]
+    assert parsed["translations"] == ["t0", "t1"]
+
+
+def test_full_response_is_not_realigned(monkeypatch):
+    def align(*args):
+        raise AssertionError("a complete response must not be realigned")
+
+    monkeypatch.setattr(chapter_service.alignment, "align", align)
+    parsed = {"title_raw": "第三章", "translations": ["Chương 3 bắt đầu.", "Tiêu Viêm."]}
+
+    result = asyncio.run(
+        chapter_service._realign_chapter(parsed, ["第三章", "第三章开始。", "萧炎。"], None, None, None)
+    )
+
+    assert result["translations"] == parsed["translations"]
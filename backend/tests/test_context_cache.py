@@ -0,0 +1,84 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+
+import pytest
+
+from app.core import context_cache
+from app.core.config import settings
+from app.services import glossary_index
+
+SYSTEM = "Translate into Vietnamese. " * 200
+
+
+@pytest.fixture
+def local(monkeypatch):
+    monkeypatch.setattr(settings, "CONTEXT_CACHE_BACKEND", "local")
+    monkeypatch.setattr(context_cache, "_backend", None)
+    monkeypatch.setattr(context_cache, "_handles", OrderedDict())
+    monkeypatch.setattr(context_cache, "_failed", {})
+    return context_cache
+
+
+def _bind(messages, tag="book:1", system_tokens=2000):
+    return asyncio.run(context_cache.bind(None, "model", "key", messages, tag, system_tokens))
+
+
+def test_local_backend_puts_the_cached_prefix_back(local):
+    messages = [("system", SYSTEM), ("human", "你好")]
+
+    first, first_kwargs = _bind(messages)
+    second, _ = _bind(messages)
+
+    assert first == second == messages
+    assert first_kwargs == {}
+    assert len(local._handles) == 1
+    assert local.context_cache_requests.get(outcome="hit") >= 1
+
+
+def test_short_or_untagged_prompts_are_sent_inline(local):
+    messages = [("system", SYSTEM), ("human", "你好")]
+
+    assert _bind(messages, system_tokens=10) == (messages, {})
+    assert _bind(messages, tag=None) == (messages, {})
+    assert not local._handles
+
+
+def test_evict_drops_the_tags_handles(local):
+    _bind([("system", SYSTEM), ("human", "a")], tag="book:1")
+    _bind([("system", SYSTEM + "!"), ("human", "b")], tag="book:2")
+
+    local.evict("book:1")
+
+    assert [handle.tag for handle in local._handles.values()] == ["book:2"]
+
+
+def _index(monkeypatch, book_id):
+    index = glossary_index._BookGlossary(book_id)
+    index.add("萧炎", "Tiêu Viêm", "character")
+    index.add("药老", "Dược Lão", "character")
+    monkeypatch.setitem(glossary_index._indexes, book_id, index)
+    return index
+
+
+def test_translate_prompts_keep_the_filtered_glossary_by_default(local, monkeypatch):
+    book_id = uuid.uuid4()
+    _index(monkeypatch, book_id)
+    relevant = [{"raw": "萧炎", "translated": "Tiêu Viêm", "type": "character"}]
+
+    terms, tag = asyncio.run(glossary_index.get_prompt_glossary(None, book_id, relevant))
+
+    assert terms == relevant
+    assert tag is None
+
+
+def test_book_glossary_snapshot_is_opt_in(local, monkeypatch):
+    monkeypatch.setattr(settings, "CONTEXT_CACHE_BOOK_GLOSSARY", True)
+    book_id = uuid.uuid4()
+    _index(monkeypatch, book_id)
+    relevant = [{"raw": "萧炎", "translated": "Tiêu Viêm", "type": "character"}]
+
+    terms, tag = asyncio.run(glossary_index.get_prompt_glossary(None, book_id, relevant))
+
+    assert [t["raw"] for t in terms] == ["萧炎", "药老"]
+    assert tag == context_cache.book_tag(book_id)
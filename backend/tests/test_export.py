@@ -0,0 +1,36 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.models.chapter import translation_error
+from app.services import export
+
+
+class FakeSession:
+    """Streams (order, title, translated, raw) rows like the export query."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def stream(self, statement):
+        async def rows():
+            for row in self.rows:
+                yield row
+
+        return rows()
+
+
+def test_txt_falls_back_to_raw_for_failed_paragraphs():
+    book = SimpleNamespace(id=uuid.uuid4(), title="Sách", author="Tác giả")
+    session = FakeSession([
+        (1, "Chương 1", ["Chương 1", "xin chào", translation_error(2)], ["第一章", "你好", "再见"]),
+    ])
+
+    async def collect():
+        return b"".join([chunk async for chunk in export._txt(session, book)]).decode()
+
+    text = asyncio.run(collect())
+
+    assert "xin chào" in text
+    assert "再见" in text
+    assert "Translation error" not in text
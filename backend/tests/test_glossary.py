@@ -0,0 +1,21 @@
+from app.services import glossary as glossary_service
+
+
+def test_malformed_items_are_dropped():
+    response = """```json
+[
+  {"raw": "萧炎", "translated": "Tiêu Viêm", "type": "character"},
+  "药老",
+  {"raw": "斗气", "translated": "Đấu khí"},
+  {"raw": "乌坦城", "translated": null, "type": "location"},
+  {"raw": "纳兰嫣然", "translated": "Nạp Lan Yên Nhiên", "type": "character"}
+]
+```"""
+
+    items = glossary_service._parse_glossary_from_response(response)
+
+    assert [item["raw"] for item in items] == ["萧炎", "纳兰嫣然"]
+
+
+def test_unparseable_response_has_no_items():
+    assert glossary_service._parse_glossary_from_response("no terms here") == []
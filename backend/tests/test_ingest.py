@@ -0,0 +1,51 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services import ingest
+
+
+async def _chunks(*parts: str):
+    for part in parts:
+        yield part.encode()
+
+
+def _split(*parts: str) -> list[str]:
+    async def collect():
+        return [chapter async for chapter in ingest.split_chapters(_chunks(*parts))]
+
+    return asyncio.run(collect())
+
+
+def test_split_chapters_across_chunk_boundaries():
+    chapters = _split("序言\n第一章 开", "始\n萧炎。\n第二", "章 药老\n药老笑了。")
+
+    assert chapters == ["第一章 开始\n萧炎。", "第二章 药老\n药老笑了。"]
+
+
+class FakeSession:
+    def __init__(self):
+        self.rolled_back = False
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+def test_upload_without_chapters_is_rejected(monkeypatch):
+    calls = []
+
+    async def record(name, *args):
+        calls.append(name)
+        return 1
+
+    monkeypatch.setattr(ingest.chapter_repo, "lock_orders", lambda *a: record("lock", *a))
+    monkeypatch.setattr(ingest.chapter_repo, "get_next_order", lambda *a: record("order", *a))
+    monkeypatch.setattr(ingest, "submit_ingest_job", lambda *a: record("job", *a))
+    session = FakeSession()
+
+    with pytest.raises(ValueError):
+        asyncio.run(ingest.ingest_book(session, uuid.uuid4(), _chunks("no headings here")))
+
+    assert calls == ["lock", "order"]
+    assert session.rolled_back
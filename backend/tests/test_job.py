@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.models.chapter import Chapter, ChapterStatus, can_transition
+from app.models.job import Job, JobStatus
+from app.services import chapter as chapter_service
+from app.services import job as job_service
+from app.services import reader
+
+
+class FakeChapters:
+    """In-memory stand-in for the chapter and job repositories."""
+
+    def __init__(self, chapter: Chapter):
+        self.chapter = chapter
+        self.statuses: list[str] = []
+        self.jobs: list[Job] = []
+
+    async def get_by_id(self, session, chapter_id):
+        return self.chapter if chapter_id == self.chapter.id else None
+
+    async def set_status(self, session, chapter_id, status):
+        if chapter_id != self.chapter.id:
+            return None
+        if self.chapter.status != status.value:
+            if not can_transition(self.chapter.status, status.value):
+                raise ValueError(f"Invalid chapter status transition {self.chapter.status} -> {status.value}")
+            self.chapter.status = status.value
+            self.statuses.append(status.value)
+        return self.chapter
+
+    async def create_job(self, session, kind, payload, book_id=None, chapter_id=None, max_attempts=3):
+        job = Job(id=uuid.uuid4(), kind=kind, payload=payload, book_id=book_id, chapter_id=chapter_id)
+        self.jobs.append(job)
+        return job
+
+
+@pytest.fixture
+def book_id():
+    return uuid.uuid4()
+
+
+@pytest.fixture
+def fake(monkeypatch, book_id):
+    chapter = Chapter(id=uuid.uuid4(), book_id=book_id, order=3, status=ChapterStatus.TRANSLATED.value)
+    fake = FakeChapters(chapter)
+    monkeypatch.setattr(job_service.chapter_repo, "get_by_id", fake.get_by_id)
+    monkeypatch.setattr(job_service.chapter_repo, "set_status", fake.set_status)
+    monkeypatch.setattr(job_service.job_repo, "create", fake.create_job)
+
+    async def translate_chapter(session, text, book_id, chapter_id, chunked=None):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(chapter_service, "translate_chapter", translate_chapter)
+    return fake
+
+
+def test_requeued_translated_chapter_stays_readable(fake, book_id):
+    job = asyncio.run(job_service.submit_translate_chapter(None, "第三章", book_id, fake.chapter.id))
+    assert job.payload["retranslate"] is True
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(job_service._run_translate_chapter(None, job))
+    for status in (JobStatus.QUEUED, JobStatus.FAILED):
+        asyncio.run(job_service._sync_chapter_status(None, job, status))
+
+    assert fake.chapter.status == ChapterStatus.TRANSLATED.value
+    assert fake.statuses == []
+
+
+def test_queued_chapter_follows_its_job(fake, book_id):
+    fake.chapter.status = ChapterStatus.FAILED.value
+    job = asyncio.run(job_service.submit_translate_chapter(None, "第三章", book_id, fake.chapter.id))
+    assert job.payload["retranslate"] is False
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(job_service._run_translate_chapter(None, job))
+    asyncio.run(job_service._sync_chapter_status(None, job, JobStatus.FAILED))
+
+    assert fake.statuses == ["queued", "running", "failed"]
+
+
+def test_status_change_drops_cached_reader_data(fake, book_id):
+    reader._tocs.set(book_id, ["toc"])
+    asyncio.run(chapter_service.set_status(None, fake.chapter.id, ChapterStatus.TRANSLATED))
+    assert reader._tocs.get(book_id) == ["toc"]
+
+    asyncio.run(chapter_service.set_status(None, fake.chapter.id, ChapterStatus.QUEUED))
+    assert reader._tocs.get(book_id) is None
@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import context_cache, llm
+from app.core.config import settings
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls: list[list] = []
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls.append(messages)
+        return SimpleNamespace(content="xin chào", usage_metadata={"input_tokens": 5, "output_tokens": 2})
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = FakeModel()
+    monkeypatch.setattr(llm, "get_llm", lambda model, api_key=None: fake)
+    monkeypatch.setattr(llm, "_pool", llm._KeyPool(["test-key"]))
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0)
+    return fake
+
+
+def test_context_cache_failure_is_retried(monkeypatch, model):
+    failures = [Unavailable("cache create failed")]
+
+    async def bind(llm_, model_, api_key, messages, tag, system_tokens):
+        if failures:
+            raise failures.pop()
+        return messages, {}
+
+    monkeypatch.setattr(context_cache, "bind", bind)
+
+    result = asyncio.run(llm.invoke_llm([("human", "你好")], cache_tag="book"))
+
+    assert result.content == "xin chào"
+    assert len(model.calls) == 1
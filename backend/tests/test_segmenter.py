@@ -0,0 +1,16 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core import segmenter
+
+GOLDEN = Path(__file__).parent.parent / "benchmarks" / "data" / "segmentation_golden.jsonl"
+
+CASES = [json.loads(line) for line in GOLDEN.read_text().splitlines() if line.strip()]
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_golden(case):
+    got = list(segmenter.iter_paragraphs(case["text"], case["target"], case["max_size"], case["unit"]))
+    assert got == case["expect"]
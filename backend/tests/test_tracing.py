@@ -0,0 +1,116 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("opentelemetry.sdk")
+
+from app.core import llm, tracing
+from app.core.config import settings
+from app.repositories.aio import translation_cache as cache_repo
+
+
+@tracing.traced
+def lookup(book_id: uuid.UUID) -> str:
+    with tracing.stage("translate", "glossary", book_id=book_id, terms=None):
+        return str(book_id)
+
+
+@tracing.traced
+async def save() -> None:
+    with tracing.span("save.rows", rows=3) as current:
+        tracing.set_attributes(current, written=2)
+
+
+class FakeModel:
+    async def ainvoke(self, messages, **kwargs):
+        return SimpleNamespace(content="xin chào", usage_metadata={"input_tokens": 5, "output_tokens": 2})
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def exec(self, statement):
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+@pytest.fixture(autouse=True)
+def spans():
+    tracing.setup("memory")
+    tracing.clear_spans()
+    yield
+    tracing.clear_spans()
+
+
+def _by_name() -> dict:
+    return {s.name: s for s in tracing.finished_spans()}
+
+
+def test_stage_inside_traced_function():
+    book_id = uuid.uuid4()
+    before = tracing.stage_seconds.count(pipeline="translate", stage="glossary")
+
+    lookup(book_id)
+
+    spans = _by_name()
+    outer = spans[f"{lookup.__module__.removeprefix('app.')}.lookup"]
+    inner = spans["translate.glossary"]
+    assert inner.parent.span_id == outer.context.span_id
+    # UUIDs are stored as strings and None attributes are left out
+    assert dict(inner.attributes) == {"book_id": str(book_id)}
+    assert tracing.stage_seconds.count(pipeline="translate", stage="glossary") == before + 1
+
+
+def test_async_traced_function_and_set_attributes():
+    asyncio.run(save())
+
+    spans = _by_name()
+    outer = spans[f"{save.__module__.removeprefix('app.')}.save"]
+    inner = spans["save.rows"]
+    assert inner.parent.span_id == outer.context.span_id
+    assert dict(inner.attributes) == {"rows": 3, "written": 2}
+
+
+def test_detached_span_records_errors():
+    with pytest.raises(ValueError):
+        with tracing.span("stream", current=False, book_id="b"):
+            raise ValueError("boom")
+
+    (span,) = tracing.finished_spans()
+    assert span.name == "stream"
+    assert not span.status.is_ok
+    assert span.events[0].name == "exception"
+
+
+def test_invoke_llm_span(monkeypatch):
+    monkeypatch.setattr(llm, "get_llm", lambda model, api_key=None: FakeModel())
+    monkeypatch.setattr(llm, "_pool", llm._KeyPool(["test-key"]))
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0)
+
+    with llm.billed_to("book-1"):
+        asyncio.run(llm.invoke_llm([("human", "你好")], model="gemini-test"))
+
+    span = _by_name()["llm.invoke"]
+    attributes = dict(span.attributes)
+    assert span.status.is_ok
+    assert attributes["gen_ai.request.model"] == "gemini-test"
+    assert attributes["llm.book"] == "book-1"
+    assert attributes["llm.attempts"] == 1
+    assert attributes["llm.api_key"] == "key0"
+    assert attributes["gen_ai.usage.input_tokens"] == 5
+    assert attributes["gen_ai.usage.output_tokens"] == 2
+    # No cache_tag, so the attribute is left out
+    assert "llm.cache_tag" not in attributes
+
+
+def test_traced_repository_function():
+    entry = SimpleNamespace(key="k1")
+
+    found = asyncio.run(cache_repo.get_many(FakeSession([entry]), ["k1"]))
+
+    assert found == {"k1": entry}
+    (span,) = tracing.finished_spans()
+    assert span.name == "repositories.aio.translation_cache.get_many"
+    assert span.status.is_ok